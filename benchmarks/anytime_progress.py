@@ -0,0 +1,61 @@
+"""Best error vs elapsed time for the reference solver's anytime mode.
+
+Runs approximate_anytime on the 152-value base set used by the stress tiers
+and prints each progress entry: when the best configuration improved or a
+resistor count was fully searched, with its error and proven gap.
+
+Usage:
+    python benchmarks/anytime_progress.py
+    python benchmarks/anytime_progress.py --targets 2.48313 1234.5678 --max-resistors 8 --budget 5
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBLEM_DIR = os.path.join(PROJECT_ROOT, "problems", "equivalent-resistance")
+sys.path[:0] = [
+    os.path.join(PROBLEM_DIR, "languages", "python"),
+    os.path.join(PROBLEM_DIR, "tools"),
+    PROBLEM_DIR,
+]
+
+from generate_tiers import base_set  # noqa: E402
+from reference import approximate_anytime  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=float, nargs="+", default=[2.48313, 1234.5678, 98765.4321])
+    parser.add_argument("--base-size", type=int, default=152)
+    parser.add_argument("--max-resistors", type=int, default=8)
+    parser.add_argument("--budget", type=float, default=5.0, help="Seconds per target (default: 5)")
+    parser.add_argument("--memory-mb", type=float, help="Peak RSS budget in MB")
+    args = parser.parse_args()
+
+    base_resistances = base_set(args.base_size)
+    for target in args.targets:
+        print(f"\ntarget {target}, maxResistors {args.max_resistors}, budget {args.budget}s\n")
+        print(f"{'SECONDS':>10} {'SEARCHED':>9} {'ERROR':>12} {'GAP':>12}")
+        result = approximate_anytime(
+            base_resistances,
+            target,
+            args.max_resistors,
+            time_budget=args.budget,
+            memory_mb=args.memory_mb,
+            on_progress=lambda e: print(
+                f"{e['seconds']:>10.3f} {e['resistors']:>9} {_num(e['error']):>12} {_num(e['gap']):>12}"
+            ),
+        )
+        state = "complete" if result["complete"] else f"stopped after {result['searched_resistors']} resistors"
+        print(f"\n  {result['scf']}  = {result['value']}  ({result['resistors']} resistors, {state})")
+    print()
+
+
+def _num(value):
+    return "-" if value is None else f"{value:.3e}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Batch target queries: approximate_many vs approximate() in a loop.
+
+Answers N log-uniform targets against one base set with the reference
+solver, once with a loop of Solution().approximate calls (each rebuilds the
+levels and searches alone) and once with approximate_many (levels built
+once, targets answered in one sorted sweep), and checks both agree.
+
+Usage:
+    python benchmarks/batch_targets.py
+    python benchmarks/batch_targets.py --targets 10000 --loop-sample 100
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBLEM_DIR = os.path.join(PROJECT_ROOT, "problems", "equivalent-resistance")
+sys.path[:0] = [
+    os.path.join(PROBLEM_DIR, "languages", "python"),
+    os.path.join(PROBLEM_DIR, "tools"),
+    PROBLEM_DIR,
+]
+
+from generate_tiers import base_set  # noqa: E402
+from reference import Solution, approximate_many  # noqa: E402
+from resistor_utils import evaluate_config  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=1000, help="Number of targets (default: 1000)")
+    parser.add_argument("--base-size", type=int, default=152)
+    parser.add_argument("--max-resistors", type=int, default=4)
+    parser.add_argument(
+        "--loop-sample", type=int,
+        help="Time the loop on only this many targets and extrapolate (default: all)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base_resistances = base_set(args.base_size)
+    low, high = min(base_resistances), max(base_resistances)
+    targets = [math.exp(rng.uniform(math.log(low), math.log(high))) for _ in range(args.targets)]
+
+    start = time.perf_counter()
+    batch = approximate_many(base_resistances, targets, args.max_resistors)
+    batch_seconds = time.perf_counter() - start
+
+    sample = targets[:args.loop_sample] if args.loop_sample else targets
+    solution = Solution()
+    start = time.perf_counter()
+    looped = [solution.approximate(base_resistances, t, args.max_resistors) for t in sample]
+    loop_seconds = (time.perf_counter() - start) * len(targets) / len(sample)
+
+    mismatches = sum(
+        1 for t, a, b in zip(sample, looped, batch)
+        if abs(abs(evaluate_config(a, base_resistances) - t) - abs(evaluate_config(b, base_resistances) - t)) > t * 1e-12
+    )
+
+    estimated = " (extrapolated)" if len(sample) < len(targets) else ""
+    print(f"\n{len(targets)} targets, {len(base_resistances)} base values, maxResistors {args.max_resistors}\n")
+    print(f"  approximate() loop   {loop_seconds:10.2f}s{estimated}  {loop_seconds / len(targets) * 1000:8.2f} ms/target")
+    print(f"  approximate_many()   {batch_seconds:10.2f}s  {batch_seconds / len(targets) * 1000:8.2f} ms/target")
+    print(f"  speedup              {loop_seconds / batch_seconds:10.1f}x")
+    print(f"  answers differing    {mismatches} of {len(sample)}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Search-space sizes of binary vs canonical series-parallel enumeration.
+
+For each maxResistors, counts the candidates with 1..maxResistors resistors:
+
+  binary     every ordered binary series/parallel expression
+  split      what brute_force.py generates before its value dedup
+             (level n built from splits (i, n - i) with i <= n // 2)
+  canonical  distinct circuits (problems/.../tools/canonical.py), each once
+
+Usage:
+    python benchmarks/enumeration_counts.py
+    python benchmarks/enumeration_counts.py --base-counts 2 152 --max-resistors 10
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [
+    os.path.join(PROJECT_ROOT, "problems", "equivalent-resistance", "languages", "python"),
+    os.path.join(PROJECT_ROOT, "problems", "equivalent-resistance", "tools"),
+]
+
+from canonical import count_binary, count_canonical, count_split_pairs  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-counts", type=int, nargs="+", default=[1, 2, 152])
+    parser.add_argument("--max-resistors", type=int, default=13)
+    args = parser.parse_args()
+
+    for base_count in args.base_counts:
+        print(f"\nbase values: {base_count}\n")
+        header = f"{'MAX':>4} {'BINARY':>14} {'SPLIT':>14} {'CANONICAL':>14} {'REMOVED vs SPLIT':>17}"
+        print(header)
+        print("-" * len(header))
+        totals = [0, 0, 0]
+        for n in range(1, args.max_resistors + 1):
+            totals[0] += count_binary(base_count, n)
+            totals[1] += count_split_pairs(base_count, n)
+            totals[2] += count_canonical(base_count, n)
+            removed = 1 - totals[2] / totals[1]
+            print(
+                f"{n:>4} {_short(totals[0]):>14} {_short(totals[1]):>14} {_short(totals[2]):>14}"
+                f" {removed:>16.2%}"
+            )
+    print()
+
+
+def _short(count):
+    return str(count) if count < 10**12 else f"{count:.3e}"
+
+
+if __name__ == "__main__":
+    main()
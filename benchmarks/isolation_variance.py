@@ -0,0 +1,83 @@
+"""Per-test CPU time variance with and without CPU pinning (run_solution isolate).
+
+Runs a solution through the engine several times with --concurrency runs
+in flight at once, first with tests floating across all cores and then
+with each test pinned to a dedicated core, and prints each test's mean CPU
+time and coefficient of variation (stdev / mean) in both modes. Runs are
+not recorded in the run history.
+
+Usage:
+    python benchmarks/isolation_variance.py
+    python benchmarks/isolation_variance.py --rounds 5 --concurrency 8 --tests 1 3 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from engine import run_solution_async  # noqa: E402
+from engine.runner import isolation_slots  # noqa: E402
+
+DEFAULT_SOLUTION = os.path.join(PROJECT_ROOT, "problems", "equivalent-resistance", "tools", "reference.py")
+
+
+async def sample(code: str, args, isolate: bool) -> dict:
+    """CPU times per test name over rounds x concurrency runs."""
+    times = {}
+    for _ in range(args.rounds):
+        results = await asyncio.gather(*(
+            run_solution_async(
+                args.problem, args.language, code,
+                baseline=False, tests=args.tests, isolate=isolate,
+            )
+            for _ in range(args.concurrency)
+        ))
+        for result in results:
+            for test in result["tests"]:
+                if test.get("verdict") == "passed":
+                    times.setdefault(test["name"], []).append(test["time_seconds"])
+    return times
+
+
+def describe(samples: list) -> str:
+    if len(samples) < 2:
+        return f"{'-':>8} {'-':>7}"
+    mean = statistics.mean(samples)
+    cv = statistics.stdev(samples) / mean if mean else 0.0
+    return f"{mean:7.3f}s {cv:6.1%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-p", "--problem", default="equivalent-resistance")
+    parser.add_argument("-l", "--language", default="python")
+    parser.add_argument("-s", "--solution", default=DEFAULT_SOLUTION)
+    parser.add_argument("--rounds", type=int, default=3, help="Batches of concurrent runs per mode (default: 3)")
+    parser.add_argument(
+        "--concurrency", type=int, default=os.cpu_count() or 1,
+        help="Runs in flight at once (default: CPU count)",
+    )
+    parser.add_argument("--tests", nargs="+", help="Only these test ids (default: all)")
+    args = parser.parse_args()
+
+    with open(args.solution) as f:
+        code = f.read()
+
+    floating = asyncio.run(sample(code, args, isolate=False))
+    pinned = asyncio.run(sample(code, args, isolate=True))
+
+    runs = args.rounds * args.concurrency
+    print(f"\n{runs} runs per mode, {args.concurrency} at once, {isolation_slots()} pinned slot(s)\n")
+    print(f"  {'test':<10} {'floating mean':>13} {'cv':>6}   {'pinned mean':>11} {'cv':>6}")
+    for name in sorted(set(floating) | set(pinned), key=lambda n: int(n.rsplit("_", 1)[-1])):
+        print(f"  {name:<10} {describe(floating.get(name, [])):>21}   {describe(pinned.get(name, [])):>19}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
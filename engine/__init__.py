@@ -1,3 +1,3 @@
-from .runner import run_solution
+from .runner import run_solution, run_solution_async
 
-__all__ = ["run_solution"]
+__all__ = ["run_solution", "run_solution_async"]
@@ -1,9 +1,22 @@
-"""CLI entry point: python -m engine run -p <problem> -l <language> -s <solution_file>"""
+"""CLI entry point.
+
+    python -m engine run -p <problem> -l <language> -s <solution_file> [--profile] [--memory-profile] [--warm]
+        [--tests <id> ...] [--fail-fast] [--order cheapest] [--record]
+    python -m engine grade <solutions_dir_or_manifest> [-p <problem>] [-l <language>]
+    python -m engine baseline -p <problem> -l <language> -s <reference_solution_file>
+    python -m engine scale -p <problem> -l <language> -s <solution_file> [--tiers <tier> ...]
+    python -m engine history {runs,trend,slowest} [-p <problem>] [-l <language>] [-s <solution_file>]
+    python -m engine worker [--listen <host>:<port>] [--slots <n>] [--isolate] [--record]
+"""
 
 import argparse
+import asyncio
 import json
+import os
 import sys
+import time
 
+from . import baseline, grade, history, remote, tiers
 from .runner import run_solution
 
 
@@ -24,13 +37,221 @@ def main():
         "--no-per-test", action="store_true", dest="no_per_test",
         help="Run all tests in a single batch instead of individually",
     )
+    run_parser.add_argument(
+        "--timings", action="store_true",
+        help="Record and print per-phase timings and per-test CPU usage",
+    )
+    run_parser.add_argument(
+        "--repeats", type=int, default=1,
+        help="Run each test N times and report medians (steadier reference ratios)",
+    )
+    run_parser.add_argument(
+        "--max-time-ratio", type=float, dest="max_time_ratio",
+        help="Mark passing tests slower than this multiple of the reference as too_slow",
+    )
+    run_parser.add_argument(
+        "--no-baseline", action="store_true", dest="no_baseline",
+        help="Don't compare against the recorded reference baseline",
+    )
+    run_parser.add_argument(
+        "--tier", help="Run a generated stress tier (name in problems/<problem>/tiers/ or path) instead of the tests",
+    )
+    run_parser.add_argument(
+        "--profile", action="store_true",
+        help="Profile each test's CPU usage and print its top functions (harnesses with a profile_file)",
+    )
+    run_parser.add_argument(
+        "--memory-profile", action="store_true", dest="memory_profile",
+        help="Trace allocations; tests near the memory limit report their top allocation sites",
+    )
+    run_parser.add_argument(
+        "--profile-dir", dest="profile_dir",
+        help="With --profile, also write each test's collapsed stacks to <dir>/<test>.folded for flamegraph tools",
+    )
+    run_parser.add_argument(
+        "--tests", nargs="+", metavar="ID",
+        help="Run only these test ids; the others are reported as skipped",
+    )
+    run_parser.add_argument(
+        "--fail-fast", action="store_true", dest="fail_fast",
+        help="Stop after the first test that does not pass",
+    )
+    run_parser.add_argument(
+        "--order", choices=("file", "cheapest"), default="file",
+        help="Test order: file (default) or cheapest (lowest recorded CPU time first)",
+    )
+    run_parser.add_argument(
+        "--isolate", action="store_true",
+        help="Pin each test to a dedicated core for steadier timings (see README)",
+    )
+    run_parser.add_argument(
+        "--warm", action="store_true",
+        help="Run tests on warm worker JVMs instead of a fresh process each (harnesses with a worker_command)",
+    )
+    run_parser.add_argument(
+        "--record", action="store_true",
+        help="Append the run to the run history (python -m engine history)",
+    )
+
+    grade_parser = subparsers.add_parser(
+        "grade", help="Grade many solutions in one invocation",
+    )
+    grade_parser.add_argument(
+        "path", help="Directory of solutions, or a .json/.jsonl manifest of {solution, problem, language}",
+    )
+    grade_parser.add_argument("-p", "--problem", help="Problem slug (default: inferred from path)")
+    grade_parser.add_argument("-l", "--language", help="Language slug (default: inferred from path)")
+    grade_parser.add_argument(
+        "-o", "--output", default="grade_results.jsonl",
+        help="JSON Lines results file (default: grade_results.jsonl)",
+    )
+    grade_parser.add_argument("-j", "--workers", type=int, help="Concurrent tests (default: CPU count)")
+    grade_parser.add_argument("--timeout", type=int, default=120, help="Setup command timeout in seconds")
+    grade_parser.add_argument(
+        "--isolate", action="store_true",
+        help="Pin each test to a dedicated core; caps -j at the number of cores",
+    )
+    grade_parser.add_argument(
+        "--no-resume", action="store_true", dest="no_resume",
+        help="Start over instead of skipping pairs already in the output file",
+    )
+
+    baseline_parser = subparsers.add_parser(
+        "baseline", help="Record a reference solution's per-test baseline",
+    )
+    baseline_parser.add_argument("-p", "--problem", required=True, help="Problem slug")
+    baseline_parser.add_argument("-l", "--language", required=True, help="Language slug")
+    baseline_parser.add_argument("-s", "--solution", required=True, help="Path to reference solution file")
+    baseline_parser.add_argument("--repeats", type=int, default=5, help="Runs per test (default: 5)")
+    baseline_parser.add_argument("--timeout", type=int, default=120, help="Timeout in seconds")
+
+    scale_parser = subparsers.add_parser(
+        "scale", help="Run a solution across stress tiers and report where it crosses the limits",
+    )
+    scale_parser.add_argument("-p", "--problem", required=True, help="Problem slug")
+    scale_parser.add_argument("-l", "--language", required=True, help="Language slug")
+    scale_parser.add_argument("-s", "--solution", required=True, help="Path to solution file")
+    scale_parser.add_argument("--tiers", nargs="+", help="Tiers to run (default: all, in grid order)")
+    scale_parser.add_argument("--json", action="store_true", dest="json_output", help="Output raw JSON")
+    scale_parser.add_argument("--timeout", type=int, default=120, help="Timeout in seconds")
+
+    history_parser = subparsers.add_parser(
+        "history", help="Query the run history (recent runs, a test's trend, slowest tests)",
+    )
+    history_parser.add_argument(
+        "query", choices=("runs", "trend", "slowest"),
+        help="runs: latest runs; trend: one test across runs; slowest: slowest tests recently",
+    )
+    history_parser.add_argument("-p", "--problem", help="Problem slug (required for trend)")
+    history_parser.add_argument("-l", "--language", help="Language slug (required for trend)")
+    history_parser.add_argument("-s", "--solution", help="Only runs of this solution file")
+    history_parser.add_argument("--hash", dest="solution_hash", help="Only runs of the solution with this hash")
+    history_parser.add_argument("-t", "--test", help="Test name for trend (e.g. test_3)")
+    history_parser.add_argument("--tier", help="For trend: a stress tier's case instead of a problem test")
+    history_parser.add_argument(
+        "--mode", choices=("per_test", "batch", "warm"), help="For trend: only runs in this mode",
+    )
+    history_parser.add_argument("--days", type=float, default=7, help="For slowest: look back this many days (default: 7)")
+    history_parser.add_argument("-n", "--limit", type=int, default=20, help="Rows to show (default: 20)")
+    history_parser.add_argument("--json", action="store_true", dest="json_output", help="Output raw JSON")
+
+    worker_parser = subparsers.add_parser(
+        "worker", help="Serve run jobs to a remote dispatcher (e.g. python -m server --remote-worker)",
+    )
+    worker_parser.add_argument(
+        "--listen", default=f"127.0.0.1:{remote.DEFAULT_PORT}",
+        help=f"Address to listen on, host:port (default: 127.0.0.1:{remote.DEFAULT_PORT}); no authentication",
+    )
+    worker_parser.add_argument("--slots", type=int, help="Runs at once (default: CPU count)")
+    worker_parser.add_argument(
+        "--isolate", action="store_true",
+        help="Pin each test to a dedicated core; caps --slots at the number of cores",
+    )
+    worker_parser.add_argument(
+        "--record", action="store_true",
+        help="Append the runs to this host's run history (python -m engine history)",
+    )
 
     args = parser.parse_args()
 
-    if args.command != "run":
+    if args.command == "run":
+        _run(args, run_parser)
+    elif args.command == "grade":
+        _grade(args)
+    elif args.command == "baseline":
+        _baseline(args)
+    elif args.command == "scale":
+        _scale(args)
+    elif args.command == "history":
+        _history(args)
+    elif args.command == "worker":
+        _worker(args)
+    else:
         parser.print_help()
         sys.exit(1)
 
+
+def _run(args, run_parser):
+    if args.record:
+        history.enable_recording()
+    try:
+        with open(args.solution) as f:
+            solution_code = f.read()
+    except FileNotFoundError:
+        print(f"Error: Solution file not found: {args.solution}", file=sys.stderr)
+        sys.exit(1)
+
+    if (
+        args.max_time_ratio is not None
+        and not args.no_baseline
+        and baseline.load_baseline(args.problem, args.language) is None
+    ):
+        print(
+            f"Warning: no {args.language} baseline recorded for {args.problem}; "
+            "--max-time-ratio has no effect until one is (python -m engine baseline)",
+            file=sys.stderr,
+        )
+
+    try:
+        result = run_solution(
+            problem=args.problem,
+            language=args.language,
+            solution_code=solution_code,
+            timeout=args.timeout,
+            per_test=not args.no_per_test,
+            timings=args.timings,
+            repeats=args.repeats,
+            baseline=not args.no_baseline,
+            max_time_ratio=args.max_time_ratio,
+            tier=args.tier,
+            profile=args.profile,
+            memory_profile=args.memory_profile,
+            warm=args.warm,
+            tests=args.tests,
+            fail_fast=args.fail_fast,
+            order=args.order,
+            isolate=args.isolate,
+        )
+    except ValueError as e:
+        # Unknown test ids: a usage error, like a bad argument
+        run_parser.error(str(e))
+
+    if args.profile and args.profile_dir:
+        _write_stacks(result, args.profile_dir)
+
+    if args.json_output:
+        print(json.dumps(result, indent=2))
+    else:
+        _pretty_print(result, args.problem, args.language)
+        if "timings" in result:
+            _print_timings(result["timings"])
+
+    # Exit with non-zero if any tests failed or errored
+    if result["status"] != "completed" or result["summary"]["failed"]:
+        sys.exit(1)
+
+
+def _baseline(args):
     try:
         with open(args.solution) as f:
             solution_code = f.read()
@@ -38,21 +259,171 @@ def main():
         print(f"Error: Solution file not found: {args.solution}", file=sys.stderr)
         sys.exit(1)
 
-    result = run_solution(
+    entry = baseline.record_baseline(
         problem=args.problem,
         language=args.language,
         solution_code=solution_code,
+        repeats=args.repeats,
+        source=args.solution,
         timeout=args.timeout,
-        per_test=not args.no_per_test,
     )
 
+    print(f"\n{args.problem.upper()} ({args.language}) -- baseline from {args.solution}, {args.repeats} repeats\n")
+    for name, ref in entry["tests"].items():
+        t = ref["time_seconds"]
+        m = ref["memory_mb"]
+        print(f"  {name:<8} {t['median']}s cpu [{t['ci_low']}-{t['ci_high']}]  {m['median']}MB")
+    if not entry["tests"]:
+        print("  No tests passed on every repeat; nothing recorded.")
+    print()
+
+
+def _scale(args):
+    try:
+        with open(args.solution) as f:
+            solution_code = f.read()
+    except FileNotFoundError:
+        print(f"Error: Solution file not found: {args.solution}", file=sys.stderr)
+        sys.exit(1)
+
+    names = args.tiers or tiers.list_tiers(args.problem)
+    if not names:
+        print(f"Error: no tiers found for {args.problem}", file=sys.stderr)
+        sys.exit(1)
+
+    def progress(row):
+        print(f"  {row['tier']:<12} {row['passed']}/{row['total']} passed", file=sys.stderr)
+
+    rows = tiers.run_scale(
+        problem=args.problem,
+        language=args.language,
+        solution_code=solution_code,
+        tiers=names,
+        timeout=args.timeout,
+        on_tier=None if args.json_output else progress,
+    )
+    first = tiers.crossings(rows)
+
     if args.json_output:
-        print(json.dumps(result, indent=2))
+        print(json.dumps({"tiers": rows, "crossings": first}, indent=2))
     else:
-        _pretty_print(result, args.problem, args.language)
+        print(f"\n{args.problem.upper()} ({args.language}) -- scaling over {len(rows)} tier(s)\n")
+        print(tiers.format_curve(rows))
+        print()
+        print(f"  Time limit first exceeded:   {first['time'] or 'never'}")
+        print(f"  Memory limit first exceeded: {first['memory'] or 'never'}")
+        print()
 
-    # Exit with non-zero if any tests failed or errored
-    if result["status"] != "completed" or result["summary"]["passed"] != result["summary"]["total"]:
+    if any(row["passed"] != row["total"] for row in rows):
+        sys.exit(1)
+
+
+def _history(args):
+    solution_hash = args.solution_hash
+    if args.solution:
+        try:
+            with open(args.solution) as f:
+                solution_hash = history.solution_hash(f.read())
+        except FileNotFoundError:
+            print(f"Error: Solution file not found: {args.solution}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.query == "runs":
+        rows = history.latest_runs(
+            solution_hash=solution_hash, problem=args.problem, language=args.language, limit=args.limit,
+        )
+    elif args.query == "trend":
+        if not (args.problem and args.language and args.test):
+            print("Error: trend needs -p, -l and -t", file=sys.stderr)
+            sys.exit(1)
+        rows = history.test_trend(
+            args.problem, args.language, args.test,
+            solution_hash=solution_hash, tier=args.tier, mode=args.mode, limit=args.limit,
+        )
+    else:
+        rows = history.slowest_tests(
+            since=time.time() - args.days * 86400,
+            problem=args.problem, language=args.language, limit=args.limit,
+        )
+
+    if args.json_output:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No matching runs in the history.")
+        return
+
+    print()
+    if args.query == "runs":
+        for run in rows:
+            tier = f" tier {run['tier']}" if run["tier"] else ""
+            print(
+                f"  {_timestamp(run['recorded_at'])}  {run['solution_hash']}  {run['problem']} ({run['language']}){tier}"
+                f"  {run['mode']}  {run['status']}  {run['passed']}/{run['total']} passed ({run['time_seconds']}s)"
+            )
+            for test in run["tests"]:
+                print(f"      {test['name']:<10} {test['verdict']:<22} {_usage(test)}")
+    else:
+        for test in rows:
+            print(
+                f"  {_timestamp(test['recorded_at'])}  {test['solution_hash']}  {test['problem']} ({test['language']})"
+                f"  {test['mode']:<8}  {test['name']:<10} {test['verdict']:<22} {_usage(test)}"
+            )
+    print()
+
+
+def _worker(args):
+    if args.record:
+        history.enable_recording()
+    host, port = remote.parse_address(args.listen)
+    try:
+        asyncio.run(remote.serve(host, port, slots=args.slots, isolate=args.isolate))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+def _usage(test: dict) -> str:
+    # Batch-mode tests have no memory measurement
+    memory = f"  {test['memory_mb']}MB" if test["memory_mb"] is not None else ""
+    return f"{test['time_seconds']}s cpu{memory}"
+
+
+def _timestamp(unix_time: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(unix_time))
+
+
+def _grade(args):
+    solutions = grade.discover_solutions(args.path, problem=args.problem, language=args.language)
+    missing = [s["solution"] for s in solutions if not s["problem"] or not s["language"]]
+    if missing:
+        print(f"Error: cannot infer problem/language for: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    if not solutions:
+        print(f"Error: no solutions found in {args.path}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Grading {len(solutions)} solution(s) -> {args.output}", file=sys.stderr)
+
+    def progress(record):
+        verdict = record.get("verdict", record["status"])
+        print(f"  {verdict:<22} test_{record['test_id']}  {record['solution']}", file=sys.stderr)
+
+    records = grade.grade(
+        solutions,
+        output_path=args.output,
+        workers=args.workers,
+        timeout=args.timeout,
+        resume=not args.no_resume,
+        on_record=progress,
+        isolate=args.isolate,
+    )
+
+    rows = grade.aggregate(records)
+    print()
+    print(grade.format_table(rows))
+    print()
+
+    if any(row["passed"] != row["total"] for row in rows):
         sys.exit(1)
 
 
@@ -79,14 +450,18 @@ def _pretty_print(result: dict, problem: str, language: str):
         passed = summary["passed"]
         total = summary["total"]
         time_s = summary["time_seconds"]
-        print(f"\n{header} -- {passed}/{total} passed ({time_s}s)\n")
+        skipped = f", {summary['skipped']} skipped" if summary.get("skipped") else ""
+        print(f"\n{header} -- {passed}/{total} passed{skipped} ({time_s}s)\n")
 
         for test in result["tests"]:
             name = test["name"]
             t = test["time_seconds"]
 
+            if test.get("verdict") == "skipped":
+                print(f"  SKIP {name}")
+
             # Per-test mode (has "verdict" field)
-            if "verdict" in test:
+            elif "verdict" in test:
                 verdict = test["verdict"]
                 mem = test.get("memory_mb", 0)
                 msg = test.get("message") or ""
@@ -97,16 +472,26 @@ def _pretty_print(result: dict, problem: str, language: str):
                     "time_limit_exceeded": "TLE ",
                     "memory_limit_exceeded": "MLE ",
                     "runtime_error": "RTE ",
+                    "too_slow": "SLOW",
                 }
                 label = _VERDICT_LABELS.get(verdict, verdict.upper())
 
+                # time_seconds is CPU time; wall time is reported alongside
+                usage = f"{t}s cpu, {test['wall_seconds']}s wall" if "wall_seconds" in test else f"{t}s"
+                if "time_ratio" in test:
+                    usage += f", {test['time_ratio']}x ref"
+
                 if verdict == "passed":
-                    print(f"  {label} {name}  ({t}s, {mem}MB)")
+                    print(f"  {label} {name}  ({usage}, {mem}MB)")
                 else:
                     if len(msg) > 120:
                         msg = msg[:117] + "..."
                     suffix = f"  {msg}" if msg else ""
-                    print(f"  {label} {name}  ({t}s, {mem}MB){suffix}")
+                    print(f"  {label} {name}  ({usage}, {mem}MB){suffix}")
+                if "profile" in test:
+                    _print_profile(test["profile"])
+                if "memory_profile" in test:
+                    _print_memory_profile(test["memory_profile"])
 
             # Batch mode (has "passed" field)
             else:
@@ -121,5 +506,59 @@ def _pretty_print(result: dict, problem: str, language: str):
     print()
 
 
+def _print_profile(profile: dict, top: int = 8):
+    note = "" if profile["complete"] else ", stopped at the CPU limit"
+    print(f"         profile: {profile['samples']} samples, {profile['sampled_seconds']}s{note}")
+    for fn in profile["functions"][:top]:
+        print(
+            f"         {fn['cumulative_pct']:5.1f}%  {fn['cumulative_seconds']:7.3f}s cum"
+            f"  {fn['self_seconds']:7.3f}s self  {fn['function']}"
+        )
+
+
+def _print_memory_profile(report: dict, top: int = 5):
+    print(
+        f"         allocations near the limit: {report['traced_mb']}MB traced"
+        f" (+{report['tracemalloc_overhead_mb']}MB tracing overhead)"
+    )
+    for site in report["sites"][:top]:
+        print(f"         {site['size_mb']:8.2f}MB  {site['count']:>9} blocks  {' > '.join(site['frames'])}")
+
+
+def _write_stacks(result: dict, profile_dir: str):
+    os.makedirs(profile_dir, exist_ok=True)
+    for test in result["tests"]:
+        if "profile" not in test:
+            continue
+        path = os.path.join(profile_dir, f"{test['name']}.folded")
+        with open(path, "w") as f:
+            f.write(test["profile"]["stacks"] + "\n")
+        print(f"Wrote {path}", file=sys.stderr)
+
+
+def _print_timings(timings: dict):
+    print(f"  Timings ({timings['total_seconds']:.3f}s total)\n")
+
+    for phase in timings["phases"]:
+        print(f"    {phase['name']:<10} {phase['seconds']:8.3f}s  (+{phase['start']:.3f}s)")
+
+    if timings["tests"]:
+        print()
+    for test in timings["tests"]:
+        if "exit" not in test:
+            print(f"    {test['name']:<10} failed to start")
+            continue
+        line = (
+            f"    {test['name']:<10} {test['wall_seconds']:8.3f}s wall"
+            f"  {test['cpu_user_seconds']:.3f}s user  {test['cpu_sys_seconds']:.3f}s sys"
+            f"  (+{test['spawn']:.3f}s -> +{test['exit']:.3f}s)"
+        )
+        if "xml_parse_seconds" in test:
+            line += f"  xml {test['xml_parse_seconds']:.3f}s"
+        print(line)
+
+    print()
+
+
 if __name__ == "__main__":
     main()
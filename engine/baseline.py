@@ -0,0 +1,188 @@
+"""Reference benchmarks: record per-test baselines and score runs against them.
+
+A baseline is recorded by running a designated reference solution with each
+test repeated several times. For each test it stores the median CPU time
+and peak memory, with a distribution-free 95% confidence interval for the
+median. Baselines live in problems/<problem>/baselines.json, keyed by
+language and test name. None are committed (they are host-specific): until
+one is recorded with `engine baseline`, runs get no ratios and no test is
+ever too_slow.
+"""
+
+import datetime
+import json
+import math
+import os
+import statistics
+
+from . import runner
+
+BASELINE_FILE = "baselines.json"
+
+
+def record_baseline(
+    problem: str,
+    language: str,
+    solution_code: str,
+    repeats: int = 5,
+    source: str | None = None,
+    problems_dir: str | None = None,
+    timeout: int = 120,
+) -> dict:
+    """Run a reference solution with each test repeated and save its baseline.
+
+    Only tests the reference passes on every repeat get a baseline.
+
+    Returns:
+        The baseline entry written for this language
+    """
+    result = runner.run_solution(
+        problem,
+        language,
+        solution_code,
+        timeout=timeout,
+        problems_dir=problems_dir,
+        repeats=repeats,
+        baseline=False,
+    )
+
+    tests = {}
+    for test in result["tests"]:
+        if test.get("verdict") != "passed":
+            continue
+        tests[test["name"]] = {
+            "time_seconds": _summarize(test.get("time_samples", [test["time_seconds"]])),
+            "memory_mb": _summarize(test.get("memory_samples", [test["memory_mb"]])),
+        }
+
+    entry = {
+        "solution": source,
+        "repeats": repeats,
+        "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "tests": tests,
+    }
+
+    path = _baseline_path(problem, problems_dir)
+    baselines = _read_json(path)
+    baselines[language] = entry
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2)
+        f.write("\n")
+    return entry
+
+
+def load_baseline(problem: str, language: str, problems_dir: str | None = None) -> dict | None:
+    return _read_json(_baseline_path(problem, problems_dir)).get(language)
+
+
+def merge_repeats(runs: list) -> dict:
+    """Merge repeated results of one test into a single result.
+
+    The verdict is the first non-passing verdict seen (so flaky failures are
+    not hidden); time and memory are medians, and the raw samples are kept
+    in time_samples / memory_samples.
+    """
+    merged = dict(runs[0])
+    failing = next((t for t in runs if t["verdict"] != "passed"), None)
+    if failing:
+        merged["verdict"] = failing["verdict"]
+        merged["message"] = failing["message"]
+    merged["time_samples"] = [t["time_seconds"] for t in runs]
+    merged["memory_samples"] = [t["memory_mb"] for t in runs]
+    merged["time_seconds"] = round(statistics.median(merged["time_samples"]), 3)
+    merged["wall_seconds"] = round(statistics.median(t["wall_seconds"] for t in runs), 3)
+    merged["memory_mb"] = round(statistics.median(merged["memory_samples"]), 1)
+    return merged
+
+
+def score_result(
+    result: dict,
+    baseline: dict | None,
+    max_time_ratio: float | None = None,
+) -> dict:
+    """Attach time/memory ratios against a baseline to each per-test result.
+
+    time_ratio and memory_ratio compare medians; time_ratio_ci bounds the
+    ratio using both confidence intervals. If max_time_ratio is set, a
+    passing test whose ratio is above it even at the optimistic end of the
+    interval gets the "too_slow" verdict.
+    """
+    if not baseline or result["status"] != "completed":
+        return result
+
+    for test in result["tests"]:
+        ref = baseline["tests"].get(test["name"])
+        if ref is None or test.get("verdict") in (None, "skipped"):
+            continue
+
+        samples = test.get("time_samples", [test["time_seconds"]])
+        median, low, high = _median_ci(samples)
+        ref_time = ref["time_seconds"]
+        test["time_ratio"] = _ratio(median, ref_time["median"])
+        test["time_ratio_ci"] = [_ratio(low, ref_time["ci_high"]), _ratio(high, ref_time["ci_low"])]
+        test["memory_ratio"] = _ratio(test["memory_mb"], ref["memory_mb"]["median"])
+
+        if (
+            max_time_ratio is not None
+            and test["verdict"] == "passed"
+            and test["time_ratio_ci"][0] > max_time_ratio
+        ):
+            test["verdict"] = "too_slow"
+            test["message"] = (
+                f"{test['time_ratio']}x the reference CPU time "
+                f"(limit {max_time_ratio}x, 95% CI {test['time_ratio_ci'][0]}-{test['time_ratio_ci'][1]}x)"
+            )
+
+    _recount(result)
+    return result
+
+
+def _summarize(samples: list) -> dict:
+    median, low, high = _median_ci(samples)
+    return {
+        "median": round(median, 3),
+        "ci_low": round(low, 3),
+        "ci_high": round(high, 3),
+        "samples": samples,
+    }
+
+
+def _median_ci(samples: list) -> tuple:
+    """Median and a distribution-free ~95% confidence interval for it.
+
+    Uses order statistics (normal approximation to the binomial); with fewer
+    than 6 samples the interval is simply [min, max].
+    """
+    values = sorted(samples)
+    n = len(values)
+    median = statistics.median(values)
+    if n < 6:
+        return median, values[0], values[-1]
+    k = max(0, math.floor((n - 1.96 * math.sqrt(n)) / 2))
+    return median, values[k], values[n - 1 - k]
+
+
+def _ratio(value: float, reference: float) -> float:
+    # Floor the reference at the reporting resolution to avoid dividing by zero
+    return round(value / max(reference, 0.001), 3)
+
+
+def _recount(result: dict):
+    tests = result["tests"]
+    if tests and "verdict" in tests[0]:
+        passed = sum(1 for t in tests if t["verdict"] == "passed")
+        skipped = sum(1 for t in tests if t["verdict"] == "skipped")
+        result["summary"]["passed"] = passed
+        result["summary"]["failed"] = len(tests) - passed - skipped
+        result["summary"]["time_seconds"] = round(sum(t["time_seconds"] for t in tests), 3)
+
+
+def _baseline_path(problem: str, problems_dir: str | None) -> str:
+    return os.path.join(runner.resolve_problems_dir(problems_dir), problem, BASELINE_FILE)
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,394 @@
+"""Batch grading: many solutions x many problems in one invocation.
+
+Every (solution, test) pair is a job. Jobs are interleaved round-robin across
+solutions so the worker pool shares time fairly between submissions. Each
+worker keeps one workspace per (problem, language) and only re-injects (and
+re-runs setup) when it switches solutions. Finished pairs are appended to a
+JSON Lines file as they complete, so an interrupted job resumes where it
+stopped.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+
+from .runner import (
+    Timeline,
+    inject_solution,
+    isolation_slots,
+    load_harness,
+    provision_workspace,
+    resolve_problems_dir,
+    run_setup,
+    run_test_id,
+)
+
+
+def discover_solutions(
+    path: str,
+    problem: str | None = None,
+    language: str | None = None,
+    problems_dir: str | None = None,
+) -> list:
+    """Find solutions to grade from a directory tree or a manifest file.
+
+    A manifest is a .json list or .jsonl file of {"solution", "problem",
+    "language"} entries, with solution paths relative to the manifest. In a
+    directory, the problem and language are taken from the arguments, else
+    from path components matching a problem slug / language directory
+    (e.g. solutions/<problem>/<language>/...), else the language from the
+    file extension of the harness's solution_file. Only files with that
+    extension are taken, and hidden and __pycache__ directories are skipped.
+
+    Returns a list of {"solution", "problem", "language"} dicts.
+    """
+    problems_dir = resolve_problems_dir(problems_dir)
+
+    if os.path.isfile(path):
+        base = os.path.dirname(os.path.abspath(path))
+        with open(path) as f:
+            if path.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                entries = json.load(f)
+        return [
+            {
+                "solution": os.path.join(base, e["solution"]),
+                "problem": e.get("problem", problem),
+                "language": e.get("language", language),
+            }
+            for e in entries
+        ]
+
+    known_problems = set(_list_dirs(problems_dir))
+    found = []
+    for root, dirs, files in os.walk(path):
+        # Skip caches and hidden directories (__pycache__, .git, ...)
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "__")))
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            parts = os.path.relpath(file_path, path).split(os.sep)
+            abs_parts = os.path.abspath(file_path).split(os.sep)
+
+            slug = problem or next((p for p in abs_parts if p in known_problems), None)
+            if slug is None:
+                continue
+
+            lang = language
+            if lang is None:
+                languages = _list_dirs(os.path.join(problems_dir, slug, "languages"))
+                lang = next((p for p in parts[:-1] if p in languages), None)
+            if lang is None:
+                lang = _language_for_extension(problems_dir, slug, name)
+            if lang is None or _solution_extension(problems_dir, slug, lang) != os.path.splitext(name)[1]:
+                continue
+
+            found.append({"solution": file_path, "problem": slug, "language": lang})
+    return found
+
+
+def grade(
+    solutions: list,
+    output_path: str,
+    workers: int | None = None,
+    timeout: int = 120,
+    problems_dir: str | None = None,
+    resume: bool = True,
+    on_record=None,
+    isolate: bool = False,
+) -> list:
+    """Grade every (solution, test) pair and append results to output_path.
+
+    Args:
+        solutions: {"solution", "problem", "language"} dicts (see discover_solutions)
+        output_path: JSON Lines file; one record per (solution, test) pair
+        workers: Concurrent test processes (default: CPU count)
+        timeout: Max seconds for each setup command
+        problems_dir: Override path to problems/ directory
+        resume: Skip pairs already recorded in output_path
+        on_record: Optional callback invoked with each new record
+        isolate: Pin each test to a dedicated core (see runner._CpuSlots);
+            workers is capped at the number of such cores
+
+    Returns:
+        All records for the given solutions, including resumed ones
+    """
+    workers = workers or os.cpu_count() or 1
+    if isolate:
+        workers = min(workers, isolation_slots())
+    harnesses = {}
+    jobs_by_solution = []
+
+    for entry in solutions:
+        with open(entry["solution"]) as f:
+            code = f.read()
+        digest = hashlib.sha256(code.encode()).hexdigest()
+        pair = (entry["problem"], entry["language"])
+        if pair not in harnesses:
+            harnesses[pair] = load_harness(entry["problem"], entry["language"], problems_dir)
+
+        harness, error = harnesses[pair]
+        if harness:
+            test_ids = [t["id"] for t in harness["testcases"].get("tests", [])]
+        else:
+            test_ids = [None]
+
+        solution = {
+            "solution": entry["solution"],
+            "problem": entry["problem"],
+            "language": entry["language"],
+            "sha256": digest,
+            "key": f"{entry['problem']}/{entry['language']}/{digest}",
+            "code": code,
+        }
+        jobs_by_solution.append([dict(solution, test_id=t) for t in test_ids])
+
+    existing = _read_records(output_path) if resume else []
+    if existing:
+        # Drop a truncated or corrupt line left by an interrupted run, so
+        # appended records start on a line of their own
+        _write_records(output_path, existing)
+    done = {(r["key"], r["test_id"]) for r in existing}
+    wanted_keys = {jobs[0]["key"] for jobs in jobs_by_solution if jobs}
+    records = [r for r in existing if r["key"] in wanted_keys]
+
+    # Round-robin across solutions: test 1 of every solution, then test 2, ...
+    pending = []
+    for round_jobs in _zip_longest(jobs_by_solution):
+        pending.extend(j for j in round_jobs if (j["key"], j["test_id"]) not in done)
+
+    scheduler = _Scheduler(pending, lookahead=workers)
+    setup_failures = {}
+    lock = threading.Lock()
+    mode = "a" if resume else "w"
+
+    with open(output_path, mode) as out:
+        def write(record):
+            with lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                records.append(record)
+            if on_record:
+                on_record(record)
+
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(scheduler, harnesses, timeout, setup_failures, write, isolate),
+                daemon=True,
+            )
+            for _ in range(min(workers, len(pending)))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    return records
+
+
+def aggregate(records: list) -> list:
+    """Summarize records per solution: pass counts and time/memory percentiles."""
+    groups = {}
+    for r in records:
+        groups.setdefault(r["key"], []).append(r)
+
+    rows = []
+    for key, group in groups.items():
+        first = group[0]
+        times = sorted(r["time_seconds"] for r in group if "time_seconds" in r)
+        memory = sorted(r["memory_mb"] for r in group if "memory_mb" in r)
+        rows.append({
+            "solution": first["solution"],
+            "problem": first["problem"],
+            "language": first["language"],
+            "sha256": first["sha256"],
+            "passed": sum(1 for r in group if r.get("verdict") == "passed"),
+            "total": len(group),
+            "time_seconds": _percentiles(times),
+            "memory_mb": _percentiles(memory),
+        })
+    rows.sort(key=lambda row: (row["problem"], row["language"], row["solution"]))
+    return rows
+
+
+def format_table(rows: list) -> str:
+    header = (
+        f"{'SOLUTION':<40} {'LANG':<8} {'PASSED':>7}"
+        f"  {'CPU p50/p90/max (s)':>22}  {'MEM p50/p90/max (MB)':>22}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        name = row["solution"]
+        if len(name) > 40:
+            name = "..." + name[-37:]
+        t = row["time_seconds"]
+        m = row["memory_mb"]
+        time_col = f"{t['p50']:.3f}/{t['p90']:.3f}/{t['max']:.3f}" if t else "-"
+        mem_col = f"{m['p50']:.1f}/{m['p90']:.1f}/{m['max']:.1f}" if m else "-"
+        lines.append(
+            f"{name:<40} {row['language']:<8} {row['passed']:>3}/{row['total']:<3}"
+            f"  {time_col:>22}  {mem_col:>22}"
+        )
+    return "\n".join(lines)
+
+
+class _Scheduler:
+    """Hands out jobs in fair (round-robin) order, with bounded locality.
+
+    A worker gets the first job for the solution already injected in its
+    workspace if one is within the next `lookahead` jobs, otherwise the head
+    of the queue. This avoids re-running setup (e.g. Java compilation) on
+    every switch while no solution waits more than one lookahead window.
+    """
+
+    def __init__(self, jobs: list, lookahead: int):
+        self._jobs = list(jobs)
+        self._lookahead = max(1, lookahead)
+        self._lock = threading.Lock()
+
+    def next(self, current_key: str | None) -> dict | None:
+        with self._lock:
+            if not self._jobs:
+                return None
+            for i, job in enumerate(self._jobs[:self._lookahead]):
+                if job["key"] == current_key:
+                    return self._jobs.pop(i)
+            return self._jobs.pop(0)
+
+
+def _worker(scheduler: _Scheduler, harnesses: dict, timeout: int, setup_failures: dict, write, isolate: bool = False):
+    """Run jobs until the queue is empty, reusing one workspace per (problem, language)."""
+    workspaces = {}
+    current_key = None
+    try:
+        while (job := scheduler.next(current_key)) is not None:
+            harness, error = harnesses[(job["problem"], job["language"])]
+            if error:
+                write(_record(job, error_result=error))
+                continue
+            if not harness["config"].get("single_test_command"):
+                write(_record(job, message="Harness has no single_test_command"))
+                continue
+            if job["key"] in setup_failures:
+                write(_record(job, error_result=setup_failures[job["key"]]))
+                continue
+
+            pair = (job["problem"], job["language"])
+            workspace = workspaces.get(pair)
+            if workspace is None:
+                tmp_dir, work_dir = provision_workspace(harness)
+                workspace = {"tmp_dir": tmp_dir, "work_dir": work_dir, "key": None}
+                workspaces[pair] = workspace
+
+            timeline = Timeline()
+            if workspace["key"] != job["key"]:
+                inject_solution(workspace["work_dir"], harness["config"], job["code"])
+                workspace["key"] = None
+                setup_error = run_setup(harness["config"], workspace["work_dir"], timeout, timeline, isolate=isolate)
+                if setup_error:
+                    setup_failures[job["key"]] = setup_error
+                    write(_record(job, error_result=setup_error))
+                    continue
+                workspace["key"] = job["key"]
+            current_key = job["key"]
+
+            test_result = run_test_id(
+                config=harness["config"],
+                work_dir=workspace["work_dir"],
+                test_id=job["test_id"],
+                time_limit=harness["time_limit"],
+                memory_limit=harness["memory_limit"],
+                timeline=timeline,
+                isolate=isolate,
+            )
+            write(_record(job, test_result=test_result))
+    finally:
+        for workspace in workspaces.values():
+            shutil.rmtree(workspace["tmp_dir"], ignore_errors=True)
+
+
+def _record(job: dict, test_result: dict | None = None, error_result: dict | None = None, message: str = "") -> dict:
+    record = {
+        "solution": job["solution"],
+        "problem": job["problem"],
+        "language": job["language"],
+        "sha256": job["sha256"],
+        "key": job["key"],
+        "test_id": job["test_id"],
+    }
+    if test_result is not None:
+        record["status"] = "completed"
+        record.update(test_result)
+    else:
+        record["status"] = "build_error"
+        if error_result is not None:
+            lines = (error_result["stderr"] or error_result["stdout"] or "").strip().splitlines()
+            message = "\n".join(lines[-20:])
+        record["message"] = message
+    return record
+
+
+def _read_records(path: str) -> list:
+    """Read a JSON Lines results file, ignoring lines that do not parse (e.g. a truncated last one)."""
+    if not os.path.isfile(path):
+        return []
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _write_records(path: str, records: list):
+    """Replace a JSON Lines results file with records, atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _percentiles(values: list) -> dict | None:
+    """Nearest-rank p50/p90/max of a sorted list."""
+    if not values:
+        return None
+
+    def rank(q):
+        return values[max(0, math.ceil(q * len(values)) - 1)]
+
+    return {"p50": rank(0.5), "p90": rank(0.9), "max": values[-1]}
+
+
+def _zip_longest(lists: list):
+    for i in range(max((len(x) for x in lists), default=0)):
+        yield [x[i] for x in lists if i < len(x)]
+
+
+def _list_dirs(path: str) -> list:
+    if not os.path.isdir(path):
+        return []
+    return sorted(d for d in os.listdir(path) if os.path.isdir(os.path.join(path, d)))
+
+
+def _language_for_extension(problems_dir: str, problem: str, filename: str) -> str | None:
+    ext = os.path.splitext(filename)[1]
+    for lang in _list_dirs(os.path.join(problems_dir, problem, "languages")):
+        if _solution_extension(problems_dir, problem, lang) == ext:
+            return lang
+    return None
+
+
+def _solution_extension(problems_dir: str, problem: str, language: str) -> str | None:
+    """File extension of the harness's solution_file, or None without a runner.json."""
+    config_path = os.path.join(problems_dir, problem, "languages", language, "runner.json")
+    if not os.path.isfile(config_path):
+        return None
+    with open(config_path) as f:
+        return os.path.splitext(json.load(f)["solution_file"])[1]
@@ -0,0 +1,407 @@
+"""Run history: every run's per-test results, kept in a local SQLite file.
+
+Once recording is enabled (enable_recording(): the workbench server and
+its executors do, as do `engine run --record` and `engine worker --record`),
+each finished run_solution() is appended to the history database (SQLite in
+WAL mode, so queries never wait for the writer): the run's problem, language,
+tier, mode, status and a hash of the solution code, plus one row per test
+with its verdict, CPU and wall time and peak memory. Other runs, such as
+plain CLI runs and test suites, leave no trace.
+
+Writes are queued and committed in batches by a background thread, so
+recording adds no latency to a run; pending writes are flushed at exit.
+The database is HISTORY_FILE in the project root, or the path in
+ENGINE_HISTORY_DB (set it to an empty string to turn the history off,
+recording and queries alike).
+
+Queries: latest_runs() (a solution's recent runs), test_trend() (one test's
+times across runs), slowest_tests() (the slowest tests since a time) and
+test_costs() (expected time per test, for cheapest-first scheduling).
+"""
+
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from . import metrics
+
+HISTORY_FILE = "history.db"
+
+# Most runs committed in one transaction
+_MAX_BATCH = 256
+
+# test_costs() averages each test's latest this-many timed results, looking
+# at no more than _COST_ROWS recent rows
+_COST_SAMPLES = 5
+_COST_ROWS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    solution_hash TEXT NOT NULL,
+    problem TEXT NOT NULL,
+    language TEXT NOT NULL,
+    tier TEXT,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    time_seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_solution ON runs (solution_hash, recorded_at);
+CREATE INDEX IF NOT EXISTS runs_by_language ON runs (problem, language, recorded_at);
+
+CREATE TABLE IF NOT EXISTS tests (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    recorded_at REAL NOT NULL,
+    solution_hash TEXT NOT NULL,
+    problem TEXT NOT NULL,
+    language TEXT NOT NULL,
+    tier TEXT,
+    mode TEXT NOT NULL,
+    name TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    time_seconds REAL NOT NULL,
+    wall_seconds REAL,
+    memory_mb REAL
+);
+CREATE INDEX IF NOT EXISTS tests_by_run ON tests (run_id);
+CREATE INDEX IF NOT EXISTS tests_by_name ON tests (problem, language, name, recorded_at);
+CREATE INDEX IF NOT EXISTS tests_by_time ON tests (recorded_at);
+"""
+
+_RUN_COLUMNS = (
+    "id", "recorded_at", "solution_hash", "problem", "language", "tier",
+    "mode", "status", "passed", "total", "time_seconds",
+)
+_TEST_COLUMNS = (
+    "run_id", "recorded_at", "solution_hash", "problem", "language", "tier", "mode",
+    "name", "verdict", "time_seconds", "wall_seconds", "memory_mb",
+)
+
+WRITE_ERRORS = metrics.REGISTRY.counter(
+    "engine_history_write_errors_total", "Run history batches that failed to commit",
+)
+
+_recording = False
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def history_path() -> str | None:
+    """The history database path, or None if the history is off."""
+    path = os.environ.get("ENGINE_HISTORY_DB")
+    if path is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(project_root, HISTORY_FILE)
+    return path or None
+
+
+def enable_recording():
+    """Record every run that finishes in this process from now on."""
+    global _recording
+    _recording = True
+
+
+def solution_hash(solution_code: str) -> str:
+    """Short content hash identifying a solution's source."""
+    return hashlib.sha256(solution_code.encode()).hexdigest()[:16]
+
+
+def record_run(
+    problem: str,
+    language: str,
+    solution_code: str,
+    result: dict,
+    mode: str,
+    tier: str | None = None,
+):
+    """Queue a finished run for the history database, if recording (returns immediately)."""
+    path = history_path()
+    if not _recording or path is None:
+        return
+    summary = result["summary"]
+    run = {
+        "recorded_at": time.time(),
+        "solution_hash": solution_hash(solution_code),
+        "problem": problem,
+        "language": language,
+        "tier": tier,
+        "mode": mode,
+        "status": result["status"],
+        "passed": summary["passed"],
+        "total": summary["total"],
+        "time_seconds": summary["time_seconds"],
+    }
+    tests = [
+        (
+            test["name"],
+            test.get("verdict") or ("passed" if test["passed"] else "failed"),
+            test["time_seconds"],
+            test.get("wall_seconds"),
+            test.get("memory_mb"),
+        )
+        for test in result["tests"]
+        # Tests that were not run have nothing to record
+        if test.get("verdict") != "skipped"
+    ]
+    _get_writer(path).put((run, tests))
+
+
+def flush():
+    """Wait until every queued run has been written."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def latest_runs(
+    solution_hash: str | None = None,
+    problem: str | None = None,
+    language: str | None = None,
+    limit: int = 20,
+    path: str | None = None,
+) -> list:
+    """The most recent runs, newest first, each with its "tests".
+
+    Filtered to one solution (by hash) and/or one problem and language.
+    """
+    where, params = _filters(solution_hash=solution_hash, problem=problem, language=language)
+    with _reader(path) as conn:
+        if conn is None:
+            return []
+        runs = [
+            dict(zip(_RUN_COLUMNS, row))
+            for row in conn.execute(
+                f"SELECT {', '.join(_RUN_COLUMNS)} FROM runs{where} ORDER BY recorded_at DESC LIMIT ?",
+                (*params, limit),
+            )
+        ]
+        by_id = {run["id"]: run for run in runs}
+        for run in runs:
+            run["tests"] = []
+        if by_id:
+            placeholders = ", ".join("?" * len(by_id))
+            for run_id, name, verdict, cpu, wall, memory in conn.execute(
+                "SELECT run_id, name, verdict, time_seconds, wall_seconds, memory_mb FROM tests"
+                f" WHERE run_id IN ({placeholders}) ORDER BY rowid",
+                tuple(by_id),
+            ):
+                by_id[run_id]["tests"].append({
+                    "name": name,
+                    "verdict": verdict,
+                    "time_seconds": cpu,
+                    "wall_seconds": wall,
+                    "memory_mb": memory,
+                })
+    return runs
+
+
+def test_trend(
+    problem: str,
+    language: str,
+    test: str,
+    solution_hash: str | None = None,
+    tier: str | None = None,
+    mode: str | None = None,
+    limit: int = 50,
+    path: str | None = None,
+) -> list:
+    """One test's results across runs, oldest first (the latest `limit` of them).
+
+    Batch-mode times come from the test framework rather than the kernel, so
+    pass mode="per_test" to compare like with like.
+    """
+    where, params = _filters(
+        problem=problem, language=language, name=test, solution_hash=solution_hash, mode=mode,
+    )
+    where += " AND tier IS ?"
+    with _reader(path) as conn:
+        if conn is None:
+            return []
+        rows = conn.execute(
+            f"SELECT {', '.join(_TEST_COLUMNS)} FROM tests{where} ORDER BY recorded_at DESC LIMIT ?",
+            (*params, tier, limit),
+        ).fetchall()
+    return [dict(zip(_TEST_COLUMNS, row)) for row in reversed(rows)]
+
+
+def slowest_tests(
+    since: float,
+    problem: str | None = None,
+    language: str | None = None,
+    limit: int = 20,
+    path: str | None = None,
+) -> list:
+    """The slowest test results (by CPU time) recorded at or after `since` (Unix time)."""
+    where, params = _filters(problem=problem, language=language)
+    where += (" AND" if where else " WHERE") + " recorded_at >= ?"
+    with _reader(path) as conn:
+        if conn is None:
+            return []
+        rows = conn.execute(
+            f"SELECT {', '.join(_TEST_COLUMNS)} FROM tests{where} ORDER BY time_seconds DESC LIMIT ?",
+            (*params, since, limit),
+        ).fetchall()
+    return [dict(zip(_TEST_COLUMNS, row)) for row in rows]
+
+
+def test_costs(
+    problem: str,
+    language: str,
+    solution_hash: str | None = None,
+    tier: str | None = None,
+    path: str | None = None,
+) -> dict:
+    """Expected CPU seconds per test name, for scheduling cheap tests first.
+
+    The mean of each test's latest _COST_SAMPLES per-test (or warm) results:
+    the given solution's, if it has any, otherwise any solution's.
+    """
+    with _reader(path) as conn:
+        if conn is None:
+            return {}
+        for hash_filter in ([solution_hash, None] if solution_hash else [None]):
+            where, params = _filters(
+                problem=problem, language=language, solution_hash=hash_filter,
+            )
+            samples = {}
+            for name, cpu in conn.execute(
+                f"SELECT name, time_seconds FROM tests{where} AND tier IS ? AND mode != 'batch'"
+                " ORDER BY recorded_at DESC LIMIT ?",
+                (*params, tier, _COST_ROWS),
+            ):
+                times = samples.setdefault(name, [])
+                if len(times) < _COST_SAMPLES:
+                    times.append(cpu)
+            if samples:
+                return {name: sum(times) / len(times) for name, times in samples.items()}
+    return {}
+
+
+def _filters(**columns) -> tuple:
+    """A WHERE clause matching the given non-None column values, and its parameters."""
+    set_columns = {name: value for name, value in columns.items() if value is not None}
+    if not set_columns:
+        return "", ()
+    return " WHERE " + " AND ".join(f"{name} = ?" for name in set_columns), tuple(set_columns.values())
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL durable against application crashes, and commits cheap
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class _reader:
+    """Context manager for a read connection; yields None if there is no history yet."""
+
+    def __init__(self, path: str | None):
+        self._path = path or history_path()
+        self._conn = None
+
+    def __enter__(self) -> sqlite3.Connection | None:
+        if self._path is None or not os.path.exists(self._path):
+            return None
+        self._conn = _connect(self._path)
+        return self._conn
+
+    def __exit__(self, *exc):
+        if self._conn is not None:
+            self._conn.close()
+
+
+class _Writer:
+    """Background thread committing queued runs to one database in batches."""
+
+    _STOP = object()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="engine-history", daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self, timeout: float = 10.0):
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else queued up while the last batch was written
+            while len(batch) < _MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._STOP in batch
+            items = [item for item in batch if item is not self._STOP]
+            try:
+                if items:
+                    if conn is None:
+                        conn = _connect(self.path)
+                    self._write(conn, items)
+            except (sqlite3.Error, OSError):
+                WRITE_ERRORS.inc()
+                if conn is not None:
+                    conn.close()
+                    conn = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                if conn is not None:
+                    conn.close()
+                return
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, items: list):
+        with conn:
+            for run, tests in items:
+                columns = _RUN_COLUMNS[1:]
+                cursor = conn.execute(
+                    f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    tuple(run[name] for name in columns),
+                )
+                shared = (cursor.lastrowid, run["recorded_at"], run["solution_hash"],
+                          run["problem"], run["language"], run["tier"], run["mode"])
+                conn.executemany(
+                    f"INSERT INTO tests ({', '.join(_TEST_COLUMNS)}) VALUES ({', '.join('?' * len(_TEST_COLUMNS))})",
+                    [shared + test for test in tests],
+                )
+
+
+def _get_writer(path: str) -> _Writer:
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.path != path:
+            if _writer is not None:
+                _writer.close()
+            _writer = _Writer(path)
+        return _writer
+
+
+def _close_writer():
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.close()
+
+
+# Flush pending writes at exit, to whichever database is current then
+atexit.register(_close_writer)
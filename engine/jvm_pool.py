@@ -0,0 +1,273 @@
+"""Warm JVM workers for per-test runs of JVM harnesses.
+
+Starting a JVM (and Maven) for every test makes JVM startup, class loading
+and JIT warm-up the bulk of a Java test's time. A harness that declares a
+"worker_command" in runner.json can instead be run by a small pool of
+long-lived worker JVMs that already have the harness and JUnit loaded.
+
+The worker protocol is line-based. A worker prints {"ready": true} once
+started, then reads one tab-separated request per line:
+
+    <dir>\t<dir>\t<Class#method>\t<cpu limit seconds>
+
+(the run's compiled class dirs, from "worker_classes", and the test from
+"worker_test"), and answers each with one JSON line:
+
+    {"verdict": "passed", "message": null, "cpu_seconds": 0.21,
+     "cpu_user_seconds": 0.2, "wall_seconds": 0.22, "heap_peak_mb": 14.2,
+     "voluntary_context_switches": 3, "involuntary_context_switches": 1,
+     "recycle": false}
+
+The worker loads the solution in a fresh class loader for each test and
+times the test's own thread, so time_seconds excludes JVM startup, JIT and
+GC threads. A worker that breaches a limit answers with "recycle": true and
+exits; a worker that stops answering, dies, or has run _MAX_TESTS_PER_WORKER
+tests is replaced.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import signal
+import tempfile
+import weakref
+
+# Workers per pool, unless runner.json sets "worker_pool_size"
+DEFAULT_POOL_SIZE = 2
+
+# Tests a worker runs before it is replaced, bounding the class metadata that
+# finished tests' class loaders leave behind
+_MAX_TESTS_PER_WORKER = 200
+
+_START_TIMEOUT_SECONDS = 60
+
+# Seconds past the CPU limit before an unresponsive worker is killed (the
+# worker enforces the CPU limit itself; this catches sleeping or hung tests)
+_WALL_GRACE_SECONDS = 5
+
+_READ_LIMIT_BYTES = 2**20
+
+# Pools by event loop, each a dict of key -> task creating the pool
+_pools_by_loop = weakref.WeakKeyDictionary()
+
+
+class WorkerError(RuntimeError):
+    """A worker JVM failed to start or stopped answering."""
+
+
+class JvmPool:
+    """Long-lived worker JVMs started from one prepared harness workspace.
+
+    tmp_dir, if given, is removed when the pool is closed.
+    """
+
+    def __init__(self, command: list, work_dir: str, size: int = DEFAULT_POOL_SIZE, tmp_dir: str | None = None):
+        self._command = command
+        self._work_dir = work_dir
+        self._tmp_dir = tmp_dir
+        self._size = size
+        self._idle = asyncio.Queue()
+        self._workers = set()
+
+    async def start(self):
+        """Start every worker; raises WorkerError if one fails to start."""
+        workers = await asyncio.gather(
+            *(self._start_worker() for _ in range(self._size)),
+            return_exceptions=True,
+        )
+        for worker in workers:
+            self._idle.put_nowait(None if isinstance(worker, BaseException) else worker)
+        errors = [w for w in workers if isinstance(w, BaseException)]
+        if errors:
+            await self.close()
+            raise errors[0]
+
+    async def run_test(self, class_dirs: list, test: str, time_limit: float, test_name: str) -> dict:
+        """Run one test on an idle worker; returns a per-test result.
+
+        The result has the same fields as a test run in its own process.
+        """
+        worker = await self._idle.get()
+        try:
+            if worker is not None and (worker.finished or worker.tests >= _MAX_TESTS_PER_WORKER):
+                await self._stop_worker(worker)
+                worker = None
+            if worker is None:
+                worker = await self._start_worker()
+            reply = await worker.run("\t".join([*class_dirs, test, str(time_limit)]), time_limit)
+            if reply is None or reply.get("recycle"):
+                await self._stop_worker(worker)
+                worker = None
+        except WorkerError as e:
+            if worker is not None:
+                await self._stop_worker(worker)
+                worker = None
+            return _error_test(test_name, str(e))
+        except BaseException:
+            if worker is not None:
+                await self._stop_worker(worker)
+                worker = None
+            raise
+        finally:
+            # A replacement is started when the slot is next used
+            self._idle.put_nowait(worker)
+
+        if reply is None:
+            # No answer within the wall-clock backstop
+            return {
+                "name": test_name,
+                "verdict": "time_limit_exceeded",
+                "time_seconds": round(time_limit, 3),
+                "wall_seconds": round(time_limit + _WALL_GRACE_SECONDS, 3),
+                "cpu_user_seconds": 0.0,
+                "cpu_sys_seconds": 0.0,
+                "memory_mb": 0.0,
+                "voluntary_context_switches": 0,
+                "involuntary_context_switches": 0,
+                "message": None,
+            }
+        cpu = reply["cpu_seconds"]
+        verdict = reply["verdict"]
+        if verdict in ("passed", "failed") and cpu > time_limit:
+            # Finished between the worker's CPU checks
+            verdict = "time_limit_exceeded"
+        return {
+            "name": test_name,
+            "verdict": verdict,
+            "time_seconds": round(cpu, 3),
+            "wall_seconds": round(reply["wall_seconds"], 3),
+            "cpu_user_seconds": round(reply["cpu_user_seconds"], 3),
+            "cpu_sys_seconds": round(max(0.0, cpu - reply["cpu_user_seconds"]), 3),
+            "memory_mb": round(reply["heap_peak_mb"], 1),
+            "voluntary_context_switches": reply["voluntary_context_switches"],
+            "involuntary_context_switches": reply["involuntary_context_switches"],
+            "message": reply["message"] if verdict == "failed" else None,
+        }
+
+    async def close(self):
+        """Stop all workers and remove the pool's workspace."""
+        for worker in list(self._workers):
+            await self._stop_worker(worker)
+        if self._tmp_dir:
+            await asyncio.to_thread(shutil.rmtree, self._tmp_dir, ignore_errors=True)
+
+    async def _start_worker(self) -> "_Worker":
+        worker = await _Worker.start(self._command, self._work_dir)
+        self._workers.add(worker)
+        return worker
+
+    async def _stop_worker(self, worker: "_Worker"):
+        self._workers.discard(worker)
+        await worker.stop()
+
+
+class _Worker:
+    """One worker JVM, answering one request at a time."""
+
+    def __init__(self, proc, stderr_file):
+        self._proc = proc
+        self._stderr_file = stderr_file
+        self.tests = 0
+
+    @classmethod
+    async def start(cls, command: list, work_dir: str) -> "_Worker":
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=work_dir,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=stderr_file,
+                start_new_session=True,
+                limit=_READ_LIMIT_BYTES,
+            )
+        except OSError as e:
+            stderr_file.close()
+            raise WorkerError(f"Failed to start worker: {e}") from e
+        worker = cls(proc, stderr_file)
+        try:
+            line = await asyncio.wait_for(proc.stdout.readline(), _START_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            line = b""
+        if not line:
+            message = "Worker did not start: " + worker._last_stderr_line()
+            await worker.stop()
+            raise WorkerError(message)
+        return worker
+
+    @property
+    def finished(self) -> bool:
+        return self._proc.returncode is not None
+
+    async def run(self, request: str, time_limit: float) -> dict | None:
+        """Send one request; returns the reply, or None if the wall-clock backstop expired."""
+        self.tests += 1
+        try:
+            self._proc.stdin.write(request.encode() + b"\n")
+            await self._proc.stdin.drain()
+            line = await asyncio.wait_for(self._proc.stdout.readline(), time_limit + _WALL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+        except (BrokenPipeError, ConnectionResetError):
+            line = b""
+        if not line:
+            raise WorkerError("Worker exited: " + self._last_stderr_line())
+        return json.loads(line)
+
+    async def stop(self):
+        try:
+            os.killpg(self._proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        await self._proc.wait()
+        self._stderr_file.close()
+
+    def _last_stderr_line(self) -> str:
+        self._stderr_file.seek(0)
+        lines = self._stderr_file.read().decode(errors="replace").strip().splitlines()
+        return lines[-1][:200] if lines else "no output"
+
+
+async def get_pool(key, create) -> JvmPool:
+    """The running loop's pool for key, creating it with `await create()` if needed.
+
+    Concurrent callers share one creation; a failed creation is not cached.
+    """
+    pools = _pools_by_loop.setdefault(asyncio.get_running_loop(), {})
+    task = pools.get(key)
+    if task is None:
+        task = pools[key] = asyncio.ensure_future(create())
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if pools.get(key) is task:
+            del pools[key]
+        raise
+
+
+async def close_pools():
+    """Close every pool created on the running loop."""
+    pools = _pools_by_loop.pop(asyncio.get_running_loop(), {})
+    for task in pools.values():
+        try:
+            pool = await task
+        except Exception:
+            continue
+        await pool.close()
+
+
+def _error_test(test_name: str, message: str) -> dict:
+    return {
+        "name": test_name,
+        "verdict": "runtime_error",
+        "time_seconds": 0.0,
+        "wall_seconds": 0.0,
+        "cpu_user_seconds": 0.0,
+        "cpu_sys_seconds": 0.0,
+        "memory_mb": 0.0,
+        "voluntary_context_switches": 0,
+        "involuntary_context_switches": 0,
+        "message": message,
+    }
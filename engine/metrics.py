@@ -0,0 +1,243 @@
+"""In-process metrics in the Prometheus text exposition format (no client library needed)."""
+
+import bisect
+import math
+import threading
+
+# Default histogram buckets, in seconds
+_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_MEMORY_BUCKETS_MB = (16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+class _Metric:
+    """Base class: a named metric family with one child value per label set."""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, key: tuple, extra: dict | None = None) -> str:
+        pairs = list(zip(self.label_names, key))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + inner + "}"
+
+    def snapshot(self) -> dict:
+        """A copy of every child value, by label key."""
+        with self._lock:
+            return {key: list(value) if isinstance(value, list) else value for key, value in self._children.items()}
+
+    def render(self, children: dict | None = None) -> list:
+        """Exposition lines for this family, with children in place of its own if given."""
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        if children is None:
+            children = self.snapshot()
+        items = sorted(children.items())
+        for key, value in items:
+            lines.extend(self._render_child(key, value))
+        return lines
+
+    def _render_child(self, key: tuple, value) -> list:
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = _DURATION_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                # [per-bucket counts..., +Inf count, sum]
+                child = [0] * (len(self.buckets) + 1) + [0.0]
+                self._children[key] = child
+            child[index] += 1
+            child[-1] += value
+
+    def _render_child(self, key: tuple, value) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, value):
+            cumulative += count
+            labels = self._format_labels(key, {"le": _format_value(bound)})
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        cumulative += value[len(self.buckets)]
+        lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {cumulative}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_value(value[-1])}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds metric families and renders them for a /metrics scrape."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = _DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def snapshot(self) -> dict:
+        """Counter and histogram values by family name, then label key (see diff())."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return {m.name: m.snapshot() for m in metrics if isinstance(m, (Counter, Histogram))}
+
+    def render(self, overrides: dict | None = None) -> str:
+        """The exposition text; overrides maps family names to children shown instead of their own."""
+        with self._lock:
+            metrics = list(self._metrics)
+        overrides = overrides or {}
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(overrides.get(metric.name)))
+        return "\n".join(lines) + "\n"
+
+
+def diff(after: dict, before: dict) -> dict:
+    """What changed between two Registry.snapshot()s: the increments, by family and label key.
+
+    Counters and histograms only grow, so increments from several processes
+    add up to the totals one process would have counted.
+    """
+    changes = {}
+    for name, children in after.items():
+        old_children = before.get(name, {})
+        for key, value in children.items():
+            old = old_children.get(key)
+            if isinstance(value, list):
+                delta = [v - o for v, o in zip(value, old)] if old is not None else value
+                changed = any(delta)
+            else:
+                delta = value - (old or 0)
+                changed = delta != 0
+            if changed:
+                changes.setdefault(name, {})[key] = delta
+    return changes
+
+
+def add(totals: dict, changes: dict):
+    """Add diff() increments into totals (same shape), in place."""
+    for name, children in changes.items():
+        family = totals.setdefault(name, {})
+        for key, delta in children.items():
+            old = family.get(key)
+            if old is None:
+                family[key] = list(delta) if isinstance(delta, list) else delta
+            elif isinstance(delta, list):
+                family[key] = [o + d for o, d in zip(old, delta)]
+            else:
+                family[key] = old + delta
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(round(value, 6))
+    return str(value)
+
+
+# --- Process-wide registry and the engine's own metrics ---
+
+REGISTRY = Registry()
+
+RUNS = REGISTRY.counter(
+    "engine_runs_total", "Completed engine runs by language and result status",
+    ("language", "status"),
+)
+TEST_VERDICTS = REGISTRY.counter(
+    "engine_test_verdicts_total", "Per-test verdicts by language",
+    ("language", "verdict"),
+)
+PHASE_SECONDS = REGISTRY.histogram(
+    "engine_phase_duration_seconds", "Duration of engine run phases",
+    ("phase",),
+)
+TEST_PEAK_MEMORY_MB = REGISTRY.histogram(
+    "engine_test_peak_memory_mb", "Peak memory of each per-test process",
+    ("language",), buckets=_MEMORY_BUCKETS_MB,
+)
+ACTIVE_SUBPROCESSES = REGISTRY.gauge(
+    "engine_active_subprocesses", "Test, setup and batch subprocesses currently running",
+)
+
+
+def record_run(language: str, result: dict, phases: list):
+    """Update engine metrics from a finished run_solution result."""
+    RUNS.inc(language=language, status=result["status"])
+    for phase in phases:
+        PHASE_SECONDS.observe(phase["seconds"], phase=phase["name"])
+    for test in result["tests"]:
+        if "verdict" in test:
+            TEST_VERDICTS.inc(language=language, verdict=test["verdict"])
+            if test["verdict"] != "skipped":
+                TEST_PEAK_MEMORY_MB.observe(test["memory_mb"], language=language)
+        else:
+            TEST_VERDICTS.inc(language=language, verdict="passed" if test["passed"] else "failed")
+
+
+def render() -> str:
+    return REGISTRY.render()
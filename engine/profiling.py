@@ -0,0 +1,105 @@
+"""Per-test profiles: CPU stacks and allocation reports attached to test results.
+
+A harness that supports profiling declares a "profile_file" in runner.json.
+In profile mode the engine sets ENGINE_PROFILE_FILE to that path for each
+test, and the harness writes its samples there as JSON:
+
+    {"interval_seconds": 0.005, "samples": 812, "complete": true,
+     "stacks": {"test_x.py:test_1;solution.py:Solution.approximate": 812, ...}}
+
+Stacks are root-first, ";"-separated frame labels (the collapsed format that
+flamegraph tools read). complete is false if the test was stopped at its CPU
+limit. summarize() turns this into the size-capped "profile" of a test result.
+
+Likewise a "memory_profile_file" enables allocation reports (see
+load_memory_profile), which become a test result's "memory_profile".
+"""
+
+import json
+
+# Functions listed by cumulative time
+_TOP_FUNCTIONS = 15
+# Collapsed stacks kept, most-sampled first, within this many bytes of text
+_MAX_STACK_BYTES = 32 * 1024
+
+
+def load_profile(path: str) -> dict | None:
+    """Read and summarize a harness profile file; None if missing or unreadable."""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return summarize(raw)
+
+
+def summarize(raw: dict, top: int = _TOP_FUNCTIONS, max_stack_bytes: int = _MAX_STACK_BYTES) -> dict:
+    """Top functions by cumulative time plus collapsed stacks, capped in size.
+
+    Returns a dict with samples, interval_seconds, sampled_seconds, complete,
+    functions (name, cumulative/self seconds and cumulative percent), stacks
+    (collapsed text, one "frame;frame;... count" line each) and
+    truncated_samples (samples in stacks dropped by the size cap).
+    """
+    interval = raw.get("interval_seconds", 0.0)
+    stacks = raw.get("stacks", {})
+    samples = sum(stacks.values())
+
+    cumulative = {}
+    self_counts = {}
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+        # Count recursive functions once per sample
+        for name in set(frames):
+            cumulative[name] = cumulative.get(name, 0) + count
+
+    functions = [
+        {
+            "function": name,
+            "cumulative_seconds": round(count * interval, 3),
+            "self_seconds": round(self_counts.get(name, 0) * interval, 3),
+            "cumulative_pct": round(100.0 * count / samples, 1) if samples else 0.0,
+        }
+        for name, count in sorted(cumulative.items(), key=lambda item: (-item[1], item[0]))[:top]
+    ]
+
+    lines = []
+    size = 0
+    truncated = 0
+    for stack, count in sorted(stacks.items(), key=lambda item: (-item[1], item[0])):
+        line = f"{stack} {count}"
+        if size + len(line) + 1 > max_stack_bytes:
+            truncated += count
+            continue
+        lines.append(line)
+        size += len(line) + 1
+
+    return {
+        "samples": samples,
+        "interval_seconds": interval,
+        "sampled_seconds": round(samples * interval, 3),
+        "complete": raw.get("complete", True),
+        "functions": functions,
+        "stacks": "\n".join(lines),
+        "truncated_samples": truncated,
+    }
+
+
+def load_memory_profile(path: str) -> dict | None:
+    """Read a harness's allocation report; None if missing or unreadable.
+
+    The report is written by the test process when it crosses the memory
+    warning threshold: traced_mb / traced_peak_mb, tracemalloc_overhead_mb,
+    sites (top allocation sites by size, each {size_mb, count, frames}) and
+    tracebacks (the largest allocation tracebacks). Lists are capped at
+    _TOP_FUNCTIONS entries.
+    """
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    report["sites"] = report.get("sites", [])[:_TOP_FUNCTIONS]
+    report["tracebacks"] = report.get("tracebacks", [])[:_TOP_FUNCTIONS]
+    return report
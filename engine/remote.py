@@ -0,0 +1,339 @@
+"""Remote workers: run jobs on other hosts over a line-based TCP protocol.
+
+`python -m engine worker --listen HOST:PORT` starts a worker daemon that runs
+jobs with run_solution_async(), at most `slots` at once. A Dispatcher keeps
+a connection to each of a list of workers and sends every job to the
+connected worker with the most free slots; jobs wait in the dispatcher
+while every slot is taken. When a worker's connection drops, its jobs are
+queued again (up to _MAX_ATTEMPTS times each) and the dispatcher keeps
+reconnecting to it.
+
+Messages are JSON objects, one per line. On connect the worker sends
+
+    {"type": "hello", "slots": 4}
+
+The dispatcher sends jobs (run_solution_async() arguments from _JOB_ARGUMENTS):
+
+    {"type": "run", "job": 7, "args": {"problem": ..., "language": ..., "solution_code": ..., "tests": [1, 2]}}
+
+and the worker streams each test's result as it finishes, then the run's:
+
+    {"type": "test", "job": 7, "test": {...}}
+    {"type": "result", "job": 7, "result": {...}}
+
+or {"type": "error", "job": 7, "message": "..."} if the engine raised. The
+dispatcher sends {"type": "cancel", "job": 7} for a job no longer wanted.
+There is no authentication: a worker runs whatever code it is sent, so
+listen only on trusted networks (the default is 127.0.0.1).
+"""
+
+import asyncio
+import collections
+import itertools
+import json
+import os
+import signal
+
+from . import jvm_pool
+from .runner import isolate_process, isolation_slots, run_solution_async
+
+DEFAULT_PORT = 7300
+
+# Arguments a job may pass to run_solution_async (paths stay the worker's own)
+_JOB_ARGUMENTS = frozenset({
+    "problem", "language", "solution_code", "timeout", "per_test", "timings",
+    "repeats", "baseline", "max_time_ratio", "tier", "profile", "memory_profile",
+    "warm", "tests", "fail_fast", "order",
+})
+
+# Workers a job may be sent to before it fails
+_MAX_ATTEMPTS = 3
+
+_RECONNECT_SECONDS = 2.0
+
+# Longest message line (a result with profiles and collapsed stacks can be large)
+_READ_LIMIT_BYTES = 2**24
+
+
+class RemoteError(RuntimeError):
+    """A job failed on its worker, or was lost with _MAX_ATTEMPTS workers."""
+
+
+def parse_address(address: str, default_host: str = "127.0.0.1") -> tuple:
+    """Split "host:port" (or ":port", or "port") into (host, port)."""
+    host, _, port = address.rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+async def serve(host: str, port: int, slots: int | None = None, isolate: bool = False):
+    """Run a worker daemon until cancelled.
+
+    slots defaults to the CPU count (with isolate, the number of test cores).
+    Every connection shares the slots, so several dispatchers (e.g. one per
+    server worker process) can use the same worker.
+    """
+    if isolate:
+        isolate_process()
+        slots = min(slots or isolation_slots(), isolation_slots())
+    slots = slots or os.cpu_count() or 1
+    running = asyncio.Semaphore(slots)
+    # Open connections' handler tasks
+    connections = set()
+
+    async def handle(reader, writer):
+        task = asyncio.current_task()
+        connections.add(task)
+        try:
+            await _serve_connection(reader, writer, slots, running, isolate)
+        except asyncio.CancelledError:
+            # The daemon is stopping; _serve_connection has cancelled the
+            # connection's jobs and closed it. Ending normally keeps asyncio
+            # from logging the cancellation as an error in its callback.
+            pass
+        finally:
+            connections.discard(task)
+
+    # SIGTERM stops the daemon like Ctrl-C: running jobs are cancelled
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    server = await asyncio.start_server(handle, host, port, limit=_READ_LIMIT_BYTES)
+    print(f"Engine worker listening on {host}:{port} with {slots} slot(s)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        # Close open connections (cancelling their jobs) before the loop tears down
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        await jvm_pool.close_pools()
+
+
+async def _serve_connection(reader, writer, slots: int, running: asyncio.Semaphore, isolate: bool):
+    """Run one dispatcher's jobs; they are cancelled if it disconnects."""
+    # Job id -> task
+    jobs = {}
+
+    def send(message: dict):
+        if not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    async def run_job(job_id, args: dict):
+        try:
+            async with running:
+                result = await run_solution_async(
+                    **args,
+                    isolate=isolate,
+                    on_test=lambda test: send({"type": "test", "job": job_id, "test": test}),
+                )
+            send({"type": "result", "job": job_id, "result": result})
+        except Exception as e:
+            send({"type": "error", "job": job_id, "message": f"Engine error: {e}"})
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    send({"type": "hello", "slots": slots})
+    try:
+        while line := await reader.readline():
+            message = json.loads(line)
+            if message.get("type") == "cancel":
+                task = jobs.get(message.get("job"))
+                if task is not None:
+                    task.cancel()
+                continue
+            if message.get("type") != "run":
+                continue
+            args = message.get("args", {})
+            unknown = set(args) - _JOB_ARGUMENTS
+            if unknown:
+                send({
+                    "type": "error", "job": message["job"],
+                    "message": "Unsupported job argument(s): " + ", ".join(sorted(unknown)),
+                })
+                continue
+            job_id = message["job"]
+            jobs[job_id] = asyncio.create_task(run_job(job_id, args))
+            jobs[job_id].add_done_callback(lambda _, job_id=job_id: jobs.pop(job_id, None))
+    except (ConnectionError, ValueError, KeyError):
+        pass
+    finally:
+        tasks = list(jobs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+
+
+class _Job:
+    def __init__(self, job_id: int, args: dict, on_test, on_start):
+        self.id = job_id
+        self.args = args
+        self.on_test = on_test
+        self.on_start = on_start
+        self.attempts = 0
+        # The _Worker running it, if any
+        self.worker = None
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class _Worker:
+    """The dispatcher's connection to one worker, reconnecting when it drops."""
+
+    def __init__(self, dispatcher: "Dispatcher", address: str):
+        self.address = address
+        self.slots = 0
+        # Job id -> _Job sent to this worker and not yet answered
+        self.jobs = {}
+        self._dispatcher = dispatcher
+        self._writer = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def free(self) -> int:
+        return self.slots - len(self.jobs) if self.connected else 0
+
+    def send(self, job: _Job):
+        self.jobs[job.id] = job
+        job.worker = self
+        job.attempts += 1
+        self._write({"type": "run", "job": job.id, "args": job.args})
+        if job.on_start is not None:
+            job.on_start()
+            job.on_start = None
+
+    def cancel(self, job: _Job):
+        """Stop a job the caller no longer waits for; frees its slot."""
+        if self.jobs.pop(job.id, None) is not None:
+            self._write({"type": "cancel", "job": job.id})
+            self._dispatcher.dispatch()
+
+    def _write(self, message: dict):
+        if self.connected:
+            self._writer.write(json.dumps(message).encode() + b"\n")
+
+    async def run(self):
+        host, port = parse_address(self.address)
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(host, port, limit=_READ_LIMIT_BYTES)
+            except OSError:
+                await asyncio.sleep(_RECONNECT_SECONDS)
+                continue
+            try:
+                hello = json.loads(await reader.readline())
+                self.slots = hello["slots"]
+                self._writer = writer
+                self._dispatcher.dispatch()
+                while line := await reader.readline():
+                    self._receive(json.loads(line))
+            except (ConnectionError, ValueError, KeyError, TypeError):
+                pass
+            finally:
+                self._writer = None
+                writer.close()
+                lost, self.jobs = list(self.jobs.values()), {}
+                for job in lost:
+                    job.worker = None
+                self._dispatcher.requeue(lost, self.address)
+            await asyncio.sleep(_RECONNECT_SECONDS)
+
+    def _receive(self, message: dict):
+        job = self.jobs.get(message.get("job"))
+        if job is None:
+            return
+        kind = message["type"]
+        if kind == "test":
+            if job.on_test is not None:
+                job.on_test(message["test"])
+            return
+        del self.jobs[job.id]
+        job.worker = None
+        if not job.future.done():
+            if kind == "result":
+                job.future.set_result(message["result"])
+            else:
+                job.future.set_exception(RemoteError(f"{self.address}: {message.get('message')}"))
+        self._dispatcher.dispatch()
+
+
+class Dispatcher:
+    """Sends run jobs to remote workers, balancing them by free slots.
+
+    Bound to the event loop of its first run().
+    """
+
+    def __init__(self, addresses: list):
+        self._workers = [_Worker(self, address) for address in addresses]
+        self._pending = collections.deque()
+        self._ids = itertools.count(1)
+        self._tasks = []
+
+    async def run(self, args: dict, on_test=None, on_start=None) -> dict:
+        """Run a job remotely: run_solution_async(**args) on some worker.
+
+        on_test is called with each test's result as the worker streams it
+        (after a worker is lost, the retry's tests are reported again);
+        on_start once the job is first sent to a worker. Raises RemoteError
+        if the job fails.
+        """
+        unknown = set(args) - _JOB_ARGUMENTS
+        if unknown:
+            raise ValueError("Unsupported job argument(s): " + ", ".join(sorted(unknown)))
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(worker.run()) for worker in self._workers]
+        job = _Job(next(self._ids), args, on_test, on_start)
+        self._pending.append(job)
+        self.dispatch()
+        try:
+            return await job.future
+        finally:
+            if job in self._pending:
+                self._pending.remove(job)
+            elif job.worker is not None:
+                job.worker.cancel(job)
+
+    def workers(self) -> list:
+        """Per-worker address, connection state, slots and running jobs."""
+        return [
+            {
+                "address": worker.address,
+                "connected": worker.connected,
+                "slots": worker.slots,
+                "running": len(worker.jobs),
+            }
+            for worker in self._workers
+        ]
+
+    def dispatch(self):
+        """Send pending jobs to the workers with the most free slots."""
+        while self._pending:
+            worker = max(self._workers, key=lambda w: w.free)
+            if worker.free <= 0:
+                return
+            job = self._pending.popleft()
+            if job.future.done():
+                continue
+            worker.send(job)
+
+    def requeue(self, jobs: list, address: str):
+        """Queue a lost worker's jobs again, ahead of newer ones."""
+        for job in reversed(jobs):
+            if job.future.done():
+                continue
+            if job.attempts >= _MAX_ATTEMPTS:
+                job.future.set_exception(
+                    RemoteError(f"Lost the worker running this job {job.attempts} times (last: {address})"),
+                )
+            else:
+                self._pending.appendleft(job)
+        self.dispatch()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,7 +1,25 @@
-"""Core execution engine: copy harness, inject solution, run tests, return results."""
-
+"""Core execution engine: copy harness, inject solution, run tests, return results.
+
+The engine is asyncio-based: run_solution_async() runs on the caller's event
+loop, and one _ProcessMonitor task per loop enforces the limits of every
+live test process in a single polling pass. run_solution() wraps it for
+synchronous callers (the CLI, grading, baselines). Every finished run is
+counted in engine.metrics; it is appended to the run history (engine.history)
+only when recording is enabled (history.enable_recording(), called by the
+server, its executors and --record).
+
+The steps of a run -- load_harness(), provision_workspace(),
+inject_solution(), run_setup() and run_test_id(), timed by a Timeline --
+are public so batch grading (engine.grade) can reuse a workspace across
+solutions.
+"""
+
+import asyncio
+import contextlib
+import functools
 import glob
 import json
+import math
 import os
 import resource
 import shlex
@@ -11,21 +29,42 @@ import subprocess
 import tempfile
 import threading
 import time
+import weakref
 
+from . import baseline as baselines
+from . import history, jvm_pool, metrics, profiling
 from .junit_xml import parse_junit_xml
 
 # Defaults if testcases.json has no "limits" section
 _DEFAULT_TIME_SECONDS = 30
 _DEFAULT_MEMORY_MB = 256
 
+# Generated stress tiers live in problems/<problem>/tiers/; the chosen one is
+# copied into the workspace under TIER_FILE for the tier_test_command
+TIERS_DIR = "tiers"
+TIER_FILE = "tier.json"
 
-def run_solution(
+
+async def run_solution_async(
     problem: str,
     language: str,
     solution_code: str,
     timeout: int = 120,
     problems_dir: str | None = None,
     per_test: bool = True,
+    timings: bool = False,
+    repeats: int = 1,
+    baseline: bool = True,
+    max_time_ratio: float | None = None,
+    tier: str | None = None,
+    profile: bool = False,
+    memory_profile: bool = False,
+    warm: bool = False,
+    tests: list | None = None,
+    fail_fast: bool = False,
+    order: str = "file",
+    isolate: bool = False,
+    on_test=None,
 ) -> dict:
     """Run a solution against a problem's test harness and return structured results.
 
@@ -36,24 +75,226 @@ def run_solution(
         timeout: Max seconds for the test command (batch mode) or setup command
         problems_dir: Override path to problems/ directory
         per_test: If True, run each test individually with resource limits
+        timings: If True, attach a "timings" section with per-phase monotonic
+            timestamps and per-test CPU usage
+        repeats: Run each test this many times and report medians (per-test mode)
+        baseline: If True and a reference baseline is recorded for this
+            problem/language, attach time/memory ratios to each test
+        max_time_ratio: Give passing tests slower than this multiple of the
+            reference the "too_slow" verdict (default: limits.reference_time_ratio
+            in testcases.json, if set)
+        tier: Run the cases of a generated stress tier (problems/<problem>/tiers/<tier>.json,
+            or a path to a tier file) instead of the problem's tests. Needs a
+            harness with a tier_test_command; baselines are not applied
+        profile: Sample each test's CPU usage and attach a "profile" summary
+            (see engine.profiling) to its result. Per-test mode only, and only
+            for harnesses that declare a profile_file in runner.json; the
+            profiler runs inside the test's own limits
+        memory_profile: Run each test under an allocation tracer. When a test
+            crosses MEMORY_WARN_FRACTION of its memory limit it is signalled
+            to report its top allocation sites, which are attached to its
+            result as "memory_profile" (e.g. to an MLE). Needs a harness with
+            a memory_profile_file; tracing overhead counts toward the limit
+        warm: Run each test in a warm worker (see engine.jvm_pool) instead of
+            a fresh process, for harnesses that declare a worker_command.
+            Workers are kept per event loop and reused by later runs on it.
+            Baselines (recorded with fresh processes) are not applied
+        tests: Run only these test ids (per-test modes); the others are
+            reported with the "skipped" verdict
+        fail_fast: Stop after the first test that does not pass; the tests
+            not run are reported as "skipped" (per-test modes)
+        order: "file" runs tests in testcases.json order; "cheapest" runs
+            those with the lowest recorded CPU time first (from the run
+            history: this solution's runs if any, else any solution's);
+            tests with no history run last. Results are always reported in
+            testcases.json order
+        isolate: Pin each test process to a dedicated core (see _CpuSlots),
+            waiting for a free one, so concurrent runs don't share cores or
+            caches; the core is recorded in each result as "cpu". Setup
+            commands run on the reserved core at lower priority. Not applied
+            to warm workers
+        on_test: Called with each test's result as soon as it finishes
+            (per-test modes), e.g. to stream results; the returned result
+            has the same tests, plus baseline ratios where they apply
 
     Returns:
-        Dict with status, tests, summary, stdout, stderr
+        Dict with status, tests, summary, stdout, stderr (and timings if requested)
+
+    Raises:
+        ValueError: tests names an id the problem (or tier) does not have,
+            or order is unknown
     """
-    if problems_dir is None:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        problems_dir = os.path.join(project_root, "problems")
+    if order not in ("file", "cheapest"):
+        raise ValueError(f"Unknown test order: {order!r}")
+    harness, error = load_harness(problem, language, problems_dir, tier=tier)
+    if error:
+        return error
+
+    config = harness["config"]
+    testcases = harness["testcases"]
+    single_test_command = config.get("single_test_command")
+
+    # Which tests run, in what order (per-test modes); the rest are skipped
+    test_ids = [t["id"] for t in testcases.get("tests", [])]
+    run_ids = test_ids
+    if tests is not None:
+        wanted = {str(test_id) for test_id in tests}
+        unknown = wanted - {str(test_id) for test_id in test_ids}
+        if unknown:
+            raise ValueError("Unknown test id(s): " + ", ".join(sorted(unknown)))
+        run_ids = [test_id for test_id in test_ids if str(test_id) in wanted]
+    if order == "cheapest":
+        run_ids = await _cheapest_first(run_ids, problem, language, solution_code, tier)
+
+    timeline = Timeline()
+    tmp_dir = None
+    try:
+        # Copy entire harness into temp dir (off the event loop: it may be large)
+        with timeline.phase("provision"):
+            tmp_dir, work_dir = await asyncio.to_thread(provision_workspace, harness)
+
+        # Inject solution code
+        with timeline.phase("inject"):
+            inject_solution(work_dir, config, solution_code)
+
+        # Choose per-test or batch mode
+        if per_test and single_test_command and warm and config.get("worker_command"):
+            mode = "warm"
+            result = await _run_warm(
+                harness=harness,
+                work_dir=work_dir,
+                test_ids=run_ids,
+                timeout=timeout,
+                timeline=timeline,
+                repeats=repeats,
+                fail_fast=fail_fast,
+                on_test=on_test,
+            )
+            result = _with_skipped(result, test_ids)
+        elif per_test and single_test_command:
+            mode = "per_test"
+            result = await _run_per_test(
+                config=config,
+                work_dir=work_dir,
+                test_ids=run_ids,
+                time_limit=harness["time_limit"],
+                memory_limit=harness["memory_limit"],
+                timeout=timeout,
+                timeline=timeline,
+                repeats=repeats,
+                profile=profile,
+                memory_profile=memory_profile,
+                fail_fast=fail_fast,
+                isolate=isolate,
+                on_test=on_test,
+            )
+            result = _with_skipped(result, test_ids)
+            if baseline and tier is None:
+                if max_time_ratio is None:
+                    max_time_ratio = harness["limits"].get("reference_time_ratio")
+                baselines.score_result(
+                    result,
+                    baselines.load_baseline(problem, language, problems_dir),
+                    max_time_ratio=max_time_ratio,
+                )
+        else:
+            mode = "batch"
+            result = await _run_batch(
+                config=config,
+                work_dir=work_dir,
+                timeout=timeout,
+                timeline=timeline,
+                isolate=isolate,
+            )
+
+    finally:
+        if tmp_dir and os.path.exists(tmp_dir):
+            with timeline.phase("cleanup"):
+                await asyncio.to_thread(shutil.rmtree, tmp_dir, ignore_errors=True)
 
+    metrics.record_run(language, result, timeline.phases)
+    history.record_run(problem, language, solution_code, result, mode, tier=tier)
+    if timings:
+        result["timings"] = timeline.to_dict()
+    return result
+
+
+def run_solution(
+    problem: str,
+    language: str,
+    solution_code: str,
+    timeout: int = 120,
+    problems_dir: str | None = None,
+    per_test: bool = True,
+    timings: bool = False,
+    repeats: int = 1,
+    baseline: bool = True,
+    max_time_ratio: float | None = None,
+    tier: str | None = None,
+    profile: bool = False,
+    memory_profile: bool = False,
+    warm: bool = False,
+    tests: list | None = None,
+    fail_fast: bool = False,
+    order: str = "file",
+    isolate: bool = False,
+    on_test=None,
+) -> dict:
+    """Run a solution and return its results; see run_solution_async for the arguments.
+
+    Runs its own event loop, so it must not be called from a coroutine. Warm
+    workers are stopped when the run ends.
+    """
+    async def run_and_close_pools():
+        try:
+            return await run_solution_async(
+                problem,
+                language,
+                solution_code,
+                timeout=timeout,
+                problems_dir=problems_dir,
+                per_test=per_test,
+                timings=timings,
+                repeats=repeats,
+                baseline=baseline,
+                max_time_ratio=max_time_ratio,
+                tier=tier,
+                profile=profile,
+                memory_profile=memory_profile,
+                warm=warm,
+                tests=tests,
+                fail_fast=fail_fast,
+                order=order,
+                isolate=isolate,
+                on_test=on_test,
+            )
+        finally:
+            await jvm_pool.close_pools()
+
+    return asyncio.run(run_and_close_pools())
+
+
+def load_harness(problem: str, language: str, problems_dir: str | None, tier: str | None = None) -> tuple:
+    """Read a harness's runner.json and the problem's testcases.json.
+
+    Returns (harness, None) on success or (None, error_result) if the
+    harness is missing. The harness dict holds the problem and language
+    slugs, harness dir, config, testcases, and the per-test limits. With a
+    tier, the tier's cases replace the tests and its tier_test_command
+    becomes the single_test_command; limits not set by the tier come from
+    testcases.json.
+    """
+    problems_dir = resolve_problems_dir(problems_dir)
     harness_dir = os.path.join(problems_dir, problem, "languages", language)
     if not os.path.isdir(harness_dir):
-        return _error_result(
+        return None, _error_result(
             "build_error",
             f"Harness directory not found: {harness_dir}",
         )
 
     config_path = os.path.join(harness_dir, "runner.json")
     if not os.path.isfile(config_path):
-        return _error_result(
+        return None, _error_result(
             "build_error",
             f"runner.json not found in {harness_dir}",
         )
@@ -69,76 +310,95 @@ def run_solution(
             testcases = json.load(f)
 
     limits = testcases.get("limits", {})
-    time_limit = limits.get("time_seconds", _DEFAULT_TIME_SECONDS)
-    memory_limit = limits.get("memory_mb", _DEFAULT_MEMORY_MB)
 
-    solution_file = config["solution_file"]
-    single_test_command = config.get("single_test_command")
+    tier_path = None
+    if tier is not None:
+        if not config.get("tier_test_command"):
+            return None, _error_result(
+                "build_error",
+                f"{language} harness has no tier_test_command",
+            )
+        tier_path = tier if os.path.isfile(tier) else os.path.join(problems_dir, problem, TIERS_DIR, f"{tier}.json")
+        if not os.path.isfile(tier_path):
+            return None, _error_result(
+                "build_error",
+                f"Tier not found: {tier_path}",
+            )
+        with open(tier_path) as f:
+            testcases = json.load(f)
+        limits = {**limits, **testcases.get("limits", {})}
+        config = dict(config, single_test_command=config["tier_test_command"])
 
-    tmp_dir = None
-    try:
-        tmp_dir = tempfile.mkdtemp(prefix=f"engine_{problem}_{language}_")
+    return {
+        "problem": problem,
+        "language": language,
+        "dir": harness_dir,
+        "config": config,
+        "testcases": testcases,
+        "tier_path": tier_path,
+        "limits": limits,
+        "time_limit": limits.get("time_seconds", _DEFAULT_TIME_SECONDS),
+        "memory_limit": limits.get("memory_mb", _DEFAULT_MEMORY_MB),
+    }, None
+
+
+def resolve_problems_dir(problems_dir: str | None) -> str:
+    """problems_dir, or the project's problems/ directory when None."""
+    if problems_dir is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        problems_dir = os.path.join(project_root, "problems")
+    return problems_dir
 
-        # Copy entire harness into temp dir
-        work_dir = os.path.join(tmp_dir, "harness")
-        shutil.copytree(harness_dir, work_dir)
 
-        # Inject solution code
-        solution_path = os.path.join(work_dir, solution_file)
-        os.makedirs(os.path.dirname(solution_path), exist_ok=True)
-        with open(solution_path, "w") as f:
-            f.write(solution_code)
+def provision_workspace(harness: dict) -> tuple:
+    """Copy the harness into a fresh temp dir; returns (tmp_dir, work_dir)."""
+    tmp_dir = tempfile.mkdtemp(prefix=f"engine_{harness['problem']}_{harness['language']}_")
+    work_dir = os.path.join(tmp_dir, "harness")
+    shutil.copytree(harness["dir"], work_dir)
+    if harness.get("tier_path"):
+        shutil.copyfile(harness["tier_path"], os.path.join(work_dir, TIER_FILE))
+    return tmp_dir, work_dir
 
-        # Choose per-test or batch mode
-        if per_test and single_test_command:
-            test_ids = [t["id"] for t in testcases.get("tests", [])]
-            return _run_per_test(
-                config=config,
-                work_dir=work_dir,
-                test_ids=test_ids,
-                time_limit=time_limit,
-                memory_limit=memory_limit,
-                timeout=timeout,
-            )
-        else:
-            return _run_batch(
-                config=config,
-                work_dir=work_dir,
-                timeout=timeout,
-            )
 
-    finally:
-        if tmp_dir and os.path.exists(tmp_dir):
-            shutil.rmtree(tmp_dir, ignore_errors=True)
+def inject_solution(work_dir: str, config: dict, solution_code: str):
+    """Write solution_code to the harness's solution_file in work_dir."""
+    solution_path = os.path.join(work_dir, config["solution_file"])
+    os.makedirs(os.path.dirname(solution_path), exist_ok=True)
+    with open(solution_path, "w") as f:
+        f.write(solution_code)
+
 
+async def _run_batch(
+    config: dict,
+    work_dir: str,
+    timeout: int,
+    timeline: "Timeline",
+    isolate: bool = False,
+) -> dict:
+    """Run all tests as a single subprocess (original behavior).
 
-def _run_batch(config: dict, work_dir: str, timeout: int) -> dict:
-    """Run all tests as a single subprocess (original behavior)."""
+    With isolate, the subprocess is pinned to one dedicated core.
+    """
     test_command = config["test_command"]
     junit_xml_glob = config["junit_xml_glob"]
 
-    try:
-        result = subprocess.run(
-            test_command,
-            shell=True,
-            cwd=work_dir,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        stdout = result.stdout
-        stderr = result.stderr
-    except subprocess.TimeoutExpired as e:
+    with timeline.phase("tests"), _active_subprocess():
+        if isolate:
+            async with _CpuSlots.shared().slot() as cpu:
+                returncode, stdout, stderr = await _run_shell(test_command, work_dir, timeout, cpus={cpu})
+        else:
+            returncode, stdout, stderr = await _run_shell(test_command, work_dir, timeout)
+    if returncode is None:
         return {
             "status": "timeout",
             "tests": [],
             "summary": _empty_summary(),
-            "stdout": (e.stdout or b"").decode(errors="replace") if isinstance(e.stdout, bytes) else (e.stdout or ""),
-            "stderr": (e.stderr or b"").decode(errors="replace") if isinstance(e.stderr, bytes) else (e.stderr or ""),
+            "stdout": stdout,
+            "stderr": stderr,
         }
 
     # Detect signal-based kills on Unix
-    if result.returncode < 0 or result.returncode > 128:
+    if returncode < 0 or returncode > 128:
         return {
             "status": "runtime_error",
             "tests": [],
@@ -161,10 +421,11 @@ def _run_batch(config: dict, work_dir: str, timeout: int) -> dict:
 
     all_tests = []
     total_errors = 0
-    for xml_file in sorted(xml_files):
-        parsed = parse_junit_xml(xml_file)
-        all_tests.extend(parsed["tests"])
-        total_errors += parsed["summary"]["errors"]
+    with timeline.phase("xml_parse"):
+        for xml_file in sorted(xml_files):
+            parsed = parse_junit_xml(xml_file)
+            all_tests.extend(parsed["tests"])
+            total_errors += parsed["summary"]["errors"]
 
     total = len(all_tests)
     passed = sum(1 for t in all_tests if t["passed"])
@@ -178,6 +439,7 @@ def _run_batch(config: dict, work_dir: str, timeout: int) -> dict:
             "total": total,
             "passed": passed,
             "failed": failed,
+            "skipped": 0,
             "errors": total_errors,
             "time_seconds": round(total_time, 3),
         },
@@ -186,64 +448,192 @@ def _run_batch(config: dict, work_dir: str, timeout: int) -> dict:
     }
 
 
-def _run_per_test(
+async def _run_per_test(
     config: dict,
     work_dir: str,
     test_ids: list,
     time_limit: int,
     memory_limit: int,
     timeout: int,
+    timeline: "Timeline",
+    repeats: int = 1,
+    profile: bool = False,
+    memory_profile: bool = False,
+    fail_fast: bool = False,
+    isolate: bool = False,
+    on_test=None,
 ) -> dict:
-    """Run each test individually with resource limits."""
-    setup_command = config.get("setup_command")
-    single_test_command = config["single_test_command"]
-    junit_xml_glob = config["junit_xml_glob"]
+    """Run each test individually with resource limits.
+
+    With fail_fast, stops after the first test that does not pass. With
+    isolate, each test runs pinned to a dedicated core. on_test is called
+    with each test's result as it finishes.
+    """
+    setup_error = await _run_setup_async(config, work_dir, timeout, timeline, isolate=isolate)
+    if setup_error:
+        return setup_error
 
-    # Run setup command if present (e.g. compilation)
-    if setup_command:
+    # Run each test individually
+    all_tests = []
+    with timeline.phase("tests"):
+        for test_id in test_ids:
+            runs = [
+                await _run_test_id_async(
+                    config=config,
+                    work_dir=work_dir,
+                    test_id=test_id,
+                    time_limit=time_limit,
+                    memory_limit=memory_limit,
+                    timeline=timeline,
+                    profile=profile,
+                    memory_profile=memory_profile,
+                    isolate=isolate,
+                )
+                for _ in range(max(1, repeats))
+            ]
+            all_tests.append(baselines.merge_repeats(runs) if len(runs) > 1 else runs[0])
+            if on_test is not None:
+                on_test(all_tests[-1])
+            if fail_fast and all_tests[-1]["verdict"] != "passed":
+                break
+
+    return _per_test_result(all_tests)
+
+
+async def _run_warm(
+    harness: dict,
+    work_dir: str,
+    test_ids: list,
+    timeout: int,
+    timeline: "Timeline",
+    repeats: int = 1,
+    fail_fast: bool = False,
+    on_test=None,
+) -> dict:
+    """Run each test on the harness's warm worker pool; results as in per-test mode."""
+    config = harness["config"]
+    setup_error = await _run_setup_async(config, work_dir, timeout, timeline)
+    if setup_error:
+        return setup_error
+
+    with timeline.phase("workers"):
         try:
-            setup_result = subprocess.run(
-                setup_command,
-                shell=True,
-                cwd=work_dir,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
+            pool = await jvm_pool.get_pool(
+                (harness["dir"], harness["memory_limit"]),
+                lambda: _start_pool(harness, timeout),
             )
-        except subprocess.TimeoutExpired as e:
-            return _error_result(
-                "build_error",
-                "Setup command timed out: " + setup_command,
-            )
-
-        if setup_result.returncode != 0:
-            return {
-                "status": "build_error",
-                "tests": [],
-                "summary": _empty_summary(),
-                "stdout": setup_result.stdout,
-                "stderr": setup_result.stderr,
-            }
+        except jvm_pool.WorkerError as e:
+            return _error_result("build_error", str(e))
 
-    # Run each test individually
+    class_dirs = [os.path.join(work_dir, d) for d in config["worker_classes"]]
     all_tests = []
-    for test_id in test_ids:
-        cmd_str = single_test_command.replace("{test_id}", str(test_id))
-        cmd_args = shlex.split(cmd_str)
-
-        test_result = _run_single_test(
-            cmd_args=cmd_args,
-            work_dir=work_dir,
-            junit_xml_glob=junit_xml_glob,
-            time_limit=time_limit,
-            memory_limit=memory_limit,
-            test_name=f"test_{test_id}",
+    with timeline.phase("tests"):
+        for test_id in test_ids:
+            runs = []
+            for _ in range(max(1, repeats)):
+                test_timing = {"name": f"test_{test_id}", "spawn": round(timeline.now(), 6)}
+                timeline.tests.append(test_timing)
+                with _active_subprocess():
+                    run = await pool.run_test(
+                        class_dirs,
+                        config["worker_test"].replace("{test_id}", str(test_id)),
+                        harness["time_limit"],
+                        f"test_{test_id}",
+                    )
+                test_timing["exit"] = round(timeline.now(), 6)
+                test_timing["wall_seconds"] = run["wall_seconds"]
+                test_timing["cpu_user_seconds"] = run["cpu_user_seconds"]
+                test_timing["cpu_sys_seconds"] = run["cpu_sys_seconds"]
+                runs.append(run)
+            all_tests.append(baselines.merge_repeats(runs) if len(runs) > 1 else runs[0])
+            if on_test is not None:
+                on_test(all_tests[-1])
+            if fail_fast and all_tests[-1]["verdict"] != "passed":
+                break
+
+    return _per_test_result(all_tests)
+
+
+async def _start_pool(harness: dict, timeout: int) -> jvm_pool.JvmPool:
+    """Prepare a workspace for a harness's worker pool and start its workers.
+
+    The workspace is the unmodified harness, built with worker_setup_command;
+    "{classpath}" in worker_command is replaced by the contents of
+    worker_classpath_file and "{memory_mb}" by the memory limit. Raises
+    jvm_pool.WorkerError if the build or a worker fails.
+    """
+    config = harness["config"]
+    tmp_dir, work_dir = await asyncio.to_thread(provision_workspace, dict(harness, tier_path=None))
+    try:
+        setup_command = config.get("worker_setup_command")
+        if setup_command:
+            returncode, stdout, stderr = await _run_shell(setup_command, work_dir, timeout)
+            if returncode != 0:
+                lines = (stderr or stdout).strip().splitlines()
+                raise jvm_pool.WorkerError(
+                    "Worker setup failed: " + (lines[-1][:200] if lines else setup_command)
+                )
+        command = config["worker_command"].replace("{memory_mb}", str(harness["memory_limit"]))
+        if config.get("worker_classpath_file"):
+            try:
+                with open(os.path.join(work_dir, config["worker_classpath_file"])) as f:
+                    command = command.replace("{classpath}", f.read().strip())
+            except OSError as e:
+                raise jvm_pool.WorkerError(f"Worker class path not found: {e}") from e
+        pool = jvm_pool.JvmPool(
+            shlex.split(command),
+            work_dir,
+            size=config.get("worker_pool_size", jvm_pool.DEFAULT_POOL_SIZE),
+            tmp_dir=tmp_dir,
         )
-        all_tests.append(test_result)
+        await pool.start()
+    except BaseException:
+        await asyncio.to_thread(shutil.rmtree, tmp_dir, ignore_errors=True)
+        raise
+    return pool
+
+
+async def _cheapest_first(test_ids: list, problem: str, language: str, solution_code: str, tier: str | None) -> list:
+    """Order test ids by recorded CPU time, cheapest first; ids with no history go last."""
+    costs = await asyncio.to_thread(
+        history.test_costs, problem, language, history.solution_hash(solution_code), tier,
+    )
+    known = sorted((i for i in test_ids if f"test_{i}" in costs), key=lambda i: costs[f"test_{i}"])
+    return known + [i for i in test_ids if f"test_{i}" not in costs]
+
+
+def _with_skipped(result: dict, test_ids: list) -> dict:
+    """Per-test results in test id order, with a "skipped" result for each id not run."""
+    if result["status"] != "completed":
+        return result
+    by_name = {t["name"]: t for t in result["tests"]}
+    return _per_test_result([
+        by_name.get(f"test_{test_id}") or _empty_test(f"test_{test_id}", "skipped")
+        for test_id in test_ids
+    ])
+
+
+def _empty_test(test_name: str, verdict: str, message: str | None = None) -> dict:
+    """A test result for a test that did not run (or failed to start), in the full schema."""
+    return {
+        "name": test_name,
+        "verdict": verdict,
+        "time_seconds": 0.0,
+        "wall_seconds": 0.0,
+        "cpu_user_seconds": 0.0,
+        "cpu_sys_seconds": 0.0,
+        "memory_mb": 0.0,
+        "voluntary_context_switches": 0,
+        "involuntary_context_switches": 0,
+        "message": message,
+    }
 
+
+def _per_test_result(all_tests: list) -> dict:
     total = len(all_tests)
     passed = sum(1 for t in all_tests if t["verdict"] == "passed")
-    failed = total - passed
+    skipped = sum(1 for t in all_tests if t["verdict"] == "skipped")
+    failed = total - passed - skipped
 
     return {
         "status": "completed",
@@ -252,6 +642,7 @@ def _run_per_test(
             "total": total,
             "passed": passed,
             "failed": failed,
+            "skipped": skipped,
             "errors": 0,
             "time_seconds": round(sum(t["time_seconds"] for t in all_tests), 3),
         },
@@ -260,71 +651,248 @@ def _run_per_test(
     }
 
 
-def _run_single_test(
+def run_setup(config: dict, work_dir: str, timeout: int, timeline: "Timeline", isolate: bool = False) -> dict | None:
+    """Synchronous _run_setup_async, for callers without an event loop (grade workers)."""
+    return asyncio.run(_run_setup_async(config, work_dir, timeout, timeline, isolate=isolate))
+
+
+async def _run_setup_async(
+    config: dict,
+    work_dir: str,
+    timeout: int,
+    timeline: "Timeline",
+    isolate: bool = False,
+) -> dict | None:
+    """Run the setup command if present (e.g. compilation).
+
+    With isolate, it runs on the reserved core(s) at lower priority, out of
+    the way of timed tests. Returns None on success, or a build_error result.
+    """
+    setup_command = config.get("setup_command")
+    if not setup_command:
+        return None
+
+    with timeline.phase("setup"), _active_subprocess():
+        if isolate:
+            returncode, stdout, stderr = await _run_shell(
+                setup_command, work_dir, timeout, cpus=_CpuSlots.shared().reserved, nice=_NON_TEST_NICE,
+            )
+        else:
+            returncode, stdout, stderr = await _run_shell(setup_command, work_dir, timeout)
+    if returncode is None:
+        return _error_result(
+            "build_error",
+            "Setup command timed out: " + setup_command,
+        )
+
+    if returncode != 0:
+        return {
+            "status": "build_error",
+            "tests": [],
+            "summary": _empty_summary(),
+            "stdout": stdout,
+            "stderr": stderr,
+        }
+    return None
+
+
+async def _run_shell(
+    command: str,
+    work_dir: str,
+    timeout: float,
+    cpus: set | None = None,
+    nice: int = 0,
+) -> tuple:
+    """Run a shell command, capturing output; returns (returncode, stdout, stderr).
+
+    returncode is None if the command timed out (its process group is killed).
+    cpus restricts the command to those CPUs; nice lowers its priority.
+    """
+    def preexec_fn():
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+        if nice:
+            os.nice(nice)
+
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        cwd=work_dir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+        preexec_fn=preexec_fn if cpus or nice else None,
+    )
+    communicate = asyncio.ensure_future(proc.communicate())
+    try:
+        stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), timeout)
+        returncode = proc.returncode
+    except asyncio.TimeoutError:
+        _kill_group(proc.pid)
+        # Collect what was written before the kill
+        stdout, stderr = await communicate
+        returncode = None
+    return returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+def run_test_id(**kwargs) -> dict:
+    """Synchronous _run_test_id_async, for callers without an event loop (grade workers)."""
+    return asyncio.run(_run_test_id_async(**kwargs))
+
+
+async def _run_test_id_async(
+    config: dict,
+    work_dir: str,
+    test_id,
+    time_limit: float,
+    memory_limit: int,
+    timeline: "Timeline",
+    profile: bool = False,
+    memory_profile: bool = False,
+    isolate: bool = False,
+) -> dict:
+    """Run one test id with the harness's single_test_command.
+
+    With isolate, waits for a free dedicated core and pins the test to it.
+    """
+    cmd_str = config["single_test_command"].replace("{test_id}", str(test_id))
+    profile_path = None
+    if profile and config.get("profile_file"):
+        profile_path = os.path.join(work_dir, config["profile_file"])
+    memory_profile_path = None
+    if memory_profile and config.get("memory_profile_file"):
+        memory_profile_path = os.path.join(work_dir, config["memory_profile_file"])
+    run_test = functools.partial(
+        _run_single_test,
+        cmd_args=shlex.split(cmd_str),
+        work_dir=work_dir,
+        junit_xml_glob=config["junit_xml_glob"],
+        time_limit=time_limit,
+        memory_limit=memory_limit,
+        test_name=f"test_{test_id}",
+        timeline=timeline,
+        profile_path=profile_path,
+        memory_profile_path=memory_profile_path,
+    )
+    if not isolate:
+        return await run_test()
+    async with _CpuSlots.shared().slot() as cpu:
+        return await run_test(cpu=cpu)
+
+
+async def _run_single_test(
     cmd_args: list,
     work_dir: str,
     junit_xml_glob: str,
-    time_limit: int,
+    time_limit: float,
     memory_limit: int,
     test_name: str,
+    timeline: "Timeline",
+    profile_path: str | None = None,
+    memory_profile_path: str | None = None,
+    cpu: int | None = None,
 ) -> dict:
-    """Run a single test with RLIMIT_CPU and memory monitoring."""
+    """Run a single test with CPU-time and memory limits.
+
+    The process runs in its own session so limits apply to its whole tree.
+    RLIMIT_CPU (whole seconds) is a backstop; the loop's _ProcessMonitor
+    enforces the exact, possibly fractional, limit. The process is reaped
+    with os.wait4 so CPU time, max RSS and context switches come from the
+    kernel (asyncio's own subprocess support reaps with waitpid, which
+    discards them, so the process is started with Popen and watched here).
+    With a profile_path, the harness is asked (via ENGINE_PROFILE_FILE) to
+    write its profile there, and the summary is attached as "profile".
+    With a memory_profile_path (ENGINE_MEMORY_PROFILE_FILE), the test gets
+    SIGUSR1 at MEMORY_WARN_FRACTION of the memory limit; any allocation
+    report it writes is attached as "memory_profile". With a cpu, the test
+    is pinned to that CPU and the result records it as "cpu".
+    """
     memory_limit_kb = memory_limit * 1024  # Convert MB to KB for /proc comparison
+    rlimit_cpu = math.ceil(time_limit)
 
     def preexec_fn():
-        # Set CPU time limit (soft = limit, hard = limit + 1 for grace)
-        resource.setrlimit(resource.RLIMIT_CPU, (time_limit, time_limit + 1))
+        # Set CPU time limit (soft = limit rounded up, hard = soft + 1 for grace)
+        resource.setrlimit(resource.RLIMIT_CPU, (rlimit_cpu, rlimit_cpu + 1))
+        if cpu is not None:
+            os.sched_setaffinity(0, {cpu})
 
     # Remove any existing XML results before this test
     for old_xml in glob.glob(os.path.join(work_dir, junit_xml_glob)):
         os.remove(old_xml)
 
+    env = {}
+    if profile_path:
+        env["ENGINE_PROFILE_FILE"] = profile_path
+    if memory_profile_path:
+        env["ENGINE_MEMORY_PROFILE_FILE"] = memory_profile_path
+    for path in env.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    test_timing = {"name": test_name, "spawn": round(timeline.now(), 6)}
+    timeline.tests.append(test_timing)
     wall_start = time.monotonic()
 
-    try:
-        proc = subprocess.Popen(
-            cmd_args,
-            cwd=work_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            preexec_fn=preexec_fn,
-        )
-    except OSError as e:
-        return {
-            "name": test_name,
-            "verdict": "runtime_error",
-            "time_seconds": 0.0,
-            "memory_mb": 0.0,
-            "message": f"Failed to start process: {e}",
-        }
+    # stderr goes to a file rather than a pipe so the process can be reaped
+    # with os.wait4 (which reports its rusage) without a reader thread
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            proc = subprocess.Popen(
+                cmd_args,
+                cwd=work_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+                preexec_fn=preexec_fn,
+                start_new_session=True,
+                env=dict(os.environ, **env) if env else None,
+            )
+        except OSError as e:
+            return _empty_test(test_name, "runtime_error", f"Failed to start process: {e}")
+
+        # Watch memory and CPU until the process exits (or the wall-clock
+        # backstop kills it) and reap it
+        with _active_subprocess():
+            watch = await _ProcessMonitor.for_running_loop().watch(
+                proc.pid,
+                memory_limit_kb,
+                time_limit,
+                wall_timeout=time_limit + 5,
+                warn_memory_kb=memory_limit_kb * MEMORY_WARN_FRACTION if memory_profile_path else None,
+                warn_file=memory_profile_path,
+            )
+        proc.returncode = os.waitstatus_to_exitcode(watch.status)
+        rusage = watch.rusage
 
-    # Start memory monitor
-    monitor = _MemoryMonitor(proc.pid, memory_limit_kb)
-    monitor.start()
+        wall_time = time.monotonic() - wall_start
+        test_timing["exit"] = round(timeline.now(), 6)
 
-    try:
-        stdout_bytes, stderr_bytes = proc.communicate(timeout=time_limit + 5)
-    except subprocess.TimeoutExpired:
-        proc.kill()
-        stdout_bytes, stderr_bytes = proc.communicate()
+        if watch.warned and not watch.killed_for_memory:
+            # The test ended while its allocation report was being written
+            await _wait_for_file(memory_profile_path, _WARN_REPORT_GRACE_SECONDS)
+            _kill_group(proc.pid)
+
+        stderr_file.seek(0)
+        stderr_bytes = stderr_file.read()
 
-    wall_time = time.monotonic() - wall_start
+    # ru_maxrss is in KB on Linux: the largest RSS of the process or any
+    # descendant it reaped, which the /proc poll can miss between samples
+    peak_mb = max(watch.peak_mb, rusage.ru_maxrss / 1024.0)
+    cpu_time = rusage.ru_utime + rusage.ru_stime
 
-    # Stop monitor and collect results
-    monitor.stop()
-    monitor.join(timeout=1)
-    peak_mb = monitor.peak_mb
-    killed_for_memory = monitor.killed
+    test_timing["wall_seconds"] = round(wall_time, 6)
+    test_timing["cpu_user_seconds"] = round(rusage.ru_utime, 6)
+    test_timing["cpu_sys_seconds"] = round(rusage.ru_stime, 6)
 
     # Determine verdict
     verdict = _determine_verdict(
         returncode=proc.returncode,
-        killed_for_memory=killed_for_memory,
+        killed_for_memory=watch.killed_for_memory,
+        killed_for_time=watch.killed_for_time or cpu_time > time_limit,
     )
 
     # Check XML for actual test result (covers both passed and failed verdicts)
     message = ""
     if verdict in ("passed", "failed"):
+        xml_start = timeline.now()
         xml_files = glob.glob(os.path.join(work_dir, junit_xml_glob))
         if xml_files:
             parsed = parse_junit_xml(sorted(xml_files)[0])
@@ -339,6 +907,7 @@ def _run_single_test(
             # No XML produced but process returned 0 — unusual
             verdict = "failed"
             message = "No test results produced"
+        test_timing["xml_parse_seconds"] = round(timeline.now() - xml_start, 6)
 
     if verdict == "failed" and not message:
         stderr_text = stderr_bytes.decode(errors="replace") if stderr_bytes else ""
@@ -346,20 +915,57 @@ def _run_single_test(
             lines = stderr_text.strip().splitlines()
             message = lines[-1][:200] if lines else ""
 
-    return {
+    result = {
         "name": test_name,
         "verdict": verdict,
-        "time_seconds": round(wall_time, 3),
+        "time_seconds": round(cpu_time, 3),
+        "wall_seconds": round(wall_time, 3),
+        "cpu_user_seconds": round(rusage.ru_utime, 3),
+        "cpu_sys_seconds": round(rusage.ru_stime, 3),
         "memory_mb": round(peak_mb, 1),
+        "voluntary_context_switches": rusage.ru_nvcsw,
+        "involuntary_context_switches": rusage.ru_nivcsw,
         "message": message if message else None,
     }
+    if cpu is not None:
+        result["cpu"] = cpu
+    if profile_path:
+        summary = profiling.load_profile(profile_path)
+        if summary:
+            result["profile"] = summary
+    if memory_profile_path:
+        report = profiling.load_memory_profile(memory_profile_path)
+        if report:
+            result["memory_profile"] = report
+    return result
+
+
+@contextlib.contextmanager
+def _active_subprocess():
+    """Count a subprocess in the active-subprocess gauge while the block runs."""
+    metrics.ACTIVE_SUBPROCESSES.inc()
+    try:
+        yield
+    finally:
+        metrics.ACTIVE_SUBPROCESSES.dec()
+
+
+def _kill_group(pgid: int, sig: int = signal.SIGKILL):
+    """Signal a test's whole process group, ignoring groups that are gone."""
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
 
 
-def _determine_verdict(returncode: int, killed_for_memory: bool) -> str:
+def _determine_verdict(returncode: int, killed_for_memory: bool, killed_for_time: bool = False) -> str:
     """Map process exit status to a verdict string."""
     if killed_for_memory:
         return "memory_limit_exceeded"
 
+    if killed_for_time:
+        return "time_limit_exceeded"
+
     if returncode == -signal.SIGXCPU:
         return "time_limit_exceeded"
 
@@ -377,45 +983,393 @@ def _determine_verdict(returncode: int, killed_for_memory: bool) -> str:
     return "runtime_error"
 
 
-class _MemoryMonitor(threading.Thread):
-    """Polls /proc/{pid}/status for VmHWM and kills if over limit."""
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# Seconds between SIGXCPU from the CPU watchdog and the follow-up SIGKILL
+_XCPU_GRACE_SECONDS = 0.5
+
+# In memory-profile mode, a test is signalled (SIGUSR1) to report its
+# allocation sites at this fraction of its memory limit
+MEMORY_WARN_FRACTION = 0.8
+
+# Longest the engine waits for a requested allocation report: the test is
+# stopped (SIGSTOP) at its memory limit meanwhile
+_WARN_REPORT_GRACE_SECONDS = 5.0
+
+
+# Nice value for setup commands in isolation mode
+_NON_TEST_NICE = 10
+
+# How often a test waiting for a dedicated core checks for a free one
+_SLOT_POLL_SECONDS = 0.01
+
+
+class _CpuSlots:
+    """Dedicated cores for timed tests in isolation mode, shared by the whole process.
+
+    There is one slot per physical core the process may run on, using one
+    logical CPU of each (SMT siblings share caches and execution units, so
+    the sibling is left idle rather than given to another test). With more
+    than one core, the first is reserved for non-test work -- the engine or
+    server itself and setup commands -- and not used for tests. A test
+    holds its slot while it runs, which caps concurrent tests at the number
+    of slots across every run, event loop and grade worker thread.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "_CpuSlots":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(sorted(os.sched_getaffinity(0)))
+            return cls._instance
+
+    def __init__(self, allowed_cpus: list):
+        cores = _physical_cores(allowed_cpus)
+        self.reserved = set(cores[0])
+        if len(cores) > 1:
+            cores = cores[1:]
+        self.cpus = [core[0] for core in cores]
+        self._free = list(self.cpus)
+        self._lock = threading.Lock()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold a free slot for the block; yields its CPU number."""
+        while True:
+            with self._lock:
+                if self._free:
+                    cpu = self._free.pop(0)
+                    break
+            await asyncio.sleep(_SLOT_POLL_SECONDS)
+        try:
+            yield cpu
+        finally:
+            with self._lock:
+                self._free.append(cpu)
+
+
+def _physical_cores(cpus: list) -> list:
+    """Group logical CPUs into physical cores (lists of SMT siblings), in CPU order."""
+    cores = {}
+    for cpu in cpus:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = _parse_cpu_list(f.read())
+        except (OSError, ValueError):
+            siblings = {cpu}
+        cores.setdefault(min(siblings), []).append(cpu)
+    return [cores[key] for key in sorted(cores)]
+
+
+def _parse_cpu_list(text: str) -> set:
+    """Parse a kernel CPU list such as "0-3,8"."""
+    cpus = set()
+    for part in text.strip().split(","):
+        low, _, high = part.partition("-")
+        cpus.update(range(int(low), int(high or low) + 1))
+    return cpus
+
+
+def isolate_process():
+    """Move the calling process (e.g. the server) onto the reserved core(s).
+
+    Its children inherit this; tests run with isolate=True re-pin themselves
+    to their own core.
+    """
+    os.sched_setaffinity(0, _CpuSlots.shared().reserved)
+
+
+def isolation_slots() -> int:
+    """Number of tests that can run at once in isolation mode."""
+    return len(_CpuSlots.shared().cpus)
 
-    def __init__(self, pid: int, limit_kb: int):
-        super().__init__(daemon=True)
+
+def isolation_cpus() -> list:
+    """The logical CPU of each isolation slot (one per physical core, minus the reserved one)."""
+    return list(_CpuSlots.shared().cpus)
+
+
+class _Watch:
+    """One test process under a _ProcessMonitor, and what happened to it."""
+
+    def __init__(self, pid, memory_limit_kb, cpu_limit_seconds, wall_deadline, warn_memory_kb, warn_file, exited):
         self.pid = pid
-        self.limit_kb = limit_kb
+        self.memory_limit_kb = memory_limit_kb
+        self.cpu_limit_seconds = cpu_limit_seconds
+        self.wall_deadline = wall_deadline
+        self.warn_memory_kb = warn_memory_kb
+        self.warn_file = warn_file
+        self.exited = exited
         self.peak_mb = 0.0
-        self.killed = False
-        self._stop_event = threading.Event()
+        self.cpu_seconds = 0.0
+        self.killed_for_memory = False
+        self.killed_for_time = False
+        self.warned = False
+        self.warned_at = None
+        self.xcpu_sent_at = None
+        self.kill_at = None
+        self.pidfd = None
+        # Set once reaped
+        self.status = None
+        self.rusage = None
+
+    @property
+    def interval(self) -> float:
+        # Often enough to resolve sub-second limits, but no more than 10x/s otherwise
+        return max(0.01, min(0.1, self.cpu_limit_seconds / 20))
+
+
+class _ProcessMonitor:
+    """Enforces the limits of every live test process started on one event loop.
+
+    A single task polls /proc for all watched process trees each tick (at the
+    shortest interval any of them needs). It kills a process group if memory
+    exceeds its limit. If CPU time exceeds the limit it sends SIGXCPU (as
+    RLIMIT_CPU would, but without one-second granularity), then SIGKILL if
+    the group is still alive after a grace period; a wall-clock deadline is
+    the last backstop. Exits are noticed through a pidfd registered with the
+    loop (or, without pidfd support, on the next tick) and reaped with
+    os.wait4.
+
+    With warn_memory_kb, the root process gets SIGUSR1 the first time memory
+    crosses it, and from then on only the root's memory counts (the harness
+    reports from a forked process that must not be charged to the test). If
+    the test reaches the limit before warn_file exists, it is stopped with
+    SIGSTOP and killed once the file appears or _WARN_REPORT_GRACE_SECONDS
+    after the warning.
+    """
+
+    _by_loop = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def for_running_loop(cls) -> "_ProcessMonitor":
+        loop = asyncio.get_running_loop()
+        monitor = cls._by_loop.get(loop)
+        if monitor is None:
+            monitor = cls._by_loop[loop] = cls(loop)
+        return monitor
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._watches = {}
+        self._task = None
+
+    async def watch(
+        self,
+        pid: int,
+        memory_limit_kb: int,
+        cpu_limit_seconds: float,
+        wall_timeout: float,
+        warn_memory_kb: float | None = None,
+        warn_file: str | None = None,
+    ) -> _Watch:
+        """Watch pid until it exits; returns its _Watch with status and rusage set."""
+        watch = _Watch(
+            pid,
+            memory_limit_kb,
+            cpu_limit_seconds,
+            time.monotonic() + wall_timeout,
+            warn_memory_kb,
+            warn_file,
+            self._loop.create_future(),
+        )
+        self._watches[pid] = watch
+        try:
+            watch.pidfd = os.pidfd_open(pid)
+            self._loop.add_reader(watch.pidfd, self._try_reap, watch)
+        except (AttributeError, OSError):
+            # No pidfd support: the polling task checks for exits instead
+            watch.pidfd = None
+        if self._task is None:
+            self._task = self._loop.create_task(self._run())
 
-    def run(self):
-        status_path = f"/proc/{self.pid}/status"
-        while not self._stop_event.is_set():
+        try:
+            await watch.exited
+        finally:
+            if watch.status is None:
+                # Cancelled: kill the test; the watch stays until it is reaped
+                _kill_group(pid)
+        return watch
+
+    async def _run(self):
+        try:
+            while self._watches:
+                now = time.monotonic()
+                for watch in list(self._watches.values()):
+                    if watch.pidfd is None and self._try_reap(watch):
+                        continue
+                    self._check(watch, now)
+                await asyncio.sleep(min((w.interval for w in self._watches.values()), default=0))
+        finally:
+            self._task = None
+
+    def _check(self, watch: _Watch, now: float):
+        if watch.kill_at is not None:
+            # Stopped at the memory limit, waiting for its allocation report
+            if now >= watch.kill_at or os.path.exists(watch.warn_file):
+                _kill_group(watch.pid)
+                watch.kill_at = None
+            return
+
+        if now >= watch.wall_deadline:
+            _kill_group(watch.pid)
+            return
+
+        try:
+            memory_kb, cpu_ticks = _sample_process_tree(watch.pid, descendants=not watch.warned)
+        except OSError:
+            # Exited; reaped when its pidfd becomes readable
+            return
+
+        watch.peak_mb = max(watch.peak_mb, memory_kb / 1024.0)
+        watch.cpu_seconds = cpu_ticks / _CLOCK_TICKS
+
+        if watch.warn_memory_kb is not None and not watch.warned and memory_kb > watch.warn_memory_kb:
+            watch.warned = True
+            watch.warned_at = now
             try:
-                with open(status_path) as f:
-                    for line in f:
-                        if line.startswith("VmHWM:"):
-                            hwm_kb = int(line.split()[1])
-                            hwm_mb = hwm_kb / 1024.0
-                            if hwm_mb > self.peak_mb:
-                                self.peak_mb = hwm_mb
-                            if hwm_kb > self.limit_kb:
-                                self.killed = True
-                                try:
-                                    os.kill(self.pid, signal.SIGKILL)
-                                except ProcessLookupError:
-                                    pass
-                                return
-                            break
-            except (FileNotFoundError, ProcessLookupError):
-                # Process already exited
+                os.kill(watch.pid, signal.SIGUSR1)
+            except ProcessLookupError:
                 return
-            except (PermissionError, OSError):
-                return
-            self._stop_event.wait(0.1)
 
-    def stop(self):
-        self._stop_event.set()
+        if memory_kb > watch.memory_limit_kb and not watch.killed_for_memory:
+            watch.killed_for_memory = True
+            if watch.warned and not os.path.exists(watch.warn_file):
+                # Freeze the test (not its report process) until the report is written
+                try:
+                    os.kill(watch.pid, signal.SIGSTOP)
+                except ProcessLookupError:
+                    pass
+                watch.kill_at = watch.warned_at + _WARN_REPORT_GRACE_SECONDS
+            else:
+                _kill_group(watch.pid)
+            return
+
+        if watch.xcpu_sent_at is None and watch.cpu_seconds > watch.cpu_limit_seconds:
+            watch.killed_for_time = True
+            watch.xcpu_sent_at = now
+            _kill_group(watch.pid, signal.SIGXCPU)
+        elif watch.xcpu_sent_at is not None and now - watch.xcpu_sent_at > _XCPU_GRACE_SECONDS:
+            _kill_group(watch.pid)
+
+    def _try_reap(self, watch: _Watch) -> bool:
+        try:
+            pid, status, rusage = os.wait4(watch.pid, os.WNOHANG)
+        except ChildProcessError:
+            # Reaped elsewhere, e.g. by subprocess's cleanup of a Popen
+            # abandoned after its watch was cancelled. Its status is lost,
+            # but it is gone: stop watching (its pidfd stays readable)
+            self._forget(watch)
+            if not watch.exited.done():
+                watch.exited.set_exception(ChildProcessError(f"Test process {watch.pid} was reaped elsewhere"))
+            return True
+        if pid == 0:
+            return False
+        watch.status = status
+        watch.rusage = rusage
+        self._forget(watch)
+        if not watch.exited.done():
+            watch.exited.set_result(None)
+        return True
+
+    def _forget(self, watch: _Watch):
+        self._watches.pop(watch.pid, None)
+        if watch.pidfd is not None:
+            self._loop.remove_reader(watch.pidfd)
+            os.close(watch.pidfd)
+            watch.pidfd = None
+
+
+async def _wait_for_file(path: str, timeout: float) -> bool:
+    """Poll for path to exist for up to timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.02)
+    return True
+
+
+def _sample_process_tree(root_pid: int, descendants: bool = True) -> tuple:
+    """Return (memory_kb, cpu_ticks) for root_pid and its live descendants.
+
+    Memory is the root's VmHWM plus the current VmRSS of each descendant
+    (e.g. the JVM surefire forks under Maven). CPU ticks include each
+    process's reaped children, so finished helpers are not lost.
+    With descendants=False only the root is sampled.
+    Raises FileNotFoundError once the root process is gone.
+    """
+    memory_kb = 0
+    cpu_ticks = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        is_root = pid == root_pid
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Fields after the parenthesised command name; utime is field 14
+                fields = f.read().rpartition(")")[2].split()
+            cpu_ticks += sum(int(v) for v in fields[11:15])
+
+            with open(f"/proc/{pid}/status") as f:
+                wanted = "VmHWM:" if is_root else "VmRSS:"
+                for line in f:
+                    if line.startswith(wanted):
+                        memory_kb += int(line.split()[1])
+                        break
+
+            tids = os.listdir(f"/proc/{pid}/task")
+        except (FileNotFoundError, ProcessLookupError):
+            if is_root:
+                raise
+            continue
+
+        if not descendants:
+            break
+        for tid in tids:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+            except (FileNotFoundError, ProcessLookupError):
+                # Thread or process exited mid-scan
+                continue
+    return memory_kb, cpu_ticks
+
+
+class Timeline:
+    """Monotonic timestamps for the phases of one run, relative to its start."""
+
+    def __init__(self):
+        self._origin = time.monotonic()
+        self.phases = []
+        self.tests = []
+
+    def now(self) -> float:
+        return time.monotonic() - self._origin
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = self.now()
+        try:
+            yield
+        finally:
+            end = self.now()
+            self.phases.append({
+                "name": name,
+                "start": round(start, 6),
+                "end": round(end, 6),
+                "seconds": round(end - start, 6),
+            })
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": self.phases,
+            "tests": self.tests,
+            "total_seconds": round(self.now(), 6),
+        }
 
 
 def _empty_summary() -> dict:
@@ -423,6 +1377,7 @@ def _empty_summary() -> dict:
         "total": 0,
         "passed": 0,
         "failed": 0,
+        "skipped": 0,
         "errors": 0,
         "time_seconds": 0.0,
     }
@@ -0,0 +1,121 @@
+"""Stress tiers: run a solution over generated tiers and report its scaling curve.
+
+Tiers are generated per problem (e.g. problems/equivalent-resistance/
+generate_tiers.py) into problems/<problem>/tiers/<name>.json. Each tier holds
+cases at one point of a parameter grid (its "params"). Running a solution
+across tiers in grid order shows where its CPU time and peak memory cross the
+problem's limits.
+"""
+
+import json
+import os
+
+from . import runner
+
+
+def list_tiers(problem: str, problems_dir: str | None = None) -> list:
+    """Tier names for a problem, ordered by their params (the scaling grid)."""
+    tiers_dir = os.path.join(runner.resolve_problems_dir(problems_dir), problem, runner.TIERS_DIR)
+    if not os.path.isdir(tiers_dir):
+        return []
+
+    tiers = []
+    for name in os.listdir(tiers_dir):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(tiers_dir, name)) as f:
+            params = json.load(f).get("params", {})
+        tiers.append((tuple(params.values()), name[:-len(".json")]))
+    return [name for _, name in sorted(tiers)]
+
+
+def run_scale(
+    problem: str,
+    language: str,
+    solution_code: str,
+    tiers: list | None = None,
+    timeout: int = 120,
+    problems_dir: str | None = None,
+    on_tier=None,
+) -> list:
+    """Run a solution on each tier (default: all, in grid order).
+
+    Args:
+        on_tier: Optional callback invoked with each tier's row as it finishes
+
+    Returns:
+        One row per tier: params, pass counts, verdict counts, max CPU time
+        and peak memory, and the tier's limits
+    """
+    rows = []
+    for tier in tiers or list_tiers(problem, problems_dir):
+        result = runner.run_solution(
+            problem,
+            language,
+            solution_code,
+            timeout=timeout,
+            problems_dir=problems_dir,
+            tier=tier,
+        )
+        row = _tier_row(problem, language, tier, result, problems_dir)
+        rows.append(row)
+        if on_tier:
+            on_tier(row)
+    return rows
+
+
+def crossings(rows: list) -> dict:
+    """First tier whose tests exceed the time limit / memory limit.
+
+    Returns {"time": tier_or_None, "memory": tier_or_None}.
+    """
+    first = {"time": None, "memory": None}
+    for row in rows:
+        verdicts = row["verdicts"]
+        if first["time"] is None and verdicts.get("time_limit_exceeded"):
+            first["time"] = row["tier"]
+        if first["memory"] is None and verdicts.get("memory_limit_exceeded"):
+            first["memory"] = row["tier"]
+    return first
+
+
+def format_curve(rows: list) -> str:
+    header = (
+        f"{'TIER':<12} {'PARAMS':<28} {'PASSED':>7}"
+        f"  {'MAX CPU (s)':>16}  {'PEAK MEM (MB)':>16}  VERDICTS"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        if row["status"] != "completed":
+            lines.append(f"{row['tier']:<12} {params:<28} {row['status']}")
+            continue
+        time_col = f"{row['max_time_seconds']:.2f}/{row['time_limit']}"
+        mem_col = f"{row['max_memory_mb']:.0f}/{row['memory_limit']}"
+        verdicts = ", ".join(f"{v} {n}" for v, n in sorted(row["verdicts"].items()) if v != "passed")
+        lines.append(
+            f"{row['tier']:<12} {params:<28} {row['passed']:>3}/{row['total']:<3}"
+            f"  {time_col:>16}  {mem_col:>16}  {verdicts}"
+        )
+    return "\n".join(lines)
+
+
+def _tier_row(problem: str, language: str, tier: str, result: dict, problems_dir: str | None) -> dict:
+    harness, _ = runner.load_harness(problem, language, problems_dir, tier=tier)
+    tests = result["tests"]
+    verdicts = {}
+    for test in tests:
+        verdicts[test["verdict"]] = verdicts.get(test["verdict"], 0) + 1
+
+    return {
+        "tier": tier,
+        "params": harness["testcases"].get("params", {}) if harness else {},
+        "status": result["status"],
+        "passed": result["summary"]["passed"],
+        "total": result["summary"]["total"],
+        "verdicts": verdicts,
+        "max_time_seconds": max((t["time_seconds"] for t in tests), default=0.0),
+        "max_memory_mb": max((t["memory_mb"] for t in tests), default=0.0),
+        "time_limit": harness["time_limit"] if harness else None,
+        "memory_limit": harness["memory_limit"] if harness else None,
+    }
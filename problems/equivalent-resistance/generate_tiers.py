@@ -0,0 +1,151 @@
+"""Generate stress tiers for equivalent-resistance.
+
+A tier is one (base set size, maxResistors) point of the scaling grid. Each
+tier file holds cases of every target type -- exact (a random configuration's
+value), random (log-uniform over the reachable range), 0 and MAX -- with
+expected values computed offline by the reference solver in
+problems/equivalent-resistance/tools/reference.py. Tier files use the
+testcases.json test schema and are written to tiers/<name>.json, where the
+engine runs them with `python -m engine scale` or `engine run --tier`.
+
+Usage:
+    python problems/equivalent-resistance/generate_tiers.py
+    python problems/equivalent-resistance/generate_tiers.py --base-sizes 4 16 --max-resistors 4 5 6
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+PROBLEM_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(PROBLEM_DIR))
+sys.path[:0] = [
+    os.path.join(PROBLEM_DIR, "languages", "python"),
+    os.path.join(PROBLEM_DIR, "tools"),
+]
+
+from reference import Levels  # noqa: E402
+from resistor_utils import base_scf, combine_scf, evaluate_config  # noqa: E402
+
+TIERS_DIR = os.path.join(PROBLEM_DIR, "tiers")
+
+# (base set size, maxResistors) grid; each row grows maxResistors until the
+# reference solver itself needs more than a few seconds per tier
+DEFAULT_TIERS = (
+    (1, 4), (1, 8), (1, 12),
+    (4, 4), (4, 5), (4, 6), (4, 7),
+    (16, 4), (16, 5), (16, 6),
+    (64, 3), (64, 4), (64, 5),
+)
+
+# E24 preferred values, repeated over decades 1 ohm .. 1 Mohm
+_E24 = (
+    1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+    3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1,
+)
+_DECADES = 7
+
+
+def tier_name(base_size: int, max_resistors: int) -> str:
+    return f"b{base_size}-m{max_resistors}"
+
+
+def base_set(size: int) -> list:
+    """`size` resistor values spread evenly (in log scale) over the E24 decades."""
+    values = [round(v * 10 ** d, 6) for d in range(_DECADES) for v in _E24]
+    if size >= len(values):
+        return values
+    step = len(values) / size
+    return [values[int(i * step + step / 2)] for i in range(size)]
+
+
+def generate_tier(base_size: int, max_resistors: int, cases_per_kind: int, rng: random.Random) -> dict:
+    base_resistances = base_set(base_size)
+    levels = Levels(base_resistances, max_resistors)
+    low = levels.best(0)[0]
+    high = levels.best(float("inf"))[0]
+
+    targets = []
+    for _ in range(cases_per_kind):
+        config = _random_config(len(base_resistances), max_resistors, rng)
+        targets.append(("exact", {"type": "evaluateConfig", "config": config}))
+    for _ in range(cases_per_kind):
+        targets.append(("random", round(math.exp(rng.uniform(math.log(low), math.log(high))), 6)))
+    targets.append(("zero", 0))
+    targets.append(("max", "MAX"))
+
+    tests = []
+    for test_id, (kind, target) in enumerate(targets, start=1):
+        if isinstance(target, dict):
+            goal = evaluate_config(target["config"], base_resistances)
+        elif target == "MAX":
+            goal = float("inf")
+        else:
+            goal = target
+        value, ref, count = levels.best(goal)
+        tests.append({
+            "id": test_id,
+            "kind": kind,
+            "baseResistances": base_resistances,
+            "targetResistance": target,
+            "maxResistors": max_resistors,
+            "expectedResistance": value,
+            "expectedResistors": count,
+            "referenceConfig": levels.scf(ref),
+        })
+
+    return {
+        "tier": tier_name(base_size, max_resistors),
+        "params": {"base_size": base_size, "max_resistors": max_resistors},
+        "tests": tests,
+    }
+
+
+def _random_config(base_count: int, max_resistors: int, rng: random.Random) -> str:
+    """A random series-parallel configuration of 1..max_resistors resistors."""
+    def build(n):
+        if n == 1:
+            return base_scf(rng.randrange(base_count))
+        left = rng.randint(1, n - 1)
+        return combine_scf(build(left), build(n - left), rng.choice(("+", "//")))
+
+    return build(rng.randint(max(1, max_resistors // 2), max_resistors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate equivalent-resistance stress tiers")
+    parser.add_argument("--base-sizes", type=int, nargs="+", help="Base set sizes (with --max-resistors: full grid)")
+    parser.add_argument("--max-resistors", type=int, nargs="+", help="maxResistors values")
+    parser.add_argument("--cases", type=int, default=2, help="Exact and random cases per tier (default: 2 each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output-dir", default=TIERS_DIR)
+    args = parser.parse_args()
+
+    if args.base_sizes or args.max_resistors:
+        grid = [
+            (b, m)
+            for b in args.base_sizes or sorted({b for b, _ in DEFAULT_TIERS})
+            for m in args.max_resistors or sorted({m for _, m in DEFAULT_TIERS})
+        ]
+    else:
+        grid = DEFAULT_TIERS
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for base_size, max_resistors in grid:
+        # Seed per tier so regenerating one tier reproduces it exactly
+        rng = random.Random(f"{args.seed}-{base_size}-{max_resistors}")
+        start = time.monotonic()
+        tier = generate_tier(base_size, max_resistors, args.cases, rng)
+        path = os.path.join(args.output_dir, f"{tier['tier']}.json")
+        with open(path, "w") as f:
+            json.dump(tier, f, indent=2)
+            f.write("\n")
+        print(f"{tier['tier']:<10} {len(tier['tests'])} cases  ({time.monotonic() - start:.1f}s)  {path}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
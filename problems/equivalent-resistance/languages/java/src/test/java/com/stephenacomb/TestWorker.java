@@ -0,0 +1,240 @@
+package com.stephenacomb;
+
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.lang.management.ThreadMXBean;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Locale;
+
+import org.junit.runner.JUnitCore;
+import org.junit.runner.Request;
+import org.junit.runner.Result;
+import org.junit.runner.notification.Failure;
+
+/**
+ * Long-lived test runner for the engine's warm JVM mode (engine/jvm_pool.py).
+ *
+ * Reads one request per line on stdin, tab-separated:
+ *
+ *   classes dir, test classes dir, Class#method, CPU limit in seconds
+ *
+ * and answers each with one JSON line on stdout. The test runs on its own
+ * thread, with the solution and test classes loaded from the given dirs by a
+ * fresh class loader, so no static state survives from one test to the next.
+ * CPU time is the test thread's own (ThreadMXBean): JVM startup, JIT and GC
+ * threads are not charged to the test. Heap is the sum of the heap pools'
+ * peak usage over the test. After a time or memory limit breach the worker
+ * answers and exits, since the test thread cannot be stopped safely; the
+ * engine starts a replacement.
+ */
+public class TestWorker {
+
+	private static final long POLL_MILLIS = 5;
+
+	public static void main(String[] args) throws IOException {
+		// Keep test output off the result stream
+		PrintStream results = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+		System.setOut(System.err);
+
+		BufferedReader requests = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+		results.println("{\"ready\": true}");
+		String line;
+		while ((line = requests.readLine()) != null) {
+			if (line.isEmpty())
+				continue;
+			String[] fields = line.split("\t");
+			Outcome outcome = run(fields[0], fields[1], fields[2], Double.parseDouble(fields[3]));
+			results.println(outcome.toJson());
+			if (outcome.recycle)
+				Runtime.getRuntime().halt(0);
+		}
+	}
+
+	private static Outcome run(String classesDir, String testClassesDir, String test, double cpuLimit)
+			throws IOException {
+		int hash = test.indexOf('#');
+		String className = test.substring(0, hash);
+		String methodName = test.substring(hash + 1);
+		IsolatingClassLoader loader = new IsolatingClassLoader(new URL[] {
+				Paths.get(testClassesDir).toUri().toURL(),
+				Paths.get(classesDir).toUri().toURL(),
+		});
+		Outcome outcome = new Outcome();
+		ThreadMXBean threads = ManagementFactory.getThreadMXBean();
+
+		// Start from a collected heap so the peak is this test's
+		List<MemoryPoolMXBean> heapPools = heapPools();
+		System.gc();
+		for (MemoryPoolMXBean pool : heapPools)
+			pool.resetPeakUsage();
+
+		Thread thread = new Thread(() -> {
+			long[] switchesBefore = contextSwitches();
+			long cpuBefore = threads.getCurrentThreadCpuTime();
+			long userBefore = threads.getCurrentThreadUserTime();
+			try {
+				Class<?> testClass = Class.forName(className, true, loader);
+				outcome.record(new JUnitCore().run(Request.method(testClass, methodName)));
+			} catch (Throwable t) {
+				outcome.record(t);
+			}
+			outcome.cpuNanos = threads.getCurrentThreadCpuTime() - cpuBefore;
+			outcome.userNanos = threads.getCurrentThreadUserTime() - userBefore;
+			long[] switchesAfter = contextSwitches();
+			outcome.voluntarySwitches = switchesAfter[0] - switchesBefore[0];
+			outcome.involuntarySwitches = switchesAfter[1] - switchesBefore[1];
+		}, "engine-test");
+		thread.setContextClassLoader(loader);
+		thread.setDaemon(true);
+
+		long cpuLimitNanos = (long) (cpuLimit * 1e9);
+		long start = System.nanoTime();
+		thread.start();
+		try {
+			while (thread.isAlive()) {
+				thread.join(POLL_MILLIS);
+				long cpu = threads.getThreadCpuTime(thread.getId());
+				if (cpu > cpuLimitNanos) {
+					outcome.verdict = "time_limit_exceeded";
+					outcome.cpuNanos = cpu;
+					outcome.userNanos = threads.getThreadUserTime(thread.getId());
+					outcome.recycle = true;
+					break;
+				}
+			}
+		} catch (InterruptedException e) {
+			Thread.currentThread().interrupt();
+		}
+		outcome.wallNanos = System.nanoTime() - start;
+
+		long heapPeak = 0;
+		for (MemoryPoolMXBean pool : heapPools)
+			heapPeak += pool.getPeakUsage().getUsed();
+		outcome.heapPeakBytes = heapPeak;
+		if (!outcome.recycle)
+			loader.close();
+		return outcome;
+	}
+
+	private static List<MemoryPoolMXBean> heapPools() {
+		List<MemoryPoolMXBean> pools = new ArrayList<>();
+		for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans())
+			if (pool.getType() == MemoryType.HEAP)
+				pools.add(pool);
+		return pools;
+	}
+
+	/** Voluntary and involuntary context switches of the calling thread (Linux). */
+	private static long[] contextSwitches() {
+		long[] switches = new long[2];
+		try {
+			for (String line : Files.readAllLines(Paths.get("/proc/thread-self/status"))) {
+				if (line.startsWith("voluntary_ctxt_switches:"))
+					switches[0] = Long.parseLong(line.substring(line.indexOf(':') + 1).trim());
+				else if (line.startsWith("nonvoluntary_ctxt_switches:"))
+					switches[1] = Long.parseLong(line.substring(line.indexOf(':') + 1).trim());
+			}
+		} catch (IOException | RuntimeException e) {
+			// Not Linux: report zeros
+		}
+		return switches;
+	}
+
+	/** Loads this package's classes itself (except the worker) instead of delegating. */
+	private static class IsolatingClassLoader extends URLClassLoader {
+
+		private static final String PACKAGE = TestWorker.class.getPackage().getName() + ".";
+
+		IsolatingClassLoader(URL[] urls) {
+			super(urls, TestWorker.class.getClassLoader());
+		}
+
+		@Override
+		protected Class<?> loadClass(String name, boolean resolve) throws ClassNotFoundException {
+			synchronized (getClassLoadingLock(name)) {
+				Class<?> loaded = findLoadedClass(name);
+				if (loaded == null && name.startsWith(PACKAGE) && !name.startsWith(TestWorker.class.getName())) {
+					try {
+						loaded = findClass(name);
+					} catch (ClassNotFoundException e) {
+						// Not in the test's dirs: fall back to the worker's class path
+					}
+				}
+				if (loaded == null)
+					return super.loadClass(name, resolve);
+				if (resolve)
+					resolveClass(loaded);
+				return loaded;
+			}
+		}
+	}
+
+	private static class Outcome {
+		volatile String verdict = "passed";
+		volatile String message;
+		volatile boolean recycle;
+		volatile long cpuNanos;
+		volatile long userNanos;
+		volatile long wallNanos;
+		volatile long heapPeakBytes;
+		volatile long voluntarySwitches;
+		volatile long involuntarySwitches;
+
+		void record(Result result) {
+			if (result.wasSuccessful())
+				return;
+			Failure failure = result.getFailures().get(0);
+			if (failure.getException() instanceof OutOfMemoryError) {
+				record(failure.getException());
+				return;
+			}
+			verdict = "failed";
+			message = failure.getMessage() != null ? failure.getMessage() : failure.getException().toString();
+		}
+
+		void record(Throwable t) {
+			if (t instanceof OutOfMemoryError) {
+				verdict = "memory_limit_exceeded";
+				recycle = true;
+			} else {
+				verdict = "failed";
+			}
+			message = t.toString();
+		}
+
+		String toJson() {
+			return String.format(Locale.ROOT,
+					"{\"verdict\": %s, \"message\": %s, \"cpu_seconds\": %.6f, \"cpu_user_seconds\": %.6f, "
+							+ "\"wall_seconds\": %.6f, \"heap_peak_mb\": %.3f, \"voluntary_context_switches\": %d, "
+							+ "\"involuntary_context_switches\": %d, \"recycle\": %b}",
+					quote(verdict), message == null ? "null" : quote(message), cpuNanos / 1e9, userNanos / 1e9,
+					wallNanos / 1e9, heapPeakBytes / 1048576.0, voluntarySwitches, involuntarySwitches, recycle);
+		}
+
+		private static String quote(String s) {
+			StringBuilder out = new StringBuilder("\"");
+			for (char c : s.toCharArray()) {
+				if (c == '"' || c == '\\')
+					out.append('\\').append(c);
+				else if (c < 0x20)
+					out.append(String.format("\\u%04x", (int) c));
+				else
+					out.append(c);
+			}
+			return out.append('"').toString();
+		}
+	}
+}
@@ -0,0 +1,219 @@
+import json
+import os
+import signal
+import tracemalloc
+
+import pytest
+
+# Diagnostics for the engine's profile modes; both are inactive unless the
+# engine sets their environment variable.
+#
+# CPU (`engine run --profile`, ENGINE_PROFILE_FILE): each test's call phase is
+# sampled on a CPU-time timer (ITIMER_PROF), and the collapsed stacks are
+# written to that file when the test ends -- or on SIGXCPU, when the engine's
+# CPU watchdog stops it, so time-limited tests are profiled too.
+#
+# Memory (`engine run --memory-profile`, ENGINE_MEMORY_PROFILE_FILE): the call
+# phase runs under tracemalloc. When the engine sees the test near its memory
+# limit it sends SIGUSR1, and the top allocation sites are written to that
+# file before the engine kills the test at the limit. A snapshot needs about
+# as much memory again as the traced heap, so it is taken in a detached
+# copy-on-write fork that the engine does not charge to the test.
+
+PROFILE_FILE = os.environ.get("ENGINE_PROFILE_FILE")
+INTERVAL_SECONDS = float(os.environ.get("ENGINE_PROFILE_INTERVAL", "0.005"))
+MEMORY_PROFILE_FILE = os.environ.get("ENGINE_MEMORY_PROFILE_FILE")
+TRACEMALLOC_FRAMES = 8
+TOP_SITES = 15
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if MEMORY_PROFILE_FILE:
+    # Outside a test's call phase the warning has nothing to report
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+
+class _Sampler:
+    def __init__(self, test):
+        self.test = test
+        self.stacks = {}
+        self.samples = 0
+
+    def start(self):
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.signal(signal.SIGXCPU, self._on_xcpu)
+        signal.setitimer(signal.ITIMER_PROF, INTERVAL_SECONDS, INTERVAL_SECONDS)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_IGN)
+
+    def write(self, complete=True):
+        with open(PROFILE_FILE, "w") as f:
+            json.dump({
+                "test": self.test,
+                "interval_seconds": INTERVAL_SECONDS,
+                "samples": self.samples,
+                "complete": complete,
+                "stacks": self.stacks,
+            }, f)
+
+    def _sample(self, signum, frame):
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        # Drop pytest's own frames above the first harness/solution frame
+        start = next(
+            (i for i, f in enumerate(frames) if f.f_code.co_filename.startswith(HARNESS_DIR)),
+            0,
+        )
+        stack = ";".join(_label(f.f_code) for f in frames[start:])
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def _on_xcpu(self, signum, frame):
+        self.stop()
+        self.write(complete=False)
+        # Die from SIGXCPU as the process would have without the profiler
+        signal.signal(signal.SIGXCPU, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGXCPU)
+
+
+class _AllocationTracer:
+    def __init__(self, test):
+        self.test = test
+
+    def start(self):
+        signal.signal(signal.SIGUSR1, self._on_warning)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def stop(self):
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        tracemalloc.stop()
+
+    def _on_warning(self, signum, frame):
+        # Double fork: the test waits only for the intermediate child, and
+        # the grandchild that builds the report is reparented away from it
+        pid = os.fork()
+        if pid:
+            os.waitpid(pid, 0)
+            return
+        if os.fork():
+            os._exit(0)
+        try:
+            self._write_report()
+        finally:
+            os._exit(0)
+
+    def _write_report(self):
+        # Group the traces -- (size, frames), frames most recent first -- by
+        # their frames in one pass
+        traces = _traces()
+        traced, peak = tracemalloc.get_traced_memory()
+        overhead = tracemalloc.get_tracemalloc_memory()
+        tracemalloc.stop()
+
+        by_traceback = {}
+        for size, frames in traces:
+            entry = by_traceback.get(frames)
+            if entry is None:
+                by_traceback[frames] = [size, 1]
+            else:
+                entry[0] += size
+                entry[1] += 1
+        del traces
+
+        by_line = {}
+        for frames, (size, count) in list(by_traceback.items()):
+            if not frames or frames[0][0] in _IGNORED_FILES:
+                del by_traceback[frames]
+                continue
+            entry = by_line.setdefault(frames[0], [0, 0])
+            entry[0] += size
+            entry[1] += count
+
+        def top(groups, n):
+            return sorted(groups.items(), key=lambda item: -item[1][0])[:n]
+
+        report = {
+            "test": self.test,
+            "traced_mb": round(traced / 2**20, 1),
+            "traced_peak_mb": round(peak / 2**20, 1),
+            "tracemalloc_overhead_mb": round(overhead / 2**20, 1),
+            "sites": [_site(size, count, [line]) for line, (size, count) in top(by_line, TOP_SITES)],
+            "tracebacks": [
+                _site(size, count, _own_frames(frames[::-1]))
+                for frames, (size, count) in top(by_traceback, 5)
+            ],
+        }
+        # Write then rename so the engine never reads a partial report
+        with open(MEMORY_PROFILE_FILE + ".tmp", "w") as f:
+            json.dump(report, f)
+        os.replace(MEMORY_PROFILE_FILE + ".tmp", MEMORY_PROFILE_FILE)
+
+
+def _traces():
+    """Every traced allocation as (size, frames), frames most recent first.
+
+    Uses tracemalloc._get_traces(), the CPython-private call behind
+    take_snapshot(): it returns plain tuples, while a Snapshot wraps each
+    trace in Trace / Traceback / Frame objects, which takes minutes on the
+    heaps that get near a memory limit. If the private call is missing or
+    its tuples change shape, falls back to the public snapshot.
+    """
+    get_traces = getattr(tracemalloc, "_get_traces", None)
+    try:
+        raw = get_traces() if get_traces is not None else None
+    except Exception:
+        raw = None
+    # (domain, size, frames, total_nframe), frames as (filename, lineno) tuples
+    if isinstance(raw, list) and all(
+        isinstance(t, tuple) and len(t) >= 3 and isinstance(t[1], int) and isinstance(t[2], tuple)
+        for t in raw[:1]
+    ):
+        return ((t[1], t[2]) for t in raw)
+    snapshot = tracemalloc.take_snapshot()
+    return (
+        (trace.size, tuple((frame.filename, frame.lineno) for frame in reversed(trace.traceback)))
+        for trace in snapshot.traces
+    )
+
+
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def _site(size, count, frames):
+    return {
+        "size_mb": round(size / 2**20, 2),
+        "count": count,
+        "frames": [f"{os.path.basename(filename)}:{lineno}" for filename, lineno in frames],
+    }
+
+
+def _own_frames(frames):
+    """Harness and solution frames, oldest first (all of them if none are)."""
+    own = [f for f in frames if f[0].startswith(HARNESS_DIR)]
+    return own or list(frames)
+
+
+def _label(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    sampler = _Sampler(item.nodeid) if PROFILE_FILE else None
+    tracer = _AllocationTracer(item.nodeid) if MEMORY_PROFILE_FILE else None
+    if tracer:
+        tracer.start()
+    if sampler:
+        sampler.start()
+    try:
+        yield
+    finally:
+        if sampler:
+            sampler.stop()
+            sampler.write()
+        if tracer:
+            tracer.stop()
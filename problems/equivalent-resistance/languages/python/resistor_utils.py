@@ -39,6 +39,174 @@ def evaluate_config(configuration, base_resistances):
     return -1
 
 
+class Config:
+    """A configuration node: a base resistor or two child nodes combined.
+
+    Nodes are immutable and share their children, so building a candidate
+    from two existing ones costs one small object instead of copying both
+    SCF strings. The value is computed once on construction; the SCF string
+    is only built when scf() (or str()) is called, then cached on the node.
+    A base node has no op and keeps its base index in left.
+    """
+
+    __slots__ = ("value", "op", "left", "right", "_scf")
+
+    def __init__(self, value, op=None, left=None, right=None):
+        self.value = value
+        self.op = op
+        self.left = left
+        self.right = right
+        self._scf = None
+
+    @property
+    def size(self):
+        """Number of base resistors in the configuration."""
+        if self.op is None:
+            return 1
+        return self.left.size + self.right.size
+
+    def scf(self):
+        if self._scf is None:
+            if self.op is None:
+                self._scf = base_scf(self.left)
+            else:
+                self._scf = combine_scf(self.left.scf(), self.right.scf(), self.op)
+        return self._scf
+
+    def __str__(self):
+        return self.scf()
+
+    def __repr__(self):
+        return f"Config({self.scf()!r}, value={self.value!r})"
+
+
+def base_config(index, base_resistances):
+    return Config(base_resistances[index], left=index)
+
+
+def combine_config(left, right, op):
+    return Config(_FUNCTIONS[op](left.value, right.value), op, left, right)
+
+
+def parse_config(configuration, base_resistances):
+    """Parse an SCF string into Config nodes (the inverse of Config.scf)."""
+    if configuration[0] != "(":
+        return base_config(int(configuration), base_resistances)
+
+    parentheses = 1
+    for i in range(1, len(configuration)):
+        if configuration[i] == "(":
+            parentheses += 1
+        elif configuration[i] == ")":
+            parentheses -= 1
+        if parentheses == 0:
+            start, end = _get_splits(configuration[i:])
+            if start == -1:
+                return parse_config(configuration[1:i], base_resistances)
+            op = configuration[i + start : i + end]
+            left = parse_config(configuration[1:i], base_resistances)
+            right = parse_config(
+                configuration[i + end + 1 : len(configuration) - 1],
+                base_resistances,
+            )
+            return combine_config(left, right, op)
+
+    raise ValueError(f"Invalid SCF string: {configuration!r}")
+
+
+class LevelBounds:
+    """Bounds on the values reachable with exactly n resistors, n = 1..max_resistors.
+
+    With base values between lo and hi, n resistors reach at least lo / n
+    (n copies of lo in parallel) and at most n * hi (n copies of hi in
+    series); both ends are reached, and no smaller count reaches them.
+    Every configuration of n >= 2 resistors joins an i- and a j-resistor
+    part (i + j = n) in series or in parallel, so its value is either at
+    most hi * i * j / n (parallel) or at least lo * n / (i * j) (series).
+    The most balanced split gives the loosest of these, and when hi is
+    close to lo they leave a gap no n-resistor value falls in (gaps[n]).
+    """
+
+    # Relative widening of computed ranges, so float rounding in a
+    # configuration's value never puts it outside its bounds
+    _SLACK = 1e-9
+
+    def __init__(self, base_resistances, max_resistors):
+        self.max_resistors = max_resistors
+        self._base_resistances = base_resistances
+        self.smallest = min(range(len(base_resistances)), key=base_resistances.__getitem__)
+        self.largest = max(range(len(base_resistances)), key=base_resistances.__getitem__)
+        self._lo = base_resistances[self.smallest]
+        self._hi = base_resistances[self.largest]
+        # Index n: the smallest / largest n-resistor value (index 0 unused)
+        self.low = [0.0] + [self._lo / n for n in range(1, max_resistors + 1)]
+        self.high = [0.0] + [self._hi * n for n in range(1, max_resistors + 1)]
+        # Index n: (above, below) with no n-resistor value strictly between, or None
+        self.gaps = [None, None]
+        for n in range(2, max_resistors + 1):
+            balance = (n // 2) * (n - n // 2) / n
+            above, below = self._hi * balance, self._lo / balance
+            self.gaps.append((above, below) if above < below else None)
+
+    def edge(self, target):
+        """The optimal configuration (a Config node) if the bounds alone decide it, else None.
+
+        They do when target is 0 or float("inf") (MAX), or anywhere outside
+        (low[max_resistors], high[max_resistors]): the nearer end of the
+        range is then the answer. O(max_resistors).
+        """
+        n = self.max_resistors
+        if target <= self.low[n]:
+            return self._chain(self.smallest, n, "//")
+        if target >= self.high[n]:
+            return self._chain(self.largest, n, "+")
+        return None
+
+    def error_bound(self, n, target):
+        """A lower bound on |value - target| over n-resistor configurations."""
+        low = self.low[n] * (1 - self._SLACK)
+        high = self.high[n] * (1 + self._SLACK)
+        distance = max(low - target, target - high, 0.0)
+        gap = self.gaps[n]
+        if gap is not None:
+            above, below = gap[0] * (1 + self._SLACK), gap[1] * (1 - self._SLACK)
+            if above < target < below:
+                distance = max(distance, min(target - above, below - target))
+        return distance
+
+    def series_partners(self, j, low_goal, high_goal):
+        """(a_min, a_max): the values a that, in series with some j-resistor
+        configuration, can land in [low_goal, high_goal]."""
+        return (
+            low_goal - self.high[j] - self._SLACK * (abs(low_goal) + self.high[j]),
+            high_goal - self.low[j] + self._SLACK * (abs(high_goal) + self.low[j]),
+        )
+
+    def parallel_partners(self, j, low_goal, high_goal):
+        """(a_min, a_max): the values a that, in parallel with some j-resistor
+        configuration, can land in [low_goal, high_goal] (a_min > a_max if none)."""
+        # a // x increases with both a and x, and stays below x
+        low_x = self.low[j] * (1 - self._SLACK)
+        high_x = self.high[j] * (1 + self._SLACK)
+        if low_goal <= 0:
+            a_min = 0.0
+        elif low_goal >= high_x:
+            return float("inf"), 0.0
+        else:
+            a_min = low_goal * high_x / (high_x - low_goal) * (1 - self._SLACK)
+        if high_goal >= low_x:
+            a_max = float("inf")
+        else:
+            a_max = high_goal * low_x / (low_x - high_goal) * (1 + self._SLACK)
+        return a_min, a_max
+
+    def _chain(self, index, n, op):
+        leaf = node = base_config(index, self._base_resistances)
+        for _ in range(n - 1):
+            node = combine_config(leaf, node, op)
+        return node
+
+
 def _get_splits(config):
     op_symbols = ["+", "//"]
     for i in range(len(config)):
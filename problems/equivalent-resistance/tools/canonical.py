@@ -0,0 +1,141 @@
+from math import comb
+
+from solver import Solver
+from resistor_utils import base_config, combine_config
+
+# Canonical enumeration of series-parallel circuits.
+#
+# Series and parallel are commutative and associative, so a circuit is really
+# an n-ary series or parallel node over a multiset of children. In canonical
+# form a series node's children are never series nodes themselves (they are
+# flattened into it), and likewise for parallel; children are listed in a
+# fixed order. Each distinct circuit then has exactly one canonical form, so
+# enumerating canonical forms generates every circuit once -- unlike binary
+# enumeration, which produces (a)+(b) and (b)+(a), and every regrouping of
+# a chain, as separate candidates.
+#
+# count_* below give the size of each search space without enumerating it.
+
+
+class Solution(Solver):
+
+    def approximate(self, base_resistances, resistance, max_resistors):
+        best = None
+        best_diff = None
+        for circuit in enumerate_circuits(base_resistances, max_resistors):
+            d = _diff(circuit.value, resistance)
+            if best is None or d < best_diff:
+                best = circuit
+                best_diff = d
+        return best.scf()
+
+
+def enumerate_circuits(base_resistances, max_resistors):
+    """Yield every distinct circuit of 1..max_resistors resistors once, smallest first.
+
+    Circuits are resistor_utils.Config nodes; an n-ary node is built as a
+    chain of binary nodes, so scf() gives an ordinary SCF string. Base
+    resistors with equal values count as distinct.
+    """
+    # Per size: canonical circuits rooted at a series / parallel node
+    series = {}
+    parallel = {}
+    leaves = [base_config(i, base_resistances) for i in range(len(base_resistances))]
+    yield from leaves
+
+    for n in range(2, max_resistors + 1):
+        # Children of a series node are leaves or parallel nodes, and vice versa
+        not_series = [[], leaves] + [parallel[s] for s in range(2, n)]
+        not_parallel = [[], leaves] + [series[s] for s in range(2, n)]
+        series[n] = [_chain(c, "+") for c in _multisets(not_series, n)]
+        parallel[n] = [_chain(c, "//") for c in _multisets(not_parallel, n)]
+        yield from series[n]
+        yield from parallel[n]
+
+
+def count_canonical(base_count, n):
+    """Number of distinct circuits with exactly n resistors from base_count base values."""
+    if n == 1:
+        return base_count
+    # By duality there are as many series-rooted circuits as parallel-rooted
+    # ones; rooted[s] counts one kind
+    rooted = [0, 0]
+    for size in range(2, n + 1):
+        children = [0, base_count] + rooted[2:size]
+        rooted.append(_count_multisets(children, size))
+    return 2 * rooted[n]
+
+
+def count_binary(base_count, n):
+    """Number of ordered binary series/parallel expressions with exactly n resistors."""
+    counts = [0, base_count]
+    for size in range(2, n + 1):
+        counts.append(sum(2 * counts[i] * counts[size - i] for i in range(1, size)))
+    return counts[n]
+
+
+def count_split_pairs(base_count, n):
+    """Expressions generated for level n by splitting it as (i, n - i), i <= n // 2.
+
+    This is the structural work of brute_force.py before its per-level value
+    dedup: (i, j) vs (j, i) is skipped between levels, but not within one.
+    """
+    counts = [0, base_count]
+    for size in range(2, n + 1):
+        counts.append(sum(2 * counts[i] * counts[size - i] for i in range(1, size // 2 + 1)))
+    return counts[n]
+
+
+def _multisets(pools, n):
+    """Multisets of 2+ items with sizes summing to n; pools[s] lists items of size s.
+
+    Items are taken in non-decreasing (size, index) order, so each multiset
+    is produced once.
+    """
+    chosen = []
+
+    def extend(remaining, size, index):
+        if remaining == 0:
+            if len(chosen) >= 2:
+                yield list(chosen)
+            return
+        for s in range(size, min(remaining, n - 1) + 1):
+            pool = pools[s]
+            for i in range(index if s == size else 0, len(pool)):
+                chosen.append(pool[i])
+                yield from extend(remaining - s, s, i)
+                chosen.pop()
+
+    yield from extend(n, 1, 0)
+
+
+def _count_multisets(counts, n):
+    """Number of multisets of 2+ items with sizes summing to n; counts[s] items of size s < n."""
+    # ways[t] = multisets of total size t from the sizes considered so far
+    ways = [1] + [0] * n
+    for s in range(1, n):
+        if counts[s] == 0:
+            continue
+        for total in range(n, 0, -1):
+            # Take k >= 1 items of size s, with repetition
+            ways[total] += sum(
+                comb(counts[s] + k - 1, k) * ways[total - k * s]
+                for k in range(1, total // s + 1)
+            )
+    return ways[n]
+
+
+def _chain(children, op):
+    node = children[0]
+    for child in children[1:]:
+        node = combine_config(node, child, op)
+    return node
+
+
+def _diff(value, target):
+    if target == float("inf"):
+        return -value  # maximize: more negative = better
+    elif target == 0:
+        return value  # minimize: lower = better
+    else:
+        return abs(value - target)
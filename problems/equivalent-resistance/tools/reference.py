@@ -0,0 +1,742 @@
+import bisect
+import heapq
+import resource
+import time
+from array import array
+
+from solver import Solver
+from resistor_utils import LevelBounds, base_scf, combine_scf
+
+# Exact reference solver, used offline to compute expected values for
+# generated test tiers (problems/equivalent-resistance/generate_tiers.py).
+#
+# Level n is the set of distinct values reachable with exactly n resistors
+# (values already reachable with fewer are dropped). Small levels are
+# materialized as sorted arrays with back-pointers. Larger levels are never
+# built: the nearest values to a goal in level n are found by splitting n
+# into (i, n - i), walking the materialized side and searching the other side
+# for the matching goal. Series and parallel are both increasing in each
+# operand, so a nearest-neighbour query maps through either operation.
+# Per-level value bounds (resistor_utils.LevelBounds) answer targets outside
+# the reachable range directly, skip levels that cannot beat the best so far,
+# and limit each split to the outer values that can.
+
+# Stop materializing levels once building the next one would take more pairs
+_MATERIALIZE_BUDGET = 2_000_000
+
+# approximate_many scales the budget by one step per this many distinct targets
+_BATCH_TARGETS_PER_BUDGET = 64
+
+_BASE, _SERIES, _PARALLEL = 0, 1, 2
+_OPS = {_SERIES: "+", _PARALLEL: "//"}
+
+# Relative improvement needed to prefer a candidate, so float noise between
+# equal values never beats a configuration with fewer resistors
+_EPSILON = 1e-12
+
+
+class Solution(Solver):
+
+    def __init__(self, time_budget=None, memory_mb=None):
+        # With a budget, answer with the best configuration found in time
+        # (see approximate_anytime); without one, search exhaustively
+        self.time_budget = time_budget
+        self.memory_mb = memory_mb
+
+    def approximate(self, base_resistances, resistance, max_resistors):
+        edge = LevelBounds(base_resistances, max_resistors).edge(resistance)
+        if edge is not None:
+            return edge.scf()
+        if self.time_budget is not None or self.memory_mb is not None:
+            return approximate_anytime(
+                base_resistances, resistance, max_resistors,
+                time_budget=self.time_budget, memory_mb=self.memory_mb,
+            )["scf"]
+        levels = Levels(base_resistances, max_resistors)
+        return levels.scf(levels.best(resistance)[1])
+
+    def approximate_many(self, base_resistances, targets, max_resistors):
+        return approximate_many(base_resistances, targets, max_resistors)
+
+    def approximate_top_k(self, base_resistances, resistance, max_resistors, k):
+        return approximate_top_k(base_resistances, resistance, max_resistors, k)
+
+    def approximate_pareto(self, base_resistances, resistance, max_resistors):
+        return approximate_pareto(base_resistances, resistance, max_resistors)
+
+
+def approximate_anytime(
+    base_resistances, resistance, max_resistors, time_budget=None, memory_mb=None, on_progress=None,
+):
+    """Best configuration found within a time (seconds) / memory (peak RSS MB) budget.
+
+    Searches levels 1, 2, ... max_resistors in turn, so after level n the
+    answer is optimal among configurations of at most n resistors. After each
+    level the best configuration is greedily extended with materialized
+    configurations (series if below the target, parallel if above) while
+    that brings it closer, which often reaches a good deeper answer early.
+
+    Returns a dict with scf, value, resistors, error (|value - target|, or
+    None for the 0 / MAX targets), gap, complete, searched_resistors and
+    progress. gap is a proven bound on how much better the optimum can be:
+    the error minus the smallest error any unsearched level could reach (its
+    values lie within [min base / n, n * max base]); for 0 / MAX it is the
+    distance from the best value to the known optimum. It is 0 when
+    complete. progress lists {seconds, resistors, value, error, gap} each
+    time the best improves or a level finishes; on_progress is called with
+    each entry as it is recorded.
+    """
+    start = time.monotonic()
+    deadline = None if time_budget is None else start + time_budget
+
+    def check():
+        if deadline is not None and time.monotonic() > deadline:
+            raise _OutOfBudget
+        if memory_mb is not None and resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 > memory_mb:
+            raise _OutOfBudget
+
+    search = _AnytimeSearch(base_resistances, resistance, max_resistors, start, on_progress)
+    # Always answer with at least the closest single resistor
+    levels = Levels(base_resistances, max_resistors, lazy=True)
+    for candidate in levels.neighbors(1, resistance):
+        if candidate is not None:
+            search.offer(levels, candidate[0], candidate[1], 1)
+    search.searched = 1
+    levels.check = check
+    try:
+        for n in range(2, max_resistors + 1):
+            # Level n needs levels up to n // 2 materialized to split against;
+            # build more only while they are cheap, the search may stop soon
+            while levels.depth < n and (
+                levels.depth < n // 2 or levels._pair_count(levels.depth + 1) <= levels.budget
+            ):
+                levels.materialize()
+            for candidate in levels.neighbors(n, resistance):
+                if candidate is not None:
+                    search.offer(levels, candidate[0], candidate[1], n)
+            search.searched = n
+            search.improve(levels)
+            search.record()
+    except _OutOfBudget:
+        search.record()
+    return search.result()
+
+
+def approximate_many(base_resistances, targets, max_resistors, levels=None):
+    """approximate() for many targets, building the levels once.
+
+    Distinct targets are sorted and answered together (Levels.neighbors_many),
+    and larger batches materialize more levels. Returns SCF strings in the
+    order of targets. Pass levels to reuse an existing Levels for the same
+    base set and max_resistors.
+    """
+    bounds = LevelBounds(base_resistances, max_resistors)
+    answers = {}
+    for target in set(targets):
+        edge = bounds.edge(target)
+        if edge is not None:
+            answers[target] = edge.scf()
+    goals = sorted(set(targets) - set(answers))
+    if not goals:
+        return [answers[target] for target in targets]
+    if levels is None:
+        # Every target searches the levels that are not materialized, so a
+        # large batch can afford to materialize more of them
+        budget = _MATERIALIZE_BUDGET * max(1, len(goals) // _BATCH_TARGETS_PER_BUDGET)
+        levels = Levels(base_resistances, max_resistors, budget)
+    best = [None] * len(goals)
+    for n in range(1, max_resistors + 1):
+        for k, pair in enumerate(levels.neighbors_many(n, goals)):
+            for candidate in pair:
+                if candidate is not None and _improves(candidate[0], best[k], goals[k]):
+                    best[k] = (candidate[0], candidate[1], n)
+    answers.update((goal, levels.scf(b[1])) for goal, b in zip(goals, best))
+    return [answers[target] for target in targets]
+
+
+def approximate_top_k(base_resistances, resistance, max_resistors, k, levels=None):
+    """The k configurations with values closest to resistance, closest first.
+
+    Values are distinct (to 12 significant digits, so one circuit reached by
+    different float rounding counts once); each comes with its
+    fewest-resistor configuration.
+    Every level contributes at most k values on each side of the target
+    (Levels.window), merged in a bounded heap, so memory is O(k) on top of
+    the levels. Returns dicts with scf, value, resistors and error (None for
+    the 0 / MAX targets, where closest means smallest / largest).
+    """
+    if levels is None:
+        levels = Levels(base_resistances, max_resistors)
+    heap = []  # (-diff, -n, value, ref, n): the worst kept candidate on top
+    kept = set()
+    for n in range(1, max_resistors + 1):
+        below, above = levels.window(n, resistance, k)
+        for value, ref in below + above:
+            if _value_key(value) in kept:
+                continue  # already kept with fewer resistors
+            d = _diff(value, resistance)
+            if len(heap) < k:
+                heapq.heappush(heap, (-d, -n, value, ref, n))
+            elif d < -heap[0][0]:
+                kept.discard(_value_key(heapq.heapreplace(heap, (-d, -n, value, ref, n))[2]))
+            else:
+                continue
+            kept.add(_value_key(value))
+    ranked = sorted(heap, key=lambda entry: (-entry[0], entry[4]))
+    return [_answer(levels, value, ref, n, resistance) for _, _, value, ref, n in ranked]
+
+
+def approximate_pareto(base_resistances, resistance, max_resistors, levels=None):
+    """Pareto frontier of (error, resistor count), by increasing resistor count.
+
+    Each entry is the best configuration using at most that many resistors,
+    listed only where it beats every smaller count. Returns dicts with scf,
+    value, resistors and error (None for the 0 / MAX targets).
+    """
+    if levels is None:
+        levels = Levels(base_resistances, max_resistors)
+    return [_answer(levels, value, ref, n, resistance) for value, ref, n in levels.frontier(resistance)]
+
+
+def _answer(levels, value, ref, n, target):
+    return {
+        "scf": levels.scf(ref),
+        "value": value,
+        "resistors": n,
+        "error": None if target in (0, float("inf")) else abs(value - target),
+    }
+
+
+class Levels:
+    """Materialized levels plus nearest-value search for the rest."""
+
+    def __init__(self, base_resistances, max_resistors, budget=_MATERIALIZE_BUDGET, lazy=False):
+        self.base_resistances = base_resistances
+        self.max_resistors = max_resistors
+        self.budget = budget
+        self.bounds = LevelBounds(base_resistances, max_resistors)
+        # Called periodically during long loops; may raise to abandon them
+        self.check = None
+        # Per level n (index 0 unused): sorted values and back-pointers.
+        # left/right hold (level << 32 | index); for level 1, left is the base index.
+        self.values = [array("d")]
+        self.ops = [array("b")]
+        self.lefts = [array("q")]
+        self.rights = [array("q")]
+        self._seen = set()
+
+        self._add_level(self._base_level())
+        if not lazy:
+            while self.depth < max_resistors and self.should_materialize(self.depth + 1):
+                self.materialize()
+
+    @property
+    def depth(self):
+        return len(self.values) - 1
+
+    def should_materialize(self, n):
+        # Levels up to max_resistors // 2 are always built so every split of a
+        # larger level has a materialized side; beyond that, stay in budget
+        return n <= self.max_resistors // 2 or self._pair_count(n) <= self.budget
+
+    def materialize(self):
+        """Build the next level."""
+        self._add_level(self._build_level(self.depth + 1))
+
+    def materialize_within(self, max_values):
+        """Build the levels Levels() would, while all of them hold at most max_values.
+
+        A level's candidate count bounds its size, so nothing is built past
+        the limit. Levels the search can do without are skipped once they
+        would not fit; returns False if one it needs (n <= max_resistors // 2)
+        would not, leaving the levels built so far.
+        """
+        while self.depth < self.max_resistors and self.should_materialize(self.depth + 1):
+            n = self.depth + 1
+            if sum(len(values) for values in self.values) + self._pair_count(n) > max_values:
+                return n > self.max_resistors // 2
+            self.materialize()
+        return True
+
+    def search_steps(self, max_resistors=None):
+        """An upper bound on the outer values best() visits in the levels not materialized.
+
+        Each split of such a level walks the values of its smaller side and,
+        when the other side is not materialized either, searches it in
+        series and in parallel for each; pruning only ever visits fewer.
+        """
+        steps = {}
+        for n in range(self.depth + 1, min(max_resistors or self.max_resistors, self.max_resistors) + 1):
+            steps[n] = sum(
+                len(self.values[i]) * (2 * steps[n - i] if n - i > self.depth else 1)
+                for i in range(1, n // 2 + 1)
+            )
+        return sum(steps.values())
+
+    def best(self, target, max_resistors=None):
+        """Closest achievable value to target, then fewest resistors.
+
+        Returns (value, ref, count). target may be float("inf") (maximize) or 0.
+        max_resistors (at most the levels' own) limits the resistors used.
+        """
+        return self.frontier(target, max_resistors)[-1]
+
+    def frontier(self, target, max_resistors=None):
+        """Every (value, ref, count) that beats all configurations with fewer resistors.
+
+        The last entry is best(target, max_resistors).
+        """
+        m = min(max_resistors or self.max_resistors, self.max_resistors)
+        if not self.bounds.low[m] < target < self.bounds.high[m]:
+            # Outside the reachable range (0 and MAX included), every level's
+            # nearest value is its end of the range, closer with each level
+            largest = target >= self.bounds.high[m]
+            return [self._end(n, largest) for n in range(1, m + 1)]
+
+        frontier = []
+        for n in range(1, m + 1):
+            within = None
+            if frontier:
+                within = _diff(frontier[-1][0], target)
+                if self.bounds.error_bound(n, target) >= within:
+                    continue  # no n-resistor value can get closer
+            for candidate in self.neighbors(n, target, within):
+                if candidate is not None and _improves(candidate[0], frontier[-1] if frontier else None, target):
+                    if frontier and frontier[-1][2] == n:
+                        frontier[-1] = (candidate[0], candidate[1], n)
+                    else:
+                        frontier.append((candidate[0], candidate[1], n))
+        return frontier
+
+    def window(self, n, goal, k):
+        """(below, above): up to k distinct level-n values < goal and k >= goal.
+
+        Each is a list of (value, ref), nearest first. Larger levels keep two
+        bounded heaps of size k while walking their splits: for a fixed outer
+        value both operations are monotone, so its k nearest combinations on
+        each side come from the window of the other side.
+        """
+        if n <= self.depth:
+            values = self.values[n]
+            p = bisect.bisect_left(values, goal)
+            return (
+                _distinct(values, n, range(p - 1, -1, -1), k),
+                _distinct(values, n, range(p, len(values)), k),
+            )
+
+        below = []  # min-heap of (value, seq, ref): the farthest kept below on top
+        above = []  # min-heap of (-value, seq, ref): the farthest kept above on top
+        seen = set()
+        seq = 0
+
+        def offer(value, ref):
+            nonlocal seq
+            if _value_key(value) in seen:
+                return
+            seq += 1
+            if value < goal:
+                heap, key = below, value
+            else:
+                heap, key = above, -value
+            if len(heap) < k:
+                heapq.heappush(heap, (key, seq, ref))
+            elif key > heap[0][0]:
+                evicted = heapq.heapreplace(heap, (key, seq, ref))[0]
+                seen.discard(_value_key(evicted if heap is below else -evicted))
+            else:
+                return
+            seen.add(_value_key(value))
+
+        for i in range(1, n // 2 + 1):
+            j = n - i
+            largest = None
+            for ai, a in enumerate(self.values[i]):
+                if self.check:
+                    self.check()
+                a_ref = ("L", i, ai)
+                inner_below, inner_above = self.window(j, goal - a, k)
+                for x, ref in inner_below + inner_above:
+                    offer(a + x, (_SERIES, a_ref, ref))
+                if a <= goal:
+                    # Every parallel value is below goal; the largest x are best
+                    if largest is None:
+                        largest = self.window(j, float("inf"), k)[0]
+                    hits = largest
+                else:
+                    inner_below, inner_above = self.window(j, a * goal / (a - goal), k)
+                    hits = inner_below + inner_above
+                for x, ref in hits:
+                    offer(1 / (1 / a + 1 / x), (_PARALLEL, a_ref, ref))
+
+        return (
+            [(value, ref) for value, _, ref in sorted(below, reverse=True)],
+            [(-key, ref) for key, _, ref in sorted(above, reverse=True)],
+        )
+
+    def neighbors(self, n, goal, within=None):
+        """(below, at_or_above): the nearest level-n values < goal and >= goal.
+
+        Each is (value, ref) or None. A ref is ("L", level, index) for a
+        materialized value or (op, left_ref, right_ref) for a combination.
+        With within, values farther than that from goal are not needed: a
+        side may then be None or not the nearest, if its nearest is farther.
+        """
+        return self.neighbors_many(n, [goal], None if within is None else [within])[0]
+
+    def neighbors_many(self, n, goals, within=None):
+        """neighbors() for many goals at once; goals must be sorted ascending.
+
+        Materialized levels are answered by one merged sweep over their
+        sorted values. For larger levels, the series and parallel goals of
+        each outer value are still sorted, so searches on the other side
+        resume from the previous position, and the recursion stays batched.
+        within, if given, holds each goal's distance of interest (see
+        neighbors()): splits only visit the outer values whose series or
+        parallel combinations can come that close to some goal.
+        """
+        if n <= self.depth:
+            return _sweep(self.values[n], n, goals)
+
+        count = len(goals)
+        below_values = [float("-inf")] * count
+        below_refs = [None] * count
+        above_values = [float("inf")] * count
+        above_refs = [None] * count
+
+        def keep(k, value, op, a_ref, ref):
+            if value < goals[k]:
+                if value > below_values[k]:
+                    below_values[k] = value
+                    below_refs[k] = (op, a_ref, ref)
+            elif value < above_values[k]:
+                above_values[k] = value
+                above_refs[k] = (op, a_ref, ref)
+
+        if within is not None:
+            low_goal = min(goal - w for goal, w in zip(goals, within))
+            high_goal = max(goal + w for goal, w in zip(goals, within))
+
+        for i in range(1, n // 2 + 1):
+            j = n - i
+            outer = self.values[i]
+            inner = self.values[j] if j <= self.depth else None
+            # Outer positions [start, stop) worth combining in series / parallel
+            series = parallel = (0, len(outer))
+            if within is not None:
+                series = _positions(outer, self.bounds.series_partners(j, low_goal, high_goal))
+                parallel = _positions(outer, self.bounds.parallel_partners(j, low_goal, high_goal))
+            spans = [span for span in (series, parallel) if span[0] < span[1]]
+            if not spans:
+                continue  # no combination of this split can come close enough
+            for ai in range(min(s[0] for s in spans), max(s[1] for s in spans)):
+                a = outer[ai]
+                if self.check:
+                    self.check()
+                a_ref = ("L", i, ai)
+                in_series = series[0] <= ai < series[1]
+                in_parallel = parallel[0] <= ai < parallel[1]
+                # Goals below a map to increasing x*; the rest take the largest x
+                split = bisect.bisect_left(goals, a)
+
+                if inner is None:
+                    if in_series:
+                        # Series shifts every distance by a, so within carries over
+                        hits = self.neighbors_many(j, [goal - a for goal in goals], within)
+                        for k, pair in enumerate(hits):
+                            for hit in pair:
+                                if hit is not None:
+                                    keep(k, a + hit[0], _SERIES, a_ref, hit[1])
+                    if in_parallel:
+                        hits = self.neighbors_many(j, [a * goal / (a - goal) for goal in goals[:split]])
+                        if split < count:
+                            hits.extend([(self._largest(j),)] * (count - split))
+                        for k, pair in enumerate(hits):
+                            for hit in pair:
+                                if hit is not None:
+                                    keep(k, 1 / (1 / a + 1 / hit[0]), _PARALLEL, a_ref, hit[1])
+                    continue
+
+                # Materialized other side. Within one level, pairs with the
+                # inner index below ai were already tried the other way round
+                lo = ai if i == j else 0
+                size = len(inner)
+                p = lo
+                for k in range(count if in_series else 0):
+                    p = bisect.bisect_left(inner, goals[k] - a, p)
+                    if p > lo:
+                        keep(k, a + inner[p - 1], _SERIES, a_ref, ("L", j, p - 1))
+                    if p < size:
+                        keep(k, a + inner[p], _SERIES, a_ref, ("L", j, p))
+                if not in_parallel:
+                    continue
+                p = lo
+                for k in range(split):
+                    goal = goals[k]
+                    p = bisect.bisect_left(inner, a * goal / (a - goal), p)
+                    if p > lo:
+                        keep(k, 1 / (1 / a + 1 / inner[p - 1]), _PARALLEL, a_ref, ("L", j, p - 1))
+                    if p < size:
+                        keep(k, 1 / (1 / a + 1 / inner[p]), _PARALLEL, a_ref, ("L", j, p))
+                if split < count:
+                    value = 1 / (1 / a + 1 / inner[size - 1])
+                    for k in range(split, count):
+                        keep(k, value, _PARALLEL, a_ref, ("L", j, size - 1))
+
+        return [
+            (
+                (below_values[k], below_refs[k]) if below_refs[k] else None,
+                (above_values[k], above_refs[k]) if above_refs[k] else None,
+            )
+            for k in range(count)
+        ]
+
+    def _largest(self, n):
+        """(value, ref) of the largest level-n value."""
+        if n <= self.depth:
+            return self.values[n][-1], ("L", n, len(self.values[n]) - 1)
+        return self._end(n, largest=True)[:2]
+
+    def _end(self, n, largest):
+        """(value, ref, n) of the smallest level-n value (n copies of the smallest
+        base value in parallel), or the largest (the largest in series)."""
+        index = len(self.values[1]) - 1 if largest else 0
+        op = _SERIES if largest else _PARALLEL
+        ref = ("L", 1, index)
+        for _ in range(n - 1):
+            ref = (op, ("L", 1, index), ref)
+        return (self.bounds.high if largest else self.bounds.low)[n], ref, n
+
+    def scf(self, ref):
+        """Serialize a ref from best()/neighbors() to an SCF string."""
+        if ref[0] == "L":
+            _, level, index = ref
+            op = self.ops[level][index]
+            if op == _BASE:
+                return base_scf(self.lefts[level][index])
+            left = self.lefts[level][index]
+            right = self.rights[level][index]
+            return combine_scf(
+                self.scf(("L", left >> 32, left & 0xFFFFFFFF)),
+                self.scf(("L", right >> 32, right & 0xFFFFFFFF)),
+                _OPS[op],
+            )
+        op, left, right = ref
+        return combine_scf(self.scf(left), self.scf(right), _OPS[op])
+
+    def _base_level(self):
+        level = {}
+        for i, r in enumerate(self.base_resistances):
+            if r not in level:
+                level[r] = (_BASE, i, 0)
+        return level
+
+    def _build_level(self, n):
+        level = {}
+        seen = self._seen
+        for i in range(1, n // 2 + 1):
+            j = n - i
+            left_values = self.values[i]
+            right_values = self.values[j]
+            for ai, a in enumerate(left_values):
+                if self.check:
+                    self.check()
+                a_ptr = (i << 32) | ai
+                # Same-level splits: (a, b) and (b, a) are the same circuit
+                start = ai if i == j else 0
+                for bi in range(start, len(right_values)):
+                    b = right_values[bi]
+                    s = a + b
+                    if s not in seen and s not in level:
+                        level[s] = (_SERIES, a_ptr, (j << 32) | bi)
+                    if a > 0 and b > 0:
+                        p = 1 / (1 / a + 1 / b)
+                        if p not in seen and p not in level:
+                            level[p] = (_PARALLEL, a_ptr, (j << 32) | bi)
+        return level
+
+    def _add_level(self, level):
+        keys = sorted(level)
+        entries = [level[k] for k in keys]
+        self.values.append(array("d", keys))
+        self.ops.append(array("b", [e[0] for e in entries]))
+        self.lefts.append(array("q", [e[1] for e in entries]))
+        self.rights.append(array("q", [e[2] for e in entries]))
+        self._seen.update(keys)
+
+    def _pair_count(self, n):
+        total = 0
+        for i in range(1, n // 2 + 1):
+            j = n - i
+            if i == j:
+                total += len(self.values[i]) * (len(self.values[i]) + 1) // 2
+            else:
+                total += len(self.values[i]) * len(self.values[j])
+        return 2 * total
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class _AnytimeSearch:
+    """Best-so-far state and progress log for approximate_anytime."""
+
+    def __init__(self, base_resistances, target, max_resistors, start, on_progress):
+        self.base_resistances = base_resistances
+        self.target = target
+        self.max_resistors = max_resistors
+        self.start = start
+        self.on_progress = on_progress
+        self.bounds = LevelBounds(base_resistances, max_resistors)
+        self.best = None  # (value, ref, count)
+        self.scf = None
+        self.searched = 0
+        self.progress = []
+
+    def offer(self, levels, value, ref, count):
+        """Keep a candidate if it beats the best so far (ties go to fewer resistors)."""
+        if self.best is not None:
+            d = _diff(value, self.target)
+            best_diff = _diff(self.best[0], self.target)
+            scale = abs(self.target) if 0 < self.target < float("inf") else abs(value)
+            if not (d < best_diff - _EPSILON * scale or (d <= best_diff and count < self.best[2])):
+                return False
+        self.best = (value, ref, count)
+        # Serialize now: refs into partially built levels stay valid, but the
+        # search may be abandoned at any point
+        self.scf = levels.scf(ref)
+        self.record()
+        return True
+
+    def improve(self, levels):
+        """Greedily extend the best configuration while that gets closer to the target."""
+        improved = True
+        while improved and self.best[0] != self.target:
+            improved = False
+            value, ref, count = self.best
+            for i in range(1, min(self.max_resistors - count, levels.depth) + 1):
+                if value < self.target:
+                    # Only series can raise the value
+                    for hit in levels.neighbors(i, self.target - value):
+                        if hit is not None:
+                            improved |= self.offer(levels, value + hit[0], (_SERIES, ref, hit[1]), count + i)
+                else:
+                    # Only parallel can lower it: value // x == target at x*
+                    goal = value * self.target / (value - self.target)
+                    for hit in levels.neighbors(i, goal):
+                        if hit is not None:
+                            p = 1 / (1 / value + 1 / hit[0])
+                            improved |= self.offer(levels, p, (_PARALLEL, ref, hit[1]), count + i)
+
+    def gap(self):
+        if self.best is None:
+            return None
+        value = self.best[0]
+        if self.target == float("inf"):
+            return self.max_resistors * max(self.base_resistances) - value
+        if self.target == 0:
+            return value - min(self.base_resistances) / self.max_resistors
+        if self.searched == self.max_resistors:
+            return 0.0
+        # No unsearched level can get closer than its value bounds allow
+        bound = min(
+            self.bounds.error_bound(n, self.target)
+            for n in range(self.searched + 1, self.max_resistors + 1)
+        )
+        return max(0.0, abs(value - self.target) - bound)
+
+    def record(self):
+        if self.best is None:
+            return
+        entry = {
+            "seconds": round(time.monotonic() - self.start, 6),
+            "resistors": self.searched,
+            "value": self.best[0],
+            "error": self._error(),
+            "gap": self.gap(),
+        }
+        self.progress.append(entry)
+        if self.on_progress:
+            self.on_progress(entry)
+
+    def result(self):
+        value, _, count = self.best
+        return {
+            "scf": self.scf,
+            "value": value,
+            "resistors": count,
+            "error": self._error(),
+            "gap": self.gap(),
+            "complete": self.searched == self.max_resistors,
+            "searched_resistors": self.searched,
+            "progress": self.progress,
+        }
+
+    def _error(self):
+        if self.target in (0, float("inf")):
+            return None
+        return abs(self.best[0] - self.target)
+
+
+def _sweep(values, level, goals):
+    """(below, at_or_above) in a materialized level for each of the sorted goals."""
+    results = []
+    i = 0
+    size = len(values)
+    # Few goals: binary search from the previous position; many: linear merge
+    search = len(goals) * 16 < size
+    for goal in goals:
+        if search:
+            i = bisect.bisect_left(values, goal, i)
+        else:
+            while i < size and values[i] < goal:
+                i += 1
+        results.append((
+            (values[i - 1], ("L", level, i - 1)) if i > 0 else None,
+            (values[i], ("L", level, i)) if i < size else None,
+        ))
+    return results
+
+
+def _positions(values, span):
+    """Positions [start, stop) of the sorted values within span = (low, high)."""
+    return bisect.bisect_left(values, span[0]), bisect.bisect_right(values, span[1])
+
+
+def _value_key(value):
+    return float(f"{value:.12g}")
+
+
+def _distinct(values, level, positions, k):
+    """Up to k (value, ref) from a materialized level, skipping rounding duplicates."""
+    picked = []
+    keys = set()
+    for q in positions:
+        if len(picked) == k:
+            break
+        key = _value_key(values[q])
+        if key not in keys:
+            keys.add(key)
+            picked.append((values[q], ("L", level, q)))
+    return picked
+
+
+def _improves(value, best, target):
+    """Whether value beats best (value, ...) for target by more than float noise.
+
+    Levels are visited by increasing resistor count, so a tie keeps the
+    configuration with fewer resistors.
+    """
+    if best is None:
+        return True
+    scale = abs(target) if 0 < target < float("inf") else abs(value)
+    return _diff(value, target) < _diff(best[0], target) - _EPSILON * scale
+
+
+def _diff(value, target):
+    if target == float("inf"):
+        return -value  # maximize: more negative = better
+    elif target == 0:
+        return value  # minimize: lower = better
+    else:
+        return abs(value - target)
@@ -1,9 +1,16 @@
 """CLI entry point: python -m server"""
 
 import argparse
+import os
+import shutil
+import tempfile
 
 import uvicorn
 
+from engine.runner import isolation_cpus
+
+from .run_queue import ExecutorPool
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -17,10 +24,58 @@ def main():
         "--host", default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)",
     )
 
+    parser.add_argument(
+        "--isolate", action="store_true",
+        help="Pin each test to a dedicated core and keep the server on a reserved one",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="HTTP worker processes; more than one runs tests on a shared run queue (default: 1)",
+    )
+    parser.add_argument(
+        "--executors", type=int, default=None,
+        help="Processes running queued runs, one run each at a time; implies the run queue "
+             "(default with --workers: CPU count, or test cores with --isolate)",
+    )
+
+    parser.add_argument(
+        "--remote-worker", action="append", default=[], dest="remote_workers", metavar="HOST:PORT",
+        help="Send runs to this engine worker (python -m engine worker); repeat for several",
+    )
+
     args = parser.parse_args()
+    if args.remote_workers:
+        if args.executors is not None or args.isolate:
+            parser.error("--executors and --isolate apply to local runs; start workers with --isolate instead")
+        # Read by server.app at import, in every worker
+        os.environ["WORKBENCH_REMOTE_WORKERS"] = ",".join(args.remote_workers)
+    if args.isolate:
+        # Read by server.app at import
+        os.environ["WORKBENCH_ISOLATE"] = "1"
+
+    queue_dir = None
+    executors = None
+    if not args.remote_workers and (args.workers > 1 or args.executors is not None):
+        cpus = isolation_cpus() if args.isolate else None
+        size = args.executors or (len(cpus) if cpus else os.cpu_count() or 1)
+        if cpus:
+            # One executor per test core
+            size = min(size, len(cpus))
+        queue_dir = tempfile.mkdtemp(prefix="workbench-queue-")
+        path = os.path.join(queue_dir, "runs.db")
+        # Read by server.app at import, in every worker
+        os.environ["WORKBENCH_RUN_QUEUE"] = path
+        executors = ExecutorPool(path, size, cpus=cpus)
+        executors.start()
+        print(f"Run queue: {size} executor(s), {args.workers} HTTP worker(s)")
 
     print(f"Starting workbench at http://{args.host}:{args.port}")
-    uvicorn.run("server.app:app", host=args.host, port=args.port)
+    try:
+        uvicorn.run("server.app:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if executors is not None:
+            executors.stop()
+            shutil.rmtree(queue_dir, ignore_errors=True)
 
 
 if __name__ == "__main__":
@@ -3,15 +3,20 @@
 import asyncio
 import json
 import os
+import time
 from pathlib import Path
+from typing import Literal
 
 import markdown
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from engine import run_solution
+from engine import history, metrics, remote, run_solution_async
+from engine.runner import isolate_process
+
+from . import run_queue, solve
 
 app = FastAPI(title="Problem Workbench")
 
@@ -25,18 +30,93 @@ _SOLUTIONS_DIR = _PROJECT_ROOT / "solutions"
 # Hardcoded for now — single problem
 _PROBLEM_SLUG = "equivalent-resistance"
 
+# The workbench records its runs in the run history (engine.history)
+history.enable_recording()
+
+# Runs execute on the server's event loop; this caps how many run at once
+# (the size the engine's thread pool used to have)
+_RUN_SLOTS = asyncio.Semaphore(min(32, (os.cpu_count() or 1) + 4))
+
+# python -m server --workers N: runs go through the shared run queue to the
+# server's executor processes instead of this process's event loop
+_RUN_QUEUE_PATH = os.environ.get("WORKBENCH_RUN_QUEUE")
+_RUN_QUEUE = run_queue.RunQueue(_RUN_QUEUE_PATH) if _RUN_QUEUE_PATH else None
+
+# python -m server --remote-worker HOST:PORT ...: runs are sent to remote
+# engine workers (see engine.remote) instead of running on this host
+_REMOTE_WORKERS = os.environ.get("WORKBENCH_REMOTE_WORKERS")
+_DISPATCHER = remote.Dispatcher(_REMOTE_WORKERS.split(",")) if _REMOTE_WORKERS else None
+
+# python -m server --isolate: tests get dedicated cores (at most one test per
+# core at a time) and the server moves to the core reserved for non-test work
+_ISOLATE = os.environ.get("WORKBENCH_ISOLATE") == "1"
+if _ISOLATE:
+    isolate_process()
+
+# Cached reference solver behind /api/solve
+_SOLVER = solve.ReferenceSolver()
+
+# Server-side run metrics (engine metrics live in engine.metrics)
+_RUNS_IN_FLIGHT = metrics.REGISTRY.gauge(
+    "workbench_runs_in_flight", "Runs currently executing in the engine",
+)
+_RUNS_QUEUED = metrics.REGISTRY.gauge(
+    "workbench_runs_queued", "Runs accepted but waiting for a free engine slot",
+)
+_RUN_SECONDS = metrics.REGISTRY.histogram(
+    "workbench_run_duration_seconds", "End-to-end /api/run latency, including queueing",
+    ("language",),
+)
+
+
+class _RunGauges:
+    """Counts one run as queued, then (after start()) as in flight, until exit."""
+
+    def __init__(self):
+        self._started = False
+
+    def __enter__(self):
+        _RUNS_QUEUED.inc()
+        return self
+
+    def start(self):
+        _RUNS_QUEUED.dec()
+        _RUNS_IN_FLIGHT.inc()
+        self._started = True
+
+    def __exit__(self, *exc):
+        (_RUNS_IN_FLIGHT if self._started else _RUNS_QUEUED).dec()
+
 
 # --- Request/response models ---
 
 class RunRequest(BaseModel):
     language: str
     code: str
+    # Attach a CPU profile (top functions, collapsed stacks) to each test
+    profile: bool = False
+    # Trace allocations; tests near the memory limit get their top allocation sites
+    memory_profile: bool = False
+    # Run tests on warm worker JVMs (kept for later requests) instead of fresh processes
+    warm: bool = False
+    # Scheduling: only these test ids, stop at the first non-pass, cheapest
+    # (by recorded CPU time) first; tests not run get the "skipped" verdict
+    tests: list[int] | None = None
+    fail_fast: bool = False
+    order: Literal["file", "cheapest"] = "file"
 
 
 class SolutionBody(BaseModel):
     code: str
 
 
+class SolveRequest(BaseModel):
+    # Named as in testcases.json
+    baseResistances: list[float]
+    target: float | Literal["MAX"]
+    maxResistors: int
+
+
 # --- API routes ---
 
 @app.get("/api/problem")
@@ -117,21 +197,154 @@ async def run_tests(req: RunRequest):
             status_code=400,
             detail=f"Unknown language: {req.language}",
         )
-
-    # Run engine in thread pool to avoid blocking the server
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        lambda: run_solution(
-            problem=_PROBLEM_SLUG,
-            language=req.language,
-            solution_code=req.code,
-        ),
+    if req.tests is not None:
+        # Checked here as well as in the engine, so a bad selection is not
+        # queued or sent to a remote worker first
+        unknown = {str(test_id) for test_id in req.tests} - {str(test_id) for test_id in _test_ids()}
+        if unknown:
+            raise HTTPException(status_code=400, detail="Unknown test id(s): " + ", ".join(sorted(unknown)))
+
+    kwargs = dict(
+        problem=_PROBLEM_SLUG,
+        language=req.language,
+        solution_code=req.code,
+        profile=req.profile,
+        memory_profile=req.memory_profile,
+        warm=req.warm,
+        tests=req.tests,
+        fail_fast=req.fail_fast,
+        order=req.order,
+        isolate=_ISOLATE,
     )
 
+    start = time.monotonic()
+    try:
+        with _RunGauges() as gauges:
+            if _DISPATCHER is not None:
+                # Each worker decides on isolation itself (engine worker --isolate)
+                del kwargs["isolate"]
+                try:
+                    result = await _DISPATCHER.run(kwargs, on_start=gauges.start)
+                except remote.RemoteError as e:
+                    raise HTTPException(status_code=502, detail=str(e))
+            elif _RUN_QUEUE is not None:
+                try:
+                    result = await _RUN_QUEUE.run(kwargs, on_start=gauges.start)
+                except run_queue.RunFailed as e:
+                    raise HTTPException(status_code=500, detail=str(e))
+            else:
+                async with _RUN_SLOTS:
+                    gauges.start()
+                    try:
+                        result = await run_solution_async(**kwargs)
+                    except ValueError as e:
+                        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        _RUN_SECONDS.observe(time.monotonic() - start, language=req.language)
+
     return result
 
 
+def _test_ids() -> list:
+    """The problem's test ids, from testcases.json."""
+    testcases_path = _PROBLEMS_DIR / _PROBLEM_SLUG / "testcases.json"
+    if not testcases_path.is_file():
+        return []
+    return [tc["id"] for tc in json.loads(testcases_path.read_text()).get("tests", [])]
+
+
+@app.post("/api/solve")
+async def solve_resistance(req: SolveRequest):
+    """Optimal configuration for a target from the in-process reference solver."""
+    if not req.baseResistances or any(not (0 < r < float("inf")) for r in req.baseResistances):
+        raise HTTPException(status_code=400, detail="baseResistances must be positive numbers")
+    if not 1 <= req.maxResistors <= solve.MAX_RESISTORS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"maxResistors must be between 1 and {solve.MAX_RESISTORS}",
+        )
+    if req.target != "MAX" and not 0 <= req.target < float("inf"):
+        raise HTTPException(status_code=400, detail='target must be a non-negative number or "MAX"')
+    target = float("inf") if req.target == "MAX" else req.target
+    try:
+        return await _SOLVER.solve(req.baseResistances, target, req.maxResistors)
+    except solve.QueryTooLarge as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/api/workers")
+async def get_workers():
+    """Remote engine workers and their state (empty when runs execute locally)."""
+    return _DISPATCHER.workers() if _DISPATCHER is not None else []
+
+
+@app.get("/api/history/runs")
+async def get_history_runs(
+    language: str | None = None,
+    solution_hash: str | None = None,
+    limit: int = 20,
+):
+    """Latest recorded runs (optionally of one language or solution), newest first."""
+    return await asyncio.to_thread(
+        history.latest_runs,
+        solution_hash=solution_hash,
+        problem=_PROBLEM_SLUG,
+        language=language,
+        limit=limit,
+    )
+
+
+@app.get("/api/history/trend")
+async def get_history_trend(
+    language: str,
+    test: str,
+    solution_hash: str | None = None,
+    mode: str | None = None,
+    limit: int = 50,
+):
+    """One test's recorded results across runs, oldest first."""
+    return await asyncio.to_thread(
+        history.test_trend,
+        _PROBLEM_SLUG,
+        language,
+        test,
+        solution_hash=solution_hash,
+        mode=mode,
+        limit=limit,
+    )
+
+
+@app.get("/api/history/slowest")
+async def get_history_slowest(days: float = 7, language: str | None = None, limit: int = 20):
+    """Slowest recorded test results of the last `days` days."""
+    return await asyncio.to_thread(
+        history.slowest_tests,
+        since=time.time() - days * 86400,
+        problem=_PROBLEM_SLUG,
+        language=language,
+        limit=limit,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose run and engine metrics in the Prometheus text format."""
+    overrides = None
+    if _RUN_QUEUE is not None:
+        # Runs execute in the executors: show their shared engine totals, and
+        # the whole queue's runs rather than this worker's
+        overrides, counts = await asyncio.gather(
+            asyncio.to_thread(_RUN_QUEUE.engine_metrics),
+            asyncio.to_thread(_RUN_QUEUE.job_counts),
+        )
+        overrides[_RUNS_QUEUED.name] = {(): counts.get("queued", 0)}
+        overrides[_RUNS_IN_FLIGHT.name] = {(): counts.get("running", 0)}
+    return PlainTextResponse(
+        metrics.REGISTRY.render(overrides),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/api/solution/{language}")
 async def get_solution(language: str):
     """Return saved solution if exists, otherwise the stub."""
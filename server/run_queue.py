@@ -0,0 +1,338 @@
+"""Shared run queue for multi-process deployments (python -m server --workers N).
+
+With several HTTP worker processes, each running its own engine would put no
+limit on concurrent runs across the host. Instead, every worker submits its
+/api/run requests to one queue -- a SQLite file in WAL mode -- and a fixed
+pool of executor processes takes jobs from it, oldest first, running one at
+a time each. The number of executors therefore caps concurrent runs however
+many workers accept requests.
+
+A job row holds the run_solution_async() keyword arguments and, once run,
+its result; the worker that submitted a job polls for that job's row, so
+each result goes back to the request that asked for it. If an executor
+dies, the main process restarts it and re-queues the job it was running
+(once; a job that kills a second executor fails instead).
+
+Engine metrics (engine.metrics) are counted in the executors, so each one
+adds its increments to a metrics table along with every result, and a
+worker's /metrics shows those shared totals rather than its own (empty)
+engine counters.
+"""
+
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+
+from engine import history, jvm_pool, metrics, run_solution_async
+
+# How often executors look for queued jobs and workers for finished ones
+_POLL_SECONDS = 0.02
+
+# How often the main process checks that every executor is alive
+_SUPERVISE_SECONDS = 1.0
+
+# Executors a job may be started on before it is failed
+_MAX_ATTEMPTS = 2
+
+# Job ids per status query (SQLite's default bound-parameter limit is 999)
+_POLL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    submitted_at REAL NOT NULL,
+    kwargs TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    executor_pid INTEGER,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, id);
+
+-- Engine counter and histogram totals across executors; labels and value
+-- are JSON (a label value list, and a number or histogram bucket list)
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (name, labels)
+);
+"""
+
+
+class RunFailed(RuntimeError):
+    """The engine raised while running a queued job, or its executor died twice."""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # Autocommit; multi-statement changes use _transaction()
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """A write transaction, taking the database's write lock up front."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class RunQueue:
+    """A worker process's side of the queue: submit runs and await their results.
+
+    Each call to run() adds a job; one polling task per event loop checks all
+    of the worker's waiting jobs at once.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        # Job id -> [future, on_start callback or None]
+        self._waiting = {}
+        self._poller = None
+
+    async def run(self, kwargs: dict, on_start=None) -> dict:
+        """Queue a run_solution_async(**kwargs) call and return its result.
+
+        on_start, if given, is called once an executor has taken the job.
+        Raises RunFailed if the run did not produce a result.
+        """
+        job_id = await asyncio.to_thread(self._submit, json.dumps(kwargs))
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[job_id] = [future, on_start]
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        try:
+            return await future
+        finally:
+            del self._waiting[job_id]
+            # A finished job's result has been read; a queued one (the
+            # request was cancelled) is dropped before an executor takes it
+            await asyncio.to_thread(self._execute, "DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    async def _poll(self):
+        while self._waiting:
+            await asyncio.sleep(_POLL_SECONDS)
+            try:
+                rows = await asyncio.to_thread(self._progress, list(self._waiting))
+            except sqlite3.Error:
+                # Busy or briefly unavailable; try again next tick
+                continue
+            for job_id, state, result in rows:
+                entry = self._waiting.get(job_id)
+                if entry is None or entry[0].done():
+                    continue
+                future, on_start = entry
+                if on_start is not None and state != "queued":
+                    entry[1] = None
+                    on_start()
+                if state == "done":
+                    future.set_result(json.loads(result))
+                elif state == "failed":
+                    future.set_exception(RunFailed(result))
+
+    def engine_metrics(self) -> dict:
+        """Engine counter and histogram totals of every executor, as Registry.render() overrides."""
+        totals = {}
+        for name, labels, value in self._execute("SELECT name, labels, value FROM metrics"):
+            totals.setdefault(name, {})[tuple(json.loads(labels))] = json.loads(value)
+        return totals
+
+    def job_counts(self) -> dict:
+        """Jobs in the queue by state ("queued", "running", ...), across all workers."""
+        return dict(self._execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self._path)
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()):
+        return self._conn().execute(sql, params)
+
+    def _submit(self, kwargs: str) -> int:
+        return self._execute(
+            "INSERT INTO jobs (submitted_at, kwargs) VALUES (?, ?)", (time.time(), kwargs),
+        ).lastrowid
+
+    def _progress(self, job_ids: list) -> list:
+        """(id, state, result) of the given jobs that an executor has taken."""
+        rows = []
+        for i in range(0, len(job_ids), _POLL_BATCH):
+            batch = job_ids[i:i + _POLL_BATCH]
+            rows.extend(self._execute(
+                f"SELECT id, state, result FROM jobs WHERE id IN ({', '.join('?' * len(batch))})"
+                " AND state != 'queued'",
+                tuple(batch),
+            ))
+        return rows
+
+
+class ExecutorPool:
+    """The main process's fixed set of executor processes, restarted if they die.
+
+    With cpus, executor i is pinned to cpus[i] (isolation mode: each
+    executor's tests and setup commands then share that one core).
+    """
+
+    def __init__(self, path: str, size: int, cpus: list | None = None):
+        self._path = path
+        self._cpus = cpus
+        self._processes = [None] * size
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = threading.Event()
+        self._supervisor = threading.Thread(target=self._supervise, name="workbench-executors", daemon=True)
+
+    def start(self):
+        _connect(self._path).close()
+        for i in range(len(self._processes)):
+            self._start(i)
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop every executor (cancelling its run) and wait for them to exit."""
+        self._stopping.set()
+        if self._supervisor.is_alive():
+            self._supervisor.join()
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _start(self, i: int):
+        cpu = self._cpus[i] if self._cpus else None
+        process = self._context.Process(
+            target=executor_main, args=(self._path, cpu), name=f"workbench-executor-{i}", daemon=True,
+        )
+        process.start()
+        self._processes[i] = process
+
+    def _supervise(self):
+        conn = _connect(self._path)
+        try:
+            while not self._stopping.wait(_SUPERVISE_SECONDS):
+                for i, process in enumerate(self._processes):
+                    if process.is_alive():
+                        continue
+                    process.join()
+                    try:
+                        _release_jobs(conn, process.pid)
+                    except sqlite3.Error:
+                        continue
+                    self._start(i)
+        finally:
+            conn.close()
+
+
+def _release_jobs(conn: sqlite3.Connection, pid: int):
+    """Re-queue (or, past _MAX_ATTEMPTS, fail) the job a dead executor was running."""
+    with _transaction(conn):
+        conn.execute(
+            "UPDATE jobs SET state = 'failed', result = ?"
+            " WHERE state = 'running' AND executor_pid = ? AND attempts >= ?",
+            ("Run executor exited while running this job", pid, _MAX_ATTEMPTS),
+        )
+        conn.execute(
+            "UPDATE jobs SET state = 'queued', executor_pid = NULL WHERE state = 'running' AND executor_pid = ?",
+            (pid,),
+        )
+
+
+def executor_main(path: str, cpu: int | None = None):
+    """Executor process: run queued jobs one at a time until SIGTERM."""
+    # Ctrl-C reaches the whole process group; the main process stops executors
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    # Runs the workbench's jobs, so they are recorded like its own
+    history.enable_recording()
+    asyncio.run(_serve(path))
+
+
+async def _serve(path: str):
+    loop = asyncio.get_running_loop()
+    # SIGTERM cancels the current run, which stops its test processes
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    conn = _connect(path)
+    pid = os.getpid()
+    # Engine metrics already added to the shared totals
+    reported = metrics.REGISTRY.snapshot()
+    try:
+        while True:
+            job = _claim(conn, pid)
+            if job is None:
+                await asyncio.sleep(_POLL_SECONDS)
+                continue
+            job_id, kwargs = job
+            try:
+                result = await run_solution_async(**json.loads(kwargs))
+            except Exception as e:
+                state, payload = "failed", f"Engine error: {e}"
+            else:
+                state, payload = "done", json.dumps(result)
+            current = metrics.REGISTRY.snapshot()
+            with _transaction(conn):
+                # Updates nothing if the submitting request was cancelled meanwhile
+                conn.execute("UPDATE jobs SET state = ?, result = ? WHERE id = ?", (state, payload, job_id))
+                _add_metrics(conn, metrics.diff(current, reported))
+            reported = current
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await jvm_pool.close_pools()
+        conn.close()
+
+
+def _add_metrics(conn: sqlite3.Connection, changes: dict):
+    """Add an executor's metrics.diff() increments to the shared totals (in a transaction)."""
+    for name, children in changes.items():
+        for key, delta in children.items():
+            labels = json.dumps(list(key))
+            row = conn.execute(
+                "SELECT value FROM metrics WHERE name = ? AND labels = ?", (name, labels),
+            ).fetchone()
+            totals = {name: {key: json.loads(row[0])}} if row else {}
+            metrics.add(totals, {name: {key: delta}})
+            conn.execute(
+                "INSERT OR REPLACE INTO metrics (name, labels, value) VALUES (?, ?, ?)",
+                (name, labels, json.dumps(totals[name][key])),
+            )
+
+
+def _claim(conn: sqlite3.Connection, pid: int) -> tuple | None:
+    """Take the oldest queued job for this executor; returns (id, kwargs) or None."""
+    # Idle executors only read; the write lock is taken when there is work
+    if conn.execute("SELECT 1 FROM jobs WHERE state = 'queued' LIMIT 1").fetchone() is None:
+        return None
+    with _transaction(conn):
+        row = conn.execute(
+            "SELECT id, kwargs FROM jobs WHERE state = 'queued' ORDER BY id LIMIT 1",
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET state = 'running', executor_pid = ?, attempts = attempts + 1 WHERE id = ?",
+                (pid, row[0]),
+            )
+    return row
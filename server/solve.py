@@ -0,0 +1,190 @@
+"""Reference solver as a service (POST /api/solve).
+
+Answers equivalent-resistance queries in-process with the exact reference
+solver (problems/equivalent-resistance/tools/reference.py). Its Levels --
+the values reachable with each resistor count, materialized up to a budget
+-- are the expensive part, and depend only on the base set: a Levels built
+for maxResistors M answers any query with at most M. They are kept per base
+set in an LRU cache bounded by the number of values held, and answers in a
+second LRU cache, so a repeated query costs a dictionary lookup. Concurrent
+requests share work: identical queries wait for one answer, and queries on
+the same base set wait for one Levels build. Targets outside the reachable
+range (0 and MAX included) are answered from the per-level bounds alone,
+without building Levels.
+
+Other queries are checked against fixed budgets before any work is done
+that could exceed them: Levels are built level by level only while the
+next one's candidate count fits MAX_LEVEL_VALUES, and the search is only
+run when its bound on outer values visited (Levels.search_steps) fits
+MAX_SEARCH_STEPS. A query over either raises QueryTooLarge.
+"""
+
+import asyncio
+import collections
+import importlib.util
+import os
+import sys
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HARNESS_DIR = os.path.join(_PROJECT_ROOT, "problems", "equivalent-resistance", "languages", "python")
+_TOOLS_DIR = os.path.join(_PROJECT_ROOT, "problems", "equivalent-resistance", "tools")
+
+
+def _load(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_reference():
+    """tools/reference.py, loaded without touching sys.path.
+
+    It imports the harness modules solver and resistor_utils by name; they
+    are bound in sys.modules only while it loads, and whatever held those
+    names before is put back, so nothing the server imports is shadowed.
+    """
+    harness = {name: _load(name, os.path.join(_HARNESS_DIR, f"{name}.py")) for name in ("solver", "resistor_utils")}
+    saved = {name: sys.modules.get(name) for name in harness}
+    sys.modules.update(harness)
+    try:
+        return _load("reference", os.path.join(_TOOLS_DIR, "reference.py"))
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                del sys.modules[name]
+            else:
+                sys.modules[name] = module
+
+
+_reference = _load_reference()
+Levels = _reference.Levels
+LevelBounds = _reference.LevelBounds
+
+# Largest maxResistors accepted at all (the testcases go up to 13); whether
+# a query fits is decided by the budgets below, which a pair of base values
+# always does at this size
+MAX_RESISTORS = 13
+
+# Values one base set's Levels may hold (about 300 MB at peak while building)
+MAX_LEVEL_VALUES = 1_000_000
+# Outer values one search may visit (about a second or two)
+MAX_SEARCH_STEPS = 2_000_000
+
+# Values held by cached Levels across base sets (the most recently used
+# Levels is kept even if it alone is larger), and answers kept
+_MAX_CACHED_VALUES = 4_000_000
+_MAX_CACHED_ANSWERS = 4096
+
+
+class QueryTooLarge(ValueError):
+    """A query whose levels or search would exceed the solver's budgets."""
+
+
+class ReferenceSolver:
+    """Cached, coalescing front end to the reference solver, for one event loop."""
+
+    def __init__(self, max_values: int = _MAX_CACHED_VALUES, max_answers: int = _MAX_CACHED_ANSWERS):
+        self._max_values = max_values
+        self._max_answers = max_answers
+        # Base set -> Levels, least recently used first
+        self._levels = collections.OrderedDict()
+        # (base set, target, max_resistors) -> answer, least recently used first
+        self._answers = collections.OrderedDict()
+        # In-progress answers by query, and Levels builds by base set
+        self._solving = {}
+        self._building = {}
+
+    async def solve(self, base_resistances: list, target: float, max_resistors: int) -> dict:
+        """The optimal configuration for target (0 or float("inf") for MAX).
+
+        Returns a dict with scf, value, resistors, error (None for 0 / MAX)
+        and cached (whether the answer was already known).
+        """
+        key = (tuple(base_resistances), target, max_resistors)
+        answer = self._answers.get(key)
+        if answer is not None:
+            self._answers.move_to_end(key)
+            return dict(answer, cached=True)
+
+        task = self._solving.get(key)
+        if task is None:
+            task = self._solving[key] = asyncio.ensure_future(self._solve(key))
+            task.add_done_callback(lambda _: self._solving.pop(key, None))
+        # Shielded: one caller going away does not cancel the others' answer
+        return dict(await asyncio.shield(task), cached=False)
+
+    async def _solve(self, key: tuple) -> dict:
+        base, target, max_resistors = key
+        edge = LevelBounds(base, max_resistors).edge(target)
+        if edge is not None:
+            scf, value, count = edge.scf(), edge.value, edge.size
+        else:
+            levels = await self._get_levels(base, max_resistors)
+            if levels.search_steps(max_resistors) > MAX_SEARCH_STEPS:
+                raise QueryTooLarge(
+                    f"Searching {max_resistors} resistors over {len(base)} base values is too large to answer",
+                )
+            value, ref, count = await asyncio.to_thread(levels.best, target, max_resistors)
+            scf = await asyncio.to_thread(levels.scf, ref)
+        answer = {
+            "scf": scf,
+            "value": value,
+            "resistors": count,
+            "error": None if target in (0, float("inf")) else abs(value - target),
+        }
+        self._answers[key] = answer
+        while len(self._answers) > self._max_answers:
+            self._answers.popitem(last=False)
+        return answer
+
+    async def _get_levels(self, base: tuple, max_resistors: int) -> Levels:
+        """Levels for base answering up to max_resistors, building them if needed."""
+        while True:
+            levels = self._levels.get(base)
+            if levels is not None and levels.max_resistors >= max_resistors:
+                self._levels.move_to_end(base)
+                return levels
+            build = self._building.get(base)
+            if build is None:
+                break
+            # Wait for the running build; it may be for fewer resistors, or
+            # too large for its own query but not for this one
+            try:
+                await asyncio.shield(build)
+            except QueryTooLarge:
+                pass
+
+        build = self._building[base] = asyncio.ensure_future(
+            asyncio.to_thread(_build_levels, base, max_resistors),
+        )
+        try:
+            levels = await asyncio.shield(build)
+        finally:
+            if self._building.get(base) is build:
+                del self._building[base]
+        current = self._levels.get(base)
+        if current is None or current.max_resistors < levels.max_resistors:
+            self._levels[base] = levels
+        self._levels.move_to_end(base)
+        self._evict()
+        return levels
+
+    def _evict(self):
+        total = sum(_size(levels) for levels in self._levels.values())
+        while total > self._max_values and len(self._levels) > 1:
+            _, levels = self._levels.popitem(last=False)
+            total -= _size(levels)
+
+
+def _build_levels(base: tuple, max_resistors: int) -> Levels:
+    levels = Levels(list(base), max_resistors, lazy=True)
+    if not levels.materialize_within(MAX_LEVEL_VALUES):
+        raise QueryTooLarge(
+            f"Levels for {max_resistors} resistors over {len(base)} base values are too large to build",
+        )
+    return levels
+
+
+def _size(levels: Levels) -> int:
+    return sum(len(values) for values in levels.values)
@@ -54,6 +54,8 @@ const VERDICT_LABELS = {
     time_limit_exceeded: 'TLE',
     memory_limit_exceeded: 'MLE',
     runtime_error: 'RTE',
+    too_slow: 'SLOW',
+    skipped: 'SKIP',
 };
 
 const VERDICT_CSS = {
@@ -62,6 +64,8 @@ const VERDICT_CSS = {
     time_limit_exceeded: 'verdict-tle',
     memory_limit_exceeded: 'verdict-mle',
     runtime_error: 'verdict-rte',
+    too_slow: 'verdict-tle',
+    skipped: 'verdict-rte',
 };
 
 // ---- Initialization ----
@@ -179,6 +183,29 @@ async function switchLanguage(lang) {
 
 // ---- Test execution ----
 
+function renderMemoryProfile(report) {
+    let text = 'Allocations near the limit: ' + report.traced_mb + 'MB traced (+' +
+        report.tracemalloc_overhead_mb + 'MB tracing overhead)\n';
+    for (const site of report.sites) {
+        text += site.size_mb.toFixed(2).padStart(8) + 'MB  ' +
+            String(site.count).padStart(9) + ' blocks  ' + site.frames.join(' > ') + '\n';
+    }
+    return '<div class="result-message result-profile collapsed" onclick="this.classList.toggle(\'collapsed\')">' +
+        escapeHtml(text) + '</div>';
+}
+
+function renderProfile(profile) {
+    const note = profile.complete ? '' : ', stopped at the CPU limit';
+    let text = 'Profile: ' + profile.samples + ' samples, ' + profile.sampled_seconds + 's' + note + '\n';
+    for (const fn of profile.functions) {
+        text += fn.cumulative_pct.toFixed(1).padStart(5) + '%  ' +
+            fn.cumulative_seconds.toFixed(3) + 's cum  ' +
+            fn.self_seconds.toFixed(3) + 's self  ' + fn.function + '\n';
+    }
+    return '<div class="result-message result-profile collapsed" onclick="this.classList.toggle(\'collapsed\')">' +
+        escapeHtml(text) + '</div>';
+}
+
 async function runTests() {
     if (running || !currentLanguage) return;
 
@@ -191,11 +218,17 @@ async function runTests() {
     resultsEl.innerHTML = '<div class="results-loading">Running tests...</div>';
 
     const code = editor.getValue();
+    const failFast = document.getElementById('fail-fast-toggle').checked;
 
     try {
         const result = await api('POST', '/api/run', {
             language: currentLanguage,
             code: code,
+            profile: document.getElementById('profile-toggle').checked,
+            memory_profile: document.getElementById('memory-profile-toggle').checked,
+            // Quick feedback: likely-fast tests first, stop at the first failure
+            fail_fast: failFast,
+            order: failFast ? 'cheapest' : 'file',
         });
         renderResults(result);
     } catch (e) {
@@ -231,21 +264,35 @@ function renderResults(result) {
     }
 
     const summary = result.summary;
+    const skipped = summary.skipped ? ', ' + summary.skipped + ' skipped' : '';
     let html = '<div class="results-summary">' +
-        summary.passed + '/' + summary.total + ' passed (' + summary.time_seconds + 's)</div>';
+        summary.passed + '/' + summary.total + ' passed' + skipped + ' (' + summary.time_seconds + 's)</div>';
 
     for (const test of result.tests) {
         const meta = getTestMeta(test.name);
 
+        if (test.verdict === 'skipped') {
+            html += '<div class="result-row">' +
+                '<span class="verdict ' + VERDICT_CSS.skipped + '">' + VERDICT_LABELS.skipped + '</span>' +
+                '<span>' + escapeHtml(test.name) + '</span>' +
+                '</div>';
+            continue;
+        }
+
         // Per-test mode (has verdict)
         if (test.verdict) {
             const label = VERDICT_LABELS[test.verdict] || test.verdict.toUpperCase();
             const css = VERDICT_CSS[test.verdict] || '';
+            // time_seconds is CPU time; wall time is reported alongside
+            const usage = test.wall_seconds !== undefined
+                ? test.time_seconds + 's cpu, ' + test.wall_seconds + 's wall'
+                : test.time_seconds + 's';
+            const ratio = test.time_ratio !== undefined ? ', ' + test.time_ratio + 'x ref' : '';
 
             html += '<div class="result-row">' +
                 '<span class="verdict ' + css + '">' + label + '</span>' +
                 '<span>' + escapeHtml(test.name) + '</span>' +
-                '<span class="result-meta">(' + test.time_seconds + 's, ' + test.memory_mb + 'MB)</span>' +
+                '<span class="result-meta">(' + usage + ratio + ', ' + test.memory_mb + 'MB)</span>' +
                 '</div>';
 
             if (meta) {
@@ -261,6 +308,14 @@ function renderResults(result) {
                 html += '<div class="result-message collapsed" onclick="this.classList.toggle(\'collapsed\')">' +
                     escapeHtml(test.message) + '</div>';
             }
+
+            if (test.profile) {
+                html += renderProfile(test.profile);
+            }
+
+            if (test.memory_profile) {
+                html += renderMemoryProfile(test.memory_profile);
+            }
         }
         // Batch mode (has passed boolean)
         else {
@@ -0,0 +1,50 @@
+import json
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from server.app import app
+
+_TESTCASES = Path(__file__).parent.parent / "problems" / "equivalent-resistance" / "testcases.json"
+
+
+def e96_base_resistances():
+    return json.loads(_TESTCASES.read_text())["tests"][0]["baseResistances"]
+
+
+def test_solve_answers():
+    client = TestClient(app)
+    response = client.post("/api/solve", json={"baseResistances": [10, 20], "target": 31.4159, "maxResistors": 5})
+    assert response.status_code == 200
+    assert response.json()["resistors"] == 5
+    assert abs(response.json()["value"] - 31.42857) < 1e-4
+
+
+def test_solve_rejects_large_query_quickly():
+    client = TestClient(app)
+    start = time.monotonic()
+    response = client.post(
+        "/api/solve",
+        json={"baseResistances": e96_base_resistances(), "target": 3.14159, "maxResistors": 12},
+    )
+    assert response.status_code == 422
+    assert time.monotonic() - start < 5
+
+
+def test_solve_rejects_large_search_quickly():
+    # Levels up to 2 resistors fit, but searching 5 over them does not
+    client = TestClient(app)
+    start = time.monotonic()
+    response = client.post(
+        "/api/solve",
+        json={"baseResistances": e96_base_resistances(), "target": 3.14159, "maxResistors": 5},
+    )
+    assert response.status_code == 422
+    assert time.monotonic() - start < 5
+
+
+def test_solve_rejects_max_resistors_over_cap():
+    client = TestClient(app)
+    response = client.post("/api/solve", json={"baseResistances": [1], "target": 0.3, "maxResistors": 14})
+    assert response.status_code == 400